@@ -0,0 +1,97 @@
+#ifndef PACKED_H
+#define PACKED_H
+
+#include <stdint.h>
+#include <cstring>
+#include "constants.h"
+#include "globals.h"
+
+// PACKED: UPLOAD as per-axis fixed point, row = offset + scale * q, with q sent as itself or as its first or
+// second difference along time (newUI/Hexlink/packing.py encodes, its decode() is the reference for this file).
+//   header  order u8, width u8, 2 pad, rows u32, scale f32[6], offset f32[6]
+//   seeds   min(order, rows) rows of q as int16
+//   body    the order-th difference of q for the remaining rows, int8 (width 1) or int16 (width 2)
+// Rows are decoded into dataBuffer as the payload arrives, there is no second copy of the packet.
+// PackedHeader is in protocol.h.
+static_assert(sizeof(PackedHeader::scale) == NUM_COL * sizeof(float), "PackedHeader carries one scale per axis");
+
+struct PackedDecoder
+{
+    PackedHeader header;
+    size_t headerBytes;
+    size_t values;          // values decoded so far, row = values / NUM_COL
+    int32_t q[NUM_COL];     // current row
+    int32_t d1[NUM_COL];    // current first difference, order 2
+    uint8_t partial[2];
+    uint8_t partialBytes;
+    bool valid;
+};
+PackedDecoder packed;
+
+inline void packedBegin()
+{
+    memset(&packed, 0, sizeof(packed));
+}
+
+inline bool packedComplete()
+{
+    return packed.valid && packed.values == size_t(packed.header.rows) * NUM_COL;
+}
+
+inline void packedValue(int32_t v)
+{
+    size_t row = packed.values / NUM_COL;
+    size_t col = packed.values % NUM_COL;
+    if (row >= packed.header.rows || row >= maxArrayLength)
+    {
+        packed.valid = false;
+        return;
+    }
+    if (row < packed.header.order) // seed rows carry q itself
+    {
+        if (row == 1)
+            packed.d1[col] = v - packed.q[col];
+        packed.q[col] = v;
+    }
+    else if (packed.header.order == 0)
+        packed.q[col] = v;
+    else if (packed.header.order == 1)
+        packed.q[col] += v;
+    else
+    {
+        packed.d1[col] += v;
+        packed.q[col] += packed.d1[col];
+    }
+    dataBuffer.data[row][col] = packed.header.offset[col] + packed.header.scale[col] * float(packed.q[col]);
+    packed.values++;
+}
+
+inline void packedFeed(const uint8_t *buf, size_t len)
+{
+    size_t i = 0;
+    if (packed.headerBytes < PACKED_HEADER_SIZE)
+    {
+        while (i < len && packed.headerBytes < PACKED_HEADER_SIZE)
+            reinterpret_cast<uint8_t *>(&packed.header)[packed.headerBytes++] = buf[i++];
+        if (packed.headerBytes < PACKED_HEADER_SIZE)
+            return;
+        const PackedHeader &h = packed.header;
+        packed.valid = h.order <= 2 && (h.width == 1 || h.width == 2) && !(h.order == 0 && h.width == 1);
+    }
+    if (!packed.valid)
+        return;
+    for (; i < len; i++)
+    {
+        uint8_t width = (packed.values / NUM_COL < packed.header.order) ? 2 : packed.header.width;
+        packed.partial[packed.partialBytes++] = buf[i];
+        if (packed.partialBytes < width)
+            continue;
+        packed.partialBytes = 0;
+        if (width == 1)
+            packedValue(int8_t(packed.partial[0]));
+        else
+            packedValue(int16_t(packed.partial[0] | (packed.partial[1] << 8)));
+    }
+}
+
+#endif // PACKED_H
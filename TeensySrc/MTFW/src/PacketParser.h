@@ -8,6 +8,7 @@
 #include "globals.h"
 #include "RingBuffer.h"
 #include "messages.h"
+#include "Packed.h"
 
 enum class ParseState {
     AWAIT_START,
@@ -122,9 +123,27 @@ inline void handleMOVE(PacketParserState& s, const uint8_t* buf, size_t len) {
 
 inline void handleUPLOAD(PacketParserState& s, const uint8_t*, size_t) {
     request = s.msgID;
+    activeStart = 0;
     arrayLength = s.payloadSize / ROW_SIZE; // number of rows
 }
 
+inline void handleSTREAM(PacketParserState& s, const uint8_t* buf, size_t len) {
+    // only the header comes through here, the rows go straight into the ring
+    memcpy(reinterpret_cast<uint8_t*>(&streamFirstRow) + s.payloadBytesRead, buf, len);
+    request = s.msgID;
+}
+
+inline void handlePACKED(PacketParserState& s, const uint8_t* buf, size_t len) {
+    packedFeed(buf, len); // decoded straight into dataBuffer
+    request = s.msgID;
+}
+
+inline void handleHAVE(PacketParserState& s, const uint8_t* buf, size_t len) {
+    if (s.payloadBytesRead + len <= sizeof(haveQuery))
+        memcpy(reinterpret_cast<uint8_t*>(&haveQuery) + s.payloadBytesRead, buf, len);
+    request = s.msgID;
+}
+
 inline void handleSimple(PacketParserState& s, const uint8_t*, size_t) {
     request = s.msgID;
 }
@@ -142,6 +161,9 @@ inline void initMsgHandlers() {
     msgHandlers[msgID::NAK]    = handleNAK;
     msgHandlers[msgID::MOVE]   = handleMOVE;
     msgHandlers[msgID::UPLOAD] = handleUPLOAD;
+    msgHandlers[msgID::STREAM] = handleSTREAM;
+    msgHandlers[msgID::PACKED] = handlePACKED;
+    msgHandlers[msgID::HAVE]   = handleHAVE;
 }
 
 // ---- Core Parse Function ----
@@ -168,11 +190,13 @@ inline void parsePacket(PacketParserState& s) {
         ring.readBytes(headerBytes, HEADER_SIZE);
         updateCRC(s, headerBytes, HEADER_SIZE);
 
-        memcpy(&s.packetLength, &headerBytes[LEN_OFFSET], LEN_SIZE);
-        memcpy(&s.sequence, &headerBytes[SEQ_OFFSET], SEQ_SIZE);
-        s.fromID = headerBytes[FROM_OFFSET];
-        s.toID   = headerBytes[TO_OFFSET];
-        s.msgID  = headerBytes[MSG_ID_OFFSET];
+        PacketHeader header;
+        memcpy(&header, headerBytes, HEADER_SIZE);
+        s.packetLength = header.len;
+        s.sequence = header.seq;
+        s.fromID = header.from;
+        s.toID   = header.to;
+        s.msgID  = header.msgId;
 
         s.payloadSize     = s.packetLength - PACKET_OVERHEAD;
         s.payloadBytesRead = 0;
@@ -182,6 +206,13 @@ inline void parsePacket(PacketParserState& s) {
             return;
         }
 
+        if (s.msgID == msgID::UPLOAD || s.msgID == msgID::PACKED) {
+            hasQueued = false;     // it overwrites PSRAM from row 0
+            dataTagValid = false;
+        }
+        if (s.msgID == msgID::PACKED) packedBegin();
+        if (s.msgID == msgID::QUEUE) queueFits = (s.payloadSize % ROW_SIZE == 0) && placeQueue(s.payloadSize / ROW_SIZE);
+
         s.state = ParseState::AWAIT_PAYLOAD_CRC;
         break;
     }
@@ -195,9 +226,28 @@ inline void parsePacket(PacketParserState& s) {
                 updateCRC(s, dataBuffer.bytes + s.payloadBytesRead, n);
                 s.payloadBytesRead += n;
             }
+        } else if (s.msgID == msgID::QUEUE && queueFits) {
+            uint8_t* dst = dataBuffer.bytes + queueStart * ROW_SIZE + s.payloadBytesRead;
+            size_t n = ring.readBytes(dst, remaining);
+            if (n > 0) {
+                updateCRC(s, dst, n);
+                s.payloadBytesRead += n;
+            }
+        } else if (s.msgID == msgID::STREAM && s.payloadBytesRead >= STREAM_HEADER_SIZE) {
+            // rows land after the last committed row; a bad packet is never committed, so this is harmless
+            size_t pos = (size_t(streamWrite) * ROW_SIZE + s.payloadBytesRead - STREAM_HEADER_SIZE) % STREAM_RING_BYTES;
+            size_t toRead = (remaining < STREAM_RING_BYTES - pos) ? remaining : (STREAM_RING_BYTES - pos);
+            size_t n = ring.readBytes(dataBuffer.bytes + pos, toRead);
+            if (n > 0) {
+                updateCRC(s, dataBuffer.bytes + pos, n);
+                s.payloadBytesRead += n;
+            }
         } else {
             size_t available = ring.size();
             size_t toRead = (remaining < available) ? remaining : available;
+            if (toRead > TEMP_BUFFER_SIZE) toRead = TEMP_BUFFER_SIZE; // PACKED payloads come through here
+            if (s.msgID == msgID::STREAM && toRead > STREAM_HEADER_SIZE - s.payloadBytesRead)
+                toRead = STREAM_HEADER_SIZE - s.payloadBytesRead;
 
             if (toRead > 0) {
                 size_t n = ring.readBytes(s.tempBuffer, toRead);
@@ -28,6 +28,23 @@ USBSerial_BigBuffer teensyZ(myusb, 3);
 
 size_t readIndex = 0;
 size_t arrayLength = 0;
+size_t activeStart = 0;                 // first dataBuffer row of the trajectory being played
+
+// QUEUE: the next trajectory goes into free PSRAM next to the active one, motorTick switches to it at the end
+size_t queueStart = 0;
+size_t queueLength = 0;
+bool queueFits = false;                 // placement of the QUEUE packet being parsed
+volatile bool hasQueued = false;
+volatile bool queueSwitched = false;    // motorTick switched trajectories, loop() reports it
+volatile uint32_t queueSwitches = 0;
+
+// HAVE: CRC32 of the UPLOAD/PACKED payload that wrote dataBuffer rows [0, dataTagRows), as named by the host
+HaveQuery haveQuery;                    // payload of the HAVE packet being parsed
+uint32_t dataTag = 0;
+uint32_t dataTagRows = 0;
+bool dataTagValid = false;
+HaveQuery pendingTag;                   // from the last HAVE that missed, names the upload that follows it
+bool pendingTagValid = false;
 uint8_t MsgID = 0;
 uint8_t response = 0;
 uint8_t request = 0;
@@ -37,6 +54,16 @@ float MoveData[6];
 bool doPlay = false;
 bool hasData = false;
 
+// streaming play: rows are counted from the start of the stream, the ring slot is row % maxArrayLength
+bool streamMode = false;
+bool streamEnded = false;
+bool streamDrained = false;
+uint32_t streamFirstRow = 0;            // header of the STREAM packet being parsed
+volatile uint32_t streamWrite = 0;      // rows received
+volatile uint32_t streamRead = 0;       // row being played
+volatile uint32_t streamUnderruns = 0;  // ticks that wanted a row not received yet
+elapsedMillis statusTimer;
+
 
 const uint32_t frMax = 100;
 volatile uint32_t feedRate = 0;
@@ -47,7 +74,54 @@ volatile bool irqSend = false;
 inline const float* getRow(uint32_t i) 
 {
     if (arrayLength == 0) return nullptr;
-    return dataBuffer.data[i % arrayLength];
+    return dataBuffer.data[activeStart + i % arrayLength];
+}
+
+// Place a QUEUE of `rows` after the active trajectory, or before it when that end of PSRAM is too short.
+inline bool placeQueue(size_t rows)
+{
+    hasQueued = false; // the old queued rows may be overwritten from here on
+    if (rows == 0)
+        return false;
+    if (activeStart + arrayLength + rows <= maxArrayLength)
+        queueStart = activeStart + arrayLength;
+    else if (rows <= activeStart)
+        queueStart = 0;
+    else
+        return false;
+    if (queueStart < dataTagRows)
+        dataTagValid = false;
+    queueLength = rows;
+    return true;
+}
+
+// The upload that just completed is the one the last missed HAVE asked about.
+inline void adoptTag()
+{
+    dataTagValid = pendingTagValid && pendingTag.rows == arrayLength;
+    dataTag = pendingTag.crc;
+    dataTagRows = pendingTag.rows;
+    pendingTagValid = false;
+}
+
+// HAVE: true when rows [0, rows) hold exactly that payload; a miss remembers the tag for the upload to come.
+inline bool haveTag(const HaveQuery &q)
+{
+    if (dataTagValid && !streamMode && dataTag == q.crc && dataTagRows == q.rows && q.rows > 0)
+        return true;
+    pendingTag = q;
+    pendingTagValid = true;
+    return false;
+}
+
+inline void endStream()
+{
+    streamMode = false;
+    streamEnded = false;
+    streamDrained = false;
+    streamWrite = 0;
+    streamRead = 0;
+    streamUnderruns = 0;
 }
 
 LPF<100> slider(0.1, 1e-3);
@@ -22,6 +22,30 @@ void initUSBHost()
 {
 }
 
+void streamTick(uint32_t deltaIndex)
+{
+  uint32_t next = streamRead + deltaIndex;
+  if (next >= streamWrite)
+  {
+    if (streamEnded)
+    {
+      streamDrained = true;
+      doPlay = false;
+      feedRate = 0;
+    }
+    else if (deltaIndex)
+    {
+      streamUnderruns++; // hold the last row until the host catches up
+    }
+    next = streamWrite ? streamWrite - 1 : 0;
+  }
+  streamRead = next;
+  if (!doPlay || !hasData)
+    return;
+  memcpy(MoveData, dataBuffer.data[streamRead % maxArrayLength], sizeof(MoveData));
+  irqSend = true;
+}
+
 void motorTick()
 {
 
@@ -29,7 +53,23 @@ void motorTick()
   frRemainder += ((uint32_t)(LPFy));
   uint32_t deltaIndex = floor(frRemainder / frMax);
   frRemainder %= frMax;
-  readIndex = (readIndex + deltaIndex) % arrayLength;
+  if (streamMode)
+  {
+    streamTick(deltaIndex);
+    return;
+  }
+  size_t next = readIndex + deltaIndex;
+  if (next >= arrayLength && hasQueued)
+  {
+    // gapless: carry the overshoot into the queued trajectory
+    next -= arrayLength;
+    activeStart = queueStart;
+    arrayLength = queueLength;
+    hasQueued = false;
+    queueSwitches++;
+    queueSwitched = true;
+  }
+  readIndex = next % arrayLength;
   if (!doPlay || !hasData)
     return;
   //  logInfo(Serial," U : %lu, Y: %f", feedRate, LPFy);
@@ -38,6 +38,16 @@ void serialEvent()
 void loop()
 {   myusb.Task();
     packetParser.parse();
+    if (streamMode && statusTimer >= STATUS_PERIOD_MS)
+    {
+        statusTimer = 0;
+        status(Serial, millis(), NODE_ID_PC);
+    }
+    if (queueSwitched)
+    {
+        queueSwitched = false;
+        status(Serial, queueSwitches, NODE_ID_PC);
+    }
     if(doPlay && hasData)
     {
         if(irqSend)
@@ -50,13 +60,26 @@ void loop()
     }
 }
 
+// UPLOAD, PACKED or a HAVE hit: rows [0, arrayLength) are the trajectory, move to its first row
+void uploadDone(uint32_t sequence)
+{
+    ack(Serial, sequence, NODE_ID_PC, msgID::UPLOAD);
+    endStream();
+
+    const float* row = getRow(0);
+    memcpy(MoveData, row, sizeof(MoveData));
+    move(teensyX, 0, 0x0A, MoveData);
+    move(teensyY, 0, 0x0B, MoveData);
+    move(teensyZ, 0, 0x0C, MoveData);
+    hasData = true;
+}
+
 void onPacketReceived(const PacketInfo &packet)
 {
-    const float* row = nullptr;
     switch (packet.msgID)
     {
     case msgID::HEARTBEAT:
-        ack(Serial, packet.sequence, NODE_ID_PC, msgID::HEARTBEAT);
+        ackTime(Serial, packet.sequence, NODE_ID_PC, msgID::HEARTBEAT);
         break;
     case msgID::ENABLE:
         // ack(Serial, packet.sequence, NODE_ID_PC, msgID::ENABLE);
@@ -82,6 +105,8 @@ void onPacketReceived(const PacketInfo &packet)
         break;
     case msgID::STOP:
         ack(Serial, packet.sequence, NODE_ID_PC, msgID::STOP);
+        endStream();
+        hasQueued = false;
         doPlay = false;
         stop(teensyX, 0, 0x0A);
         stop(teensyY, 0, 0x0B);
@@ -98,19 +123,37 @@ void onPacketReceived(const PacketInfo &packet)
 
         doPlay = false;
         break;
+    case msgID::PACKED:
+        if (!packedComplete())
+        {
+            nak(Serial, packet.sequence, NODE_ID_PC, msgID::UPLOAD);
+            break;
+        }
+        activeStart = 0;
+        arrayLength = packed.header.rows;
+        adoptTag();
+        uploadDone(packet.sequence); // from here on a PACKED upload is an UPLOAD, and is ACKed as one
+        break;
     case msgID::UPLOAD:
         // debug.printf("%lu : DATA: %u rows\n", packet.sequence, arrayLength);
-        ack(Serial, packet.sequence, NODE_ID_PC, msgID::UPLOAD);
-
-        row = getRow(0);
-        memcpy(MoveData, row, sizeof(MoveData));
-        move(teensyX, 0, 0x0A, MoveData);
-        move(teensyY, 0, 0x0B, MoveData);
-        move(teensyZ, 0, 0x0C, MoveData);
-        hasData = true;
+        adoptTag();
+        uploadDone(packet.sequence);
+        break;
+    case msgID::HAVE:
+        if (!haveTag(haveQuery))
+        {
+            nak(Serial, packet.sequence, NODE_ID_PC, msgID::HAVE);
+            break;
+        }
+        activeStart = 0; // the rows are in PSRAM already: finish it like the UPLOAD it replaces
+        arrayLength = dataTagRows;
+        hasQueued = false;
+        uploadDone(packet.sequence);
         break;
     case msgID::RESET:
         Reboot(packet.sequence);
+        endStream();
+        hasQueued = false;
         hasData = false;
         doPlay = false;
         reset(teensyX, 0, 0x0A);
@@ -121,6 +164,8 @@ void onPacketReceived(const PacketInfo &packet)
         break;
     case msgID::QUIT:
         ack(Serial, packet.sequence, NODE_ID_PC, msgID::QUIT);
+        endStream();
+        hasQueued = false;
         hasData = false;
         doPlay = false;
         stop(teensyX, 0, 0x0A);
@@ -153,6 +198,45 @@ void onPacketReceived(const PacketInfo &packet)
         move(teensyY, 0, 0x0B, MoveData);
         move(teensyZ, 0, 0x0C, MoveData);
         break;
+    case msgID::QUEUE:
+        if (!queueFits || !hasData || streamMode) // no room in PSRAM, or nothing to queue behind
+        {
+            nak(Serial, packet.sequence, NODE_ID_PC, msgID::QUEUE);
+            break;
+        }
+        hasQueued = true;
+        ack(Serial, packet.sequence, NODE_ID_PC, msgID::QUEUE);
+        break;
+    case msgID::STREAM:
+        if (packet.payloadSize < STREAM_HEADER_SIZE)
+        {
+            nak(Serial, packet.sequence, NODE_ID_PC, msgID::STREAM);
+            break;
+        }
+        if (!streamMode)
+        {
+            streamMode = true;
+            hasData = false;
+            hasQueued = false;
+            dataTagValid = false; // the ring starts at row 0
+        }
+        if (streamFirstRow == streamWrite) // anything else is a resend or follows a lost packet: drop it
+        {
+            uint32_t rows = (packet.payloadSize - STREAM_HEADER_SIZE) / ROW_SIZE;
+            if (rows == 0)
+                streamEnded = true;
+            streamWrite = streamWrite + rows;
+            if (streamWrite > 0 && !hasData)
+            {
+                memcpy(MoveData, dataBuffer.data[0], sizeof(MoveData));
+                move(teensyX, 0, 0x0A, MoveData);
+                move(teensyY, 0, 0x0B, MoveData);
+                move(teensyZ, 0, 0x0C, MoveData);
+                hasData = true;
+            }
+        }
+        status(Serial, packet.sequence, NODE_ID_PC);
+        break;
     case msgID::FEEDBACK:
         logInfo(Serial, "FEEDBACK\n");
     default:
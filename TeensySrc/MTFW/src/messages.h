@@ -10,18 +10,13 @@ template <typename StreamType>
 void sendPacket(StreamType& serial, uint32_t payloadLen, uint32_t seq, uint8_t toID, uint8_t msgID, const uint8_t* payload)
 {   
     noInterrupts();
-    // make a header struct so that so much memcpy can be avoided
     FastCRC32 crc32;
-    uint32_t index, crc, packetLen;
-    packetLen = PACKET_OVERHEAD + payloadLen;
+    uint32_t index, crc;
+    const PacketHeader header = {uint32_t(PACKET_OVERHEAD + payloadLen), seq, NODE_ID, toID, msgID};
     index = 0;
     crc = 0;
     sendBuffer[index] = START_MARKER; index++;
-    memcpy(&sendBuffer[index], &packetLen, sizeof(packetLen)); index += sizeof(packetLen);
-    memcpy(&sendBuffer[index], &seq,       sizeof(seq));       index += sizeof(seq);
-    sendBuffer[index] = NODE_ID; index++;
-    sendBuffer[index] = toID; index++;
-    sendBuffer[index] = msgID; index++;
+    memcpy(&sendBuffer[index], &header, HEADER_SIZE); index += HEADER_SIZE;
     if (payloadLen > 0)
     {
         memcpy(&sendBuffer[index], payload, payloadLen);
@@ -112,6 +107,29 @@ void ack(StreamType &serial, uint32_t seq, uint8_t toID, uint8_t msgID)
     sendPacket(serial, uint32_t(1), seq, toID, msgID::ACK, &msgID);
 }
 
+// ACK carrying this node's micros() after the acknowledged msgID, used by the host for clock sync.
+// Hosts that only read the first payload byte see a plain ACK.
+template <typename StreamType>
+void ackTime(StreamType &serial, uint32_t seq, uint8_t toID, uint8_t msgID)
+{
+    const AckTime payload = {msgID, uint32_t(micros())};
+    sendPacket(serial, ACK_TIME_SIZE, seq, toID, msgID::ACK, reinterpret_cast<const uint8_t *>(&payload));
+}
+
+// Streaming buffer level, the host's flow control: rows consumed, rows received, underruns, flags.
+// Outside a stream: row being played, rows in the active trajectory, QUEUE switches so far, flags.
+template <typename StreamType>
+void status(StreamType &serial, uint32_t seq, uint8_t toID)
+{
+    Status payload;
+    payload.consumed = streamMode ? streamRead : readIndex;
+    payload.received = streamMode ? streamWrite : arrayLength;
+    payload.underruns = streamMode ? streamUnderruns : queueSwitches;
+    payload.flags = (streamMode ? STATUS_STREAMING : 0) | (streamEnded ? STATUS_ENDED : 0) | (streamDrained ? STATUS_DRAINED : 0)
+                  | (hasQueued ? STATUS_QUEUED : 0);
+    sendPacket(serial, STATUS_SIZE, seq, toID, msgID::STATUS, reinterpret_cast<const uint8_t *>(&payload));
+}
+
 template <typename StreamType>
 void nak(StreamType &serial, uint32_t seq, uint8_t toID, uint8_t msgID)
 {
@@ -0,0 +1,199 @@
+// Hexlink wire protocol: IDs, constants and payload structs.
+// Generated by newUI/Hexlink/codegen.py from newUI/Hexlink/protocol.toml, do not edit: change the schema and
+// run python -m Hexlink.codegen from newUI/, which also regenerates Hexlink/protocol.py and the other firmware.
+#ifndef PROTOCOL_H
+#define PROTOCOL_H
+
+#include <stddef.h>
+#include <stdint.h>
+
+static constexpr uint8_t NODE_ID_MASTER = 0x00;
+static constexpr uint8_t NODE_ID_PC = 0xFF;
+static constexpr uint8_t NODE_ID_BROADCAST = 0x80;
+static constexpr uint8_t NODE_ID_SLAVES[] = {0x0A, 0x0B, 0x0C};
+
+static constexpr uint8_t START_MARKER = 0x01;
+static constexpr size_t START_SIZE = 1;
+static constexpr size_t START_OFFSET = 0;
+// PacketHeader fields, offsets counted from after START
+static constexpr size_t LEN_SIZE = 4;
+static constexpr size_t LEN_OFFSET = 0;
+static constexpr size_t SEQ_SIZE = 4;
+static constexpr size_t SEQ_OFFSET = 4;
+static constexpr size_t FROM_SIZE = 1;
+static constexpr size_t FROM_OFFSET = 8;
+static constexpr size_t TO_SIZE = 1;
+static constexpr size_t TO_OFFSET = 9;
+static constexpr size_t MSG_ID_SIZE = 1;
+static constexpr size_t MSG_ID_OFFSET = 10;
+static constexpr size_t CRC_SIZE = 4;
+static constexpr size_t HEADER_SIZE = 11;
+static constexpr size_t PACKET_OVERHEAD = START_SIZE + HEADER_SIZE + CRC_SIZE;
+static constexpr size_t MIN_PACKET_SIZE = PACKET_OVERHEAD;
+static constexpr size_t MAX_PACKET_SIZE = size_t(16777216 + PACKET_OVERHEAD);
+
+static constexpr uint32_t STATUS_PERIOD_MS = 10; // STATUS interval while streaming
+static constexpr uint8_t STATUS_STREAMING = 0x01;
+static constexpr uint8_t STATUS_ENDED = 0x02; // the empty STREAM that marks the end has arrived
+static constexpr uint8_t STATUS_DRAINED = 0x04; // every received row has been played
+static constexpr uint8_t STATUS_QUEUED = 0x08; // a QUEUE trajectory is waiting behind the active one
+
+namespace msgID
+{
+    static constexpr uint8_t HEARTBEAT  = 0x01;
+    static constexpr uint8_t ENABLE     = 0x02;
+    static constexpr uint8_t PLAY       = 0x03;
+    static constexpr uint8_t PAUSE      = 0x04;
+    static constexpr uint8_t STOP       = 0x05;
+    static constexpr uint8_t DISABLE    = 0x06;
+    static constexpr uint8_t UPLOAD     = 0x07;
+    static constexpr uint8_t ACK        = 0x08;
+    static constexpr uint8_t NAK        = 0x09;
+    static constexpr uint8_t RESET      = 0x0A;
+    static constexpr uint8_t QUIT       = 0x0B;
+    static constexpr uint8_t CONNECT    = 0x0C;
+    static constexpr uint8_t DISCONNECT = 0x0D;
+    static constexpr uint8_t MOVE       = 0x0E;
+    static constexpr uint8_t FEEDBACK   = 0x0F;
+    static constexpr uint8_t STREAM     = 0x10;
+    static constexpr uint8_t STATUS     = 0x11;
+    static constexpr uint8_t QUEUE      = 0x12;
+    static constexpr uint8_t PACKED     = 0x13;
+    static constexpr uint8_t HAVE       = 0x14;
+    static constexpr uint8_t INFO       = 0xFD;
+    static constexpr uint8_t UNKNOWN    = 0xFE;
+    static constexpr uint8_t MAX_VALUE  = UNKNOWN;
+}
+constexpr size_t MAX_MSG_ID = msgID::MAX_VALUE;
+static inline const char* msgID_toStr(uint8_t id)
+{
+    switch (id)
+    {
+        case msgID::HEARTBEAT:  return "HEARTBEAT";
+        case msgID::ENABLE:     return "ENABLE";
+        case msgID::PLAY:       return "PLAY";
+        case msgID::PAUSE:      return "PAUSE";
+        case msgID::STOP:       return "STOP";
+        case msgID::DISABLE:    return "DISABLE";
+        case msgID::UPLOAD:     return "UPLOAD";
+        case msgID::ACK:        return "ACK";
+        case msgID::NAK:        return "NAK";
+        case msgID::RESET:      return "RESET";
+        case msgID::QUIT:       return "QUIT";
+        case msgID::CONNECT:    return "CONNECT";
+        case msgID::DISCONNECT: return "DISCONNECT";
+        case msgID::MOVE:       return "MOVE";
+        case msgID::FEEDBACK:   return "FEEDBACK";
+        case msgID::STREAM:     return "STREAM";
+        case msgID::STATUS:     return "STATUS";
+        case msgID::QUEUE:      return "QUEUE";
+        case msgID::PACKED:     return "PACKED";
+        case msgID::HAVE:       return "HAVE";
+        case msgID::INFO:       return "INFO";
+        case msgID::UNKNOWN:    return "UNKNOWN";
+        default:                return "INVALID";
+    }
+}
+
+// After START. LEN counts the whole packet, START and CRC included.
+struct __attribute__((packed)) PacketHeader
+{
+    uint32_t len;
+    uint32_t seq;
+    uint8_t from;
+    uint8_t to;
+    uint8_t msgId;
+};
+static constexpr size_t PACKET_HEADER_SIZE = sizeof(PacketHeader);
+static_assert(PACKET_HEADER_SIZE == 11, "PacketHeader layout differs from protocol.toml");
+static_assert(offsetof(PacketHeader, seq) == 4, "PacketHeader::seq offset differs from protocol.toml");
+static_assert(offsetof(PacketHeader, from) == 8, "PacketHeader::from offset differs from protocol.toml");
+static_assert(offsetof(PacketHeader, to) == 9, "PacketHeader::to offset differs from protocol.toml");
+static_assert(offsetof(PacketHeader, msgId) == 10, "PacketHeader::msgId offset differs from protocol.toml");
+
+// ACK from the master: the acknowledged msgID, then its micros() for clock sync. Slaves send the msgID only.
+struct __attribute__((packed)) AckTime
+{
+    uint8_t msgId;
+    uint32_t deviceTime;
+};
+static constexpr size_t ACK_TIME_SIZE = sizeof(AckTime);
+static_assert(ACK_TIME_SIZE == 5, "AckTime layout differs from protocol.toml");
+static_assert(offsetof(AckTime, deviceTime) == 1, "AckTime::deviceTime offset differs from protocol.toml");
+
+// STREAM payload: first row index, then float32 rows; the empty STREAM ends the stream.
+struct __attribute__((packed)) StreamHeader
+{
+    uint32_t firstRow;
+};
+static constexpr size_t STREAM_HEADER_SIZE = sizeof(StreamHeader);
+static_assert(STREAM_HEADER_SIZE == 4, "StreamHeader layout differs from protocol.toml");
+
+// STATUS while streaming: rows consumed, rows received, underruns, flags. Outside a stream: the row being played,
+// the active trajectory length and the QUEUE switch count.
+struct __attribute__((packed)) Status
+{
+    uint32_t consumed;
+    uint32_t received;
+    uint32_t underruns;
+    uint8_t flags;
+};
+static constexpr size_t STATUS_SIZE = sizeof(Status);
+static_assert(STATUS_SIZE == 13, "Status layout differs from protocol.toml");
+static_assert(offsetof(Status, received) == 4, "Status::received offset differs from protocol.toml");
+static_assert(offsetof(Status, underruns) == 8, "Status::underruns offset differs from protocol.toml");
+static_assert(offsetof(Status, flags) == 12, "Status::flags offset differs from protocol.toml");
+
+// HAVE payload: CRC32 and row count of an UPLOAD/PACKED payload. The master answers ACK UPLOAD when PSRAM holds
+// exactly that upload, and NAK HAVE otherwise, remembering the tag for the upload that follows.
+struct __attribute__((packed)) HaveQuery
+{
+    uint32_t crc;
+    uint32_t rows;
+};
+static constexpr size_t HAVE_QUERY_SIZE = sizeof(HaveQuery);
+static_assert(HAVE_QUERY_SIZE == 8, "HaveQuery layout differs from protocol.toml");
+static_assert(offsetof(HaveQuery, rows) == 4, "HaveQuery::rows offset differs from protocol.toml");
+
+// PACKED payload header, seeds and differences follow (Hexlink/packing.py).
+struct __attribute__((packed)) PackedHeader
+{
+    uint8_t order;
+    uint8_t width;
+    uint8_t pad[2];
+    uint32_t rows;
+    float scale[6];
+    float offset[6];
+};
+static constexpr size_t PACKED_HEADER_SIZE = sizeof(PackedHeader);
+static_assert(PACKED_HEADER_SIZE == 56, "PackedHeader layout differs from protocol.toml");
+static_assert(offsetof(PackedHeader, width) == 1, "PackedHeader::width offset differs from protocol.toml");
+static_assert(offsetof(PackedHeader, rows) == 4, "PackedHeader::rows offset differs from protocol.toml");
+static_assert(offsetof(PackedHeader, scale) == 8, "PackedHeader::scale offset differs from protocol.toml");
+static_assert(offsetof(PackedHeader, offset) == 32, "PackedHeader::offset offset differs from protocol.toml");
+
+// FEEDBACK from a slave axis: its state and the last motor controller frames it sent and received.
+struct __attribute__((packed)) Feedback
+{
+    uint8_t axisId;
+    uint8_t mode;
+    uint8_t armed;
+    uint8_t calibrated;
+    float setPoint;
+    uint32_t tSend;
+    uint32_t tRecv;
+    uint8_t sent[8];
+    uint8_t recv[8];
+};
+static constexpr size_t FEEDBACK_SIZE = sizeof(Feedback);
+static_assert(FEEDBACK_SIZE == 32, "Feedback layout differs from protocol.toml");
+static_assert(offsetof(Feedback, mode) == 1, "Feedback::mode offset differs from protocol.toml");
+static_assert(offsetof(Feedback, armed) == 2, "Feedback::armed offset differs from protocol.toml");
+static_assert(offsetof(Feedback, calibrated) == 3, "Feedback::calibrated offset differs from protocol.toml");
+static_assert(offsetof(Feedback, setPoint) == 4, "Feedback::setPoint offset differs from protocol.toml");
+static_assert(offsetof(Feedback, tSend) == 8, "Feedback::tSend offset differs from protocol.toml");
+static_assert(offsetof(Feedback, tRecv) == 12, "Feedback::tRecv offset differs from protocol.toml");
+static_assert(offsetof(Feedback, sent) == 16, "Feedback::sent offset differs from protocol.toml");
+static_assert(offsetof(Feedback, recv) == 24, "Feedback::recv offset differs from protocol.toml");
+
+#endif // PROTOCOL_H
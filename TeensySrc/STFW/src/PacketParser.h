@@ -187,11 +187,13 @@ inline void parsePacket(PacketParserState &s)
         ring.readBytes(headerBytes, HEADER_SIZE);
         updateCRC(s, headerBytes, HEADER_SIZE);
 
-        memcpy(&s.packetLength, &headerBytes[LEN_OFFSET], LEN_SIZE);
-        memcpy(&s.sequence, &headerBytes[SEQ_OFFSET], SEQ_SIZE);
-        s.fromID = headerBytes[FROM_OFFSET];
-        s.toID = headerBytes[TO_OFFSET];
-        s.msgID = headerBytes[MSG_ID_OFFSET];
+        PacketHeader header;
+        memcpy(&header, headerBytes, HEADER_SIZE);
+        s.packetLength = header.len;
+        s.sequence = header.seq;
+        s.fromID = header.from;
+        s.toID = header.to;
+        s.msgID = header.msgId;
 
         s.payloadSize = s.packetLength - PACKET_OVERHEAD;
         s.payloadBytesRead = 0;
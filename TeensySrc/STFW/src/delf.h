@@ -5,23 +5,13 @@
 #include "messages.h"
 #include <Bounce2.h>
 
-struct __attribute__((packed)) Feedback
-{
-    uint8_t axisId;                   // 1
-    uint8_t mode;                     // 1
-    uint8_t armed;                    // 1
-    uint8_t calibrated;               // 1
-    float setPoint;                   // 4
-    uint32_t tSend;                   // 4
-    uint32_t tRecv;                   // 4
-    uint8_t sent[MOTCTRL_FRAME_SIZE]; // 8
-    uint8_t recv[MOTCTRL_FRAME_SIZE]; // 8
-};
+// Feedback is in protocol.h.
+static_assert(sizeof(Feedback::sent) == MOTCTRL_FRAME_SIZE, "Feedback carries whole motor controller frames");
 template <typename StreamType>
 void sendFeedback(StreamType &serial, const Feedback &feedback)
 {
     static uint32_t feedbackCounter = 0;
-    sendPacket(serial, sizeof(feedback), feedbackCounter, NODE_ID_PC, msgID::FEEDBACK, reinterpret_cast<const uint8_t *>(&feedback));
+    sendPacket(serial, FEEDBACK_SIZE, feedbackCounter, NODE_ID_PC, msgID::FEEDBACK, reinterpret_cast<const uint8_t *>(&feedback));
     feedbackCounter++;
 }
 class Axis
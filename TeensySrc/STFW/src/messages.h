@@ -9,18 +9,13 @@
 template <typename StreamType>
 void sendPacket(StreamType& serial, uint32_t payloadLen, uint32_t seq, uint8_t toID, uint8_t msgID, const uint8_t* payload)
 {   
-    // make a header struct so that so much memcpy can be avoided
     FastCRC32 crc32;
-    uint32_t index, crc, packetLen;
-    packetLen = PACKET_OVERHEAD + payloadLen;
+    uint32_t index, crc;
+    const PacketHeader header = {uint32_t(PACKET_OVERHEAD + payloadLen), seq, NODE_ID, toID, msgID};
     index = 0;
     crc = 0;
     sendBuffer[index] = START_MARKER; index++;
-    memcpy(&sendBuffer[index], &packetLen, sizeof(packetLen)); index += sizeof(packetLen);
-    memcpy(&sendBuffer[index], &seq,       sizeof(seq));       index += sizeof(seq);
-    sendBuffer[index] = NODE_ID; index++;
-    sendBuffer[index] = toID; index++;
-    sendBuffer[index] = msgID; index++;
+    memcpy(&sendBuffer[index], &header, HEADER_SIZE); index += HEADER_SIZE;
     if (payloadLen > 0)
     {
         memcpy(&sendBuffer[index], payload, payloadLen);
@@ -1,6 +1,8 @@
 import customtkinter as ctk
 from model import FSM, states, transitions
 from PIL import Image
+from io import BytesIO
+from threading import Thread
 
 
 class App(ctk.CTk):
@@ -8,6 +10,7 @@ class App(ctk.CTk):
         super().__init__()
         self.buttons = {}
         self.image_label = None
+        self._images = {}  # state -> CTkImage, so a state change is a dict lookup; resizes only rescale it
 
         self.title("FSM Example")
         self.geometry("1280x720")
@@ -23,6 +26,7 @@ class App(ctk.CTk):
         # Initialize the FSM
         self.fsm = FSM(initial="IDLE")
         self.create_ui()
+        Thread(target=self.fsm.prerender, daemon=True, name="FSMPrerender").start()
 
     def create_ui(self):
 
@@ -62,29 +66,24 @@ class App(ctk.CTk):
 
         # Generate the FSM diagram and display it
         try:
-            png_data = self.fsm.draw()  # This returns binary PNG data
-
-            # Use BytesIO to create a file-like object from binary data
-            from io import BytesIO
-
-            img = Image.open(BytesIO(png_data))
-
             # Get the frame size to scale the image appropriately
             self.frame.update_idletasks()  # Make sure frame size is updated
             frame_width = self.frame.winfo_width()  # Account for padding
             frame_height = self.frame.winfo_height()  # Account for padding
+            ctk_image = self._images.get(self.fsm.state)
+            if ctk_image is None:
+                png_data = self.fsm.draw()  # This returns binary PNG data, cached per state
+                img = Image.open(BytesIO(png_data))
+                ctk_image = self._images[self.fsm.state] = ctk.CTkImage(img, size=img.size)
 
             # Calculate scaling to maintain aspect ratio
-            img_width, img_height = img.size
+            img_width, img_height = ctk_image.cget("light_image").size
             scale_x = frame_width / img_width
             scale_y = frame_height / img_height
             scale = min(scale_x, scale_y, 1.0)  # Don't scale up, only down
-
-            new_width = int(img_width * scale)
-            new_height = int(img_height * scale)
-
-            # Create CTkImage from PIL Image with calculated size
-            ctk_image = ctk.CTkImage(img, size=(new_width, new_height))
+            size = (int(img_width * scale), int(img_height * scale))
+            if ctk_image.cget("size") != size:
+                ctk_image.configure(size=size)
 
             # Create or update the image label
             if self.image_label is None:
@@ -29,9 +29,7 @@ transitions = [
 # ─────────────────────────────────────────────────────────────────────────
 import networkx as nx
 from networkx.drawing.nx_agraph import to_agraph
-from graphviz import Source
-import time
-import io
+from threading import Lock
 
 
 class FSM:
@@ -53,10 +51,14 @@ class FSM:
         self.AGraph.edge_attr.update(fontname="Consolas", fontsize=10, color="black", arrowhead="normal")
         self.AGraph.graph_attr["rankdir"] = "LR"
         self.AGraph.graph_attr["fontname"] = "Consolas"
+        self.AGraph.node_attr.update(shape="box", style="rounded")  # lay out with the shape that gets drawn
 
         # 3) choose a layout engine dot, gc, sfdp, patchwork,
         # neato, sccmap, nop, osage, fdp, gvcolor, ccomps, twopi, tred, gvpr, unflatten, circo, acyclic
         self.AGraph.layout(prog="dot")
+        # the layout never changes: render each state once with the node positions pinned (neato -n2)
+        self._png_cache: dict[str, bytes] = {}
+        self._render_lock = Lock()
 
     def trigger(self, name):
         """
@@ -78,10 +80,25 @@ class FSM:
     def __repr__(self):
         return f"<Current State={self.state!r}>"
 
-    def draw(self):
-        sTime = time.time()
+    def draw(self, state=None):
+        """PNG bytes of the diagram with `state` (default: current state) highlighted, rendered at most once."""
+        state = self.state if state is None else state
+        png = self._png_cache.get(state)
+        if png is None:
+            with self._render_lock:
+                png = self._png_cache.get(state)
+                if png is None:
+                    png = self._png_cache[state] = self._render(state)
+        return png
+
+    def prerender(self):
+        """Fill the cache for every state, e.g. from a background thread at startup."""
+        for state in self._G.nodes:
+            self.draw(state)
+
+    def _render(self, state):
         for n in self.AGraph.nodes():
-            if n.get_name() == self.state:
+            if n.get_name() == state:
                 # highlighted current state as a rounded, filled box
                 n.attr.update(shape="box", style="filled,rounded", fillcolor="lightgoldenrod")
             else:
@@ -89,13 +106,8 @@ class FSM:
                 n.attr.update(shape="box", style="rounded")
                 # remove any leftover fillcolor
                 n.attr.pop("fillcolor", None)
-
-        dot_src = self.AGraph.to_string()
-        # 2) ['circo', 'dot', 'fdp', 'neato', 'osage', 'patchwork', 'sfdp', 'twopi']
-        src = Source(dot_src, format="png", engine="dot")
-        rawBytes = src.pipe()
-        print(f" {time.time() - sTime:.2f} seconds")
-        return rawBytes
+        # reuse the positions computed by layout() instead of running dot again
+        return self.AGraph.draw(format="png", prog="neato", args="-n2")
 
 
 def test():
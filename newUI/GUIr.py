@@ -1,48 +1,70 @@
-from PIL import Image
+import os
 import customtkinter as ctk
+from math import radians
+from functools import lru_cache
 from tkinter import filedialog, messagebox
 from UI.custom_combobox import CustomComboBox
-from serial.tools import list_ports, list_ports_common
-from multiprocessing import Process, Pipe
+from UI.custom_tabview import CustomTabview
+from UI.custom_linkview import LinkView
+from multiprocessing import Process, Pipe, Queue
 from multiprocessing.connection import Connection
 from model import FSM
-from threading import Thread
-from numpy import deg2rad, float32
+from profiler import StackSampler, profiling_requested
+from threading import Thread, Event
+from queue import Empty, SimpleQueue
 
-# from serial_process import serialServer
-
-from serial_process_threaded import serialServer
+# numpy, pyserial and the serial server are imported by startBackend() once the window is up
 
 WIDTH: int = 800
 HEIGHT: int = 480
+PLOT_POLL_MS: int = 20
+RESPONSE_POLL_MIN_MS: int = 1
+RESPONSE_POLL_MAX_MS: int = 50
+RESPONSE_BATCH: int = 256
+METRICS_POLL_MS: int = 1000
+FILE_SOURCE: str = "File..."  # UPLOAD and QUEUE open a file dialog, any other source is a generators preset
+ICON_DIR: str = os.path.join(os.path.dirname(os.path.abspath(__file__)), "Icons")
+
+
+@lru_cache(maxsize=None)
+def icon(name: str) -> ctk.CTkImage:
+    """Decode Icons/<name>.png once and share the CTkImage between every widget that uses it."""
+    from PIL import Image
 
-usb_icon = Image.open("Icons/usb.png")
-usb_off_icon = Image.open("Icons/usb_off.png")
-play_icon = Image.open("Icons/play.png")
-pause_icon = Image.open("Icons/pause.png")
-stop_icon = Image.open("Icons/stop.png")
+    image = Image.open(os.path.join(ICON_DIR, f"{name}.png"))
+    image.load()
+    return ctk.CTkImage(light_image=image, dark_image=image)
 
 
-def portList() -> list[list_ports_common.ListPortInfo]:
+def portList() -> list:
+    from serial.tools import list_ports
+
     return list_ports.comports()
 
 
 class App(ctk.CTk):
-    def __init__(self) -> None:
+    def __init__(self, extraPorts: list[str] | None = None, replay: tuple[str, float] | None = None) -> None:
         super().__init__()
+        self.extraPorts: list[str] = list(extraPorts or [])  # e.g. the emulator pty, listed next to the Teensy ports
+        self.replay: tuple[str, float] | None = replay  # (capture path, speed) fed to the serial process once it is up
         self.sequence: int = 0
         self.running: bool = True
-        self.response: dict = {}
+        self.responseQueue: SimpleQueue[dict] = SimpleQueue()
+        self.responsePollMs: int = RESPONSE_POLL_MIN_MS
         self.parentConnection: Connection
         self.childConnection: Connection
         self.parentConnection, self.childConnection = Pipe()
+        self.feedbackQueue: Queue = Queue()
         self.fsm: FSM = FSM()
+        self.plotView = None
+        self.profiler: StackSampler = StackSampler("gui")
         self.create_widgets()
         # self.configure_widgets(self.fsm.available_transitions(), self.fsm.state)
-        self.bind("<<ReceivedResponse>>", self.responseHandler)
         self.resLT: Thread = Thread(target=self.responseListener, daemon=True, name="ResponseListenerThread")
-        self.comServer: serialServer = serialServer(self.childConnection)
-        self.comProcess: Process = Process(target=self.comServer.run, name="SerialServerProcess")
+        self.comProcess: Process | None = None
+        self.backendReady: Event = Event()
+        self.backendThread: Thread = Thread(target=self.startBackend, daemon=True, name="BackendStartThread")
+        self.after(self.responsePollMs, self.responsePoller)
 
     def create_widgets(self) -> None:
         self.title("Hexapod Controller")
@@ -50,8 +72,21 @@ class App(ctk.CTk):
         self.minsize(WIDTH, HEIGHT)
         self.grid_rowconfigure(0, weight=1)
         self.grid_columnconfigure(0, weight=1)
+        self.grid_columnconfigure(1, weight=3)
         self.controlPanel: ctk.CTkFrame = ctk.CTkFrame(self, corner_radius=10)
         self.controlPanel.grid(row=0, column=0, sticky="nsew")
+        self.tabR: CustomTabview = CustomTabview(self)
+        self.tabR.grid(row=0, column=1, sticky="nsew", padx=(10, 0))
+        self.dataTab = self.tabR.add("  Data  ")
+        self.dataTab.grid_rowconfigure(0, weight=1)
+        self.dataTab.grid_columnconfigure(0, weight=1)
+        self.linkTab = self.tabR.add("  Link  ")
+        self.linkTab.grid_rowconfigure(1, weight=1)
+        self.linkTab.grid_columnconfigure(0, weight=1)
+        self.profileSwitch = ctk.CTkSwitch(self.linkTab, text="Profile", command=self.toggleProfiling)
+        self.profileSwitch.grid(row=0, column=0, sticky="e", padx=10, pady=(5, 0))
+        self.linkView: LinkView = LinkView(self.linkTab)
+        self.linkView.grid(row=1, column=0, sticky="nsew")
         self.controlPanelWidgets: dict = {}
         for col in range(6):
             self.controlPanel.grid_columnconfigure(col, weight=1)
@@ -77,7 +112,7 @@ class App(ctk.CTk):
             self.connectionFrame,
             text="",
             command=lambda: self.requestHandler("CONNECT"),
-            image=ctk.CTkImage(light_image=usb_icon, dark_image=usb_icon),
+            image=icon("usb"),
             hover_color="green4",
             fg_color="transparent",
         )
@@ -86,7 +121,7 @@ class App(ctk.CTk):
             self.connectionFrame,
             text="",
             command=lambda: self.requestHandler("DISCONNECT"),
-            image=ctk.CTkImage(light_image=usb_off_icon, dark_image=usb_off_icon),
+            image=icon("usb_off"),
             hover_color="red",
             fg_color="transparent",
         )
@@ -104,8 +139,13 @@ class App(ctk.CTk):
         self.uploadBtn: ctk.CTkButton = ctk.CTkButton(
             self.controlPanel, text="UPLOAD", command=lambda: self.fileHandler("UPLOAD")
         )
-        self.uploadBtn.grid(row=3, column=0, columnspan=6, rowspan=2, sticky="nsew", padx=(10, 10), pady=(10, 10))
+        self.uploadBtn.grid(row=3, column=0, columnspan=4, rowspan=2, sticky="nsew", padx=(10, 5), pady=(10, 10))
         self.controlPanelWidgets["UPLOAD"] = self.uploadBtn
+        self.queueBtn: ctk.CTkButton = ctk.CTkButton(
+            self.controlPanel, text="QUEUE", command=lambda: self.fileHandler("QUEUE")
+        )
+        self.queueBtn.grid(row=3, column=4, columnspan=2, rowspan=2, sticky="nsew", padx=(5, 10), pady=(10, 10))
+        self.controlPanelWidgets["QUEUE"] = self.queueBtn
 
         self.playbackFrame = ctk.CTkFrame(self.controlPanel)
         self.playbackFrame.grid(row=5, column=0, columnspan=6, rowspan=2, sticky="nsew", padx=(10, 10), pady=(10, 10))
@@ -118,7 +158,7 @@ class App(ctk.CTk):
             self.playbackFrame,
             text="",
             command=lambda: self.requestHandler("PLAY"),
-            image=ctk.CTkImage(light_image=play_icon, dark_image=play_icon),
+            image=icon("play"),
             hover_color="dark green",
             fg_color="transparent",
         )
@@ -127,7 +167,7 @@ class App(ctk.CTk):
             self.playbackFrame,
             text="",
             command=lambda: self.requestHandler("PAUSE"),
-            image=ctk.CTkImage(light_image=pause_icon, dark_image=pause_icon),
+            image=icon("pause"),
             hover_color="yellow4",
             fg_color="transparent",
         )
@@ -136,7 +176,7 @@ class App(ctk.CTk):
             self.playbackFrame,
             text="",
             command=lambda: self.requestHandler("STOP"),
-            image=ctk.CTkImage(light_image=stop_icon, dark_image=stop_icon),
+            image=icon("stop"),
             hover_color="red4",
             fg_color="transparent",
         )
@@ -161,13 +201,15 @@ class App(ctk.CTk):
         self.controlPanelWidgets["RESET"] = self.resetBtn
 
         self.entry = ctk.CTkEntry(self.controlPanel, placeholder_text="0.0")
-        self.entry.grid(row=10, column=0, columnspan=6, sticky="nsew", padx=(10, 10), pady=(10, 10))
+        self.entry.grid(row=10, column=0, columnspan=3, sticky="nsew", padx=(10, 5), pady=(10, 10))
         self.entry.bind("<Return>", self.on_enter)
+        self.sourceSelect: ctk.CTkOptionMenu = ctk.CTkOptionMenu(self.controlPanel, values=[FILE_SOURCE])
+        self.sourceSelect.grid(row=10, column=3, columnspan=3, sticky="nsew", padx=(5, 10), pady=(10, 10))
         self.protocol("WM_DELETE_WINDOW", self.on_closing)
 
     def on_enter(self, event) -> None:
         try:
-            value = deg2rad(float(self.entry.get()), dtype=float32)
+            value = radians(float(self.entry.get()))
             self.requestHandler("MOVE", position=value)
             self.entry.delete(0, ctk.END)
         except ValueError:
@@ -185,11 +227,11 @@ class App(ctk.CTk):
             self.connectBtn.configure(fg_color="lime green")
         else:
             self.connectBtn.configure(fg_color="transparent")
-        if current_state == "PLAYING":
+        if current_state == "PLAYING" or current_state == "QUEUED":
             self.playBtn.configure(fg_color="lime green")
             self.pauseBtn.configure(fg_color="transparent")
             self.stopBtn.configure(fg_color="transparent")
-        elif current_state == "PAUSED":
+        elif current_state == "PAUSED" or current_state == "PAUSED_QUEUED":
             self.pauseBtn.configure(fg_color="yellow3")
             self.playBtn.configure(fg_color="transparent")
             self.stopBtn.configure(fg_color="transparent")
@@ -208,20 +250,25 @@ class App(ctk.CTk):
             for port in portList()
             if ((port.pid == 1155 or port.pid == 1163 or port.pid == 1164) and port.vid == 5824)
         }
+        for port in self.extraPorts:
+            self.portsDict.setdefault(port, port)
         if self.portsDict:
             self.portSelect.configure(values=list(self.portsDict.keys()))
         else:
             self.portSelect.configure(values=[])
 
     def fileHandler(self, event_name="UPLOAD") -> None:  # have a app handler
+        source = self.sourceSelect.get()
+        if source != FILE_SOURCE:  # computed by the serial process, nothing is read from disk
+            from generators import PRESETS
+
+            self.requestHandler(event_name, generator=PRESETS[source], name=source)
+            return
         file_path = filedialog.askopenfilename(title="Select File", filetypes=[("All Files", "*.*")])
         if file_path:  # call checking function here or maybe even plot the file
             self.requestHandler(event_name, filePath=file_path)
         else:
-            pass
             messagebox.showwarning("No File Selected", "Please select a file to upload.")
-            # self.fileHandler()
-            self.requestHandler(event_name, filePath="C:\\Users\\james\\OneDrive\\Desktop\\SigGen\\chirp_signal.csv")
 
     def requestHandler(self, event_name: str, **kwargs: dict) -> None:
         eventDict = {"event": event_name, "sequence": self.sequence}
@@ -236,22 +283,61 @@ class App(ctk.CTk):
     def responseListener(self) -> None:
         while self.running:
             try:
-                self.response = self.parentConnection.recv()
+                response = self.parentConnection.recv()
+            except (EOFError, OSError) as e:
+                print(f"[responseListener]  : {e}")
+                break
             except Exception as e:
                 print(f"[responseListener]  : {e}")
-            if self.response.get("event", None) == "QUIT":
+                continue
+            if response.get("event", None) == "QUIT":
                 self.running = False
             else:
-                self.after(0, lambda: self.event_generate("<<ReceivedResponse>>", when="tail"))
+                self.responseQueue.put(response)
 
-    def responseHandler(self, VirtualEvent=None) -> None:
-        # return
-        # print(self.response)
-        event = self.response.get("event", None)
-        status = self.response.get("status", None)
-        popup = self.response.get("popup", False)
+    def responsePoller(self) -> None:
+        """
+        Drain queued responses in batches on the Tk thread.
+        Polls fast while responses keep arriving and backs off exponentially when idle.
+        """
+        handled: int = 0
+        while handled < RESPONSE_BATCH:
+            try:
+                response = self.responseQueue.get_nowait()
+            except Empty:
+                break
+            self.responseHandler(response)
+            handled += 1
+        if handled == RESPONSE_BATCH:
+            self.responsePollMs = 0  # backlog left, come straight back after pending Tk events
+        elif handled:
+            self.responsePollMs = RESPONSE_POLL_MIN_MS
+        else:
+            self.responsePollMs = min(max(self.responsePollMs, 1) * 2, RESPONSE_POLL_MAX_MS)
+        if self.running or not self.responseQueue.empty():
+            self.after(self.responsePollMs, self.responsePoller)
+
+    def responseHandler(self, response: dict) -> None:
+        # print(response)
+        event = response.get("event", None)
+        status = response.get("status", None)
+        popup = response.get("popup", False)
+        if event == "METRICS":
+            self.linkView.update_metrics(response["metrics"])
+            return
+        if event == "REPLAY":
+            stats = response.get("stats")
+            if stats:
+                print(f"[REPLAY] : {stats['bytes']:,} B from {stats['path']} in {stats['elapsed_s']:.2f} s")
+            else:
+                print(f"[REPLAY] : failed for {response.get('path')}")
+            return
+        if event == "PROFILE":
+            if response.get("path"):
+                print(f"[PROFILE] : serial process profile written to {response['path']}")
+            return
         if status:
-            if event in self.fsm.available_transitions():
+            if self.fsm.can(event):
                 self.fsm.trigger(event)
                 # print(self.fsm.available_transitions(), self.fsm.state)
                 if event != "QUIT":
@@ -266,21 +352,85 @@ class App(ctk.CTk):
                 # )
                 print("noot noot")
         else:
-            print(f"NAK : {self.response}")
+            print(f"NAK : {response}")
 
-        self.response = {}
+    def startBackend(self) -> None:
+        """Runs off the Tk thread: pays for the heavy imports and spawns the serial process while the window is already up."""
+        from serial_process_threaded import serialServer
 
-    def run(self) -> None:
+        self.comServer = serialServer(self.childConnection, self.feedbackQueue)
+        self.comProcess = Process(target=self.comServer.run, name="SerialServerProcess")
         self.comProcess.start()
         self.resLT.start()
+        self.backendReady.set()
+
+    def awaitBackend(self) -> None:
+        if not self.backendReady.is_set():
+            self.after(PLOT_POLL_MS, self.awaitBackend)
+            return
+        from UI.custom_plotview import PlotView  # numpy is already loaded by the backend thread
+        from generators import PRESETS
+
+        self.sourceSelect.configure(values=[FILE_SOURCE, *PRESETS])
+
+        self.plotView = PlotView(self.dataTab)
+        self.plotView.grid(row=0, column=0, sticky="nsew")
+        self.after(PLOT_POLL_MS, self.feedbackHandler)
+        if self.replay:
+            path, speed = self.replay
+            self.requestHandler("REPLAY", path=path, speed=speed)
+
+    def feedbackHandler(self) -> None:
+        batches: int = 0
+        while batches < 100:  # bounded so a flood of feedback can never starve the mainloop
+            try:
+                self.plotView.push(self.feedbackQueue.get_nowait())
+            except Empty:
+                break
+            batches += 1
+        if self.running:
+            self.after(PLOT_POLL_MS, self.feedbackHandler)
+
+    def toggleProfiling(self) -> None:
+        """Sample the Tk thread here and the serial process threads there; both write logs/profile-*.folded on stop."""
+        enable = bool(self.profileSwitch.get())
+        if enable:
+            self.profiler.start()
+        else:
+            path = self.profiler.stop()
+            if path:
+                print(f"[PROFILE] : gui profile written to {path}")
+        self.requestHandler("PROFILE", enable=enable)
+
+    def metricsPoller(self) -> None:
+        """Ask the serial process for a counters snapshot, only while the Link tab is on screen."""
+        if self.backendReady.is_set() and self.tabR.get() == "  Link  ":
+            self.requestHandler("METRICS")
+        if self.running:
+            self.after(METRICS_POLL_MS, self.metricsPoller)
+
+    def run(self) -> None:
+        if profiling_requested():  # the serial process checks the same variable itself
+            self.profiler.start()
+            self.profileSwitch.select()
+        # show the window first, then bring up the backend
+        self.after_idle(self.backendThread.start)
+        self.after(PLOT_POLL_MS, self.awaitBackend)
+        self.after(METRICS_POLL_MS, self.metricsPoller)
         self.mainloop()
 
     def on_closing(self) -> None:
         self.requestHandler("QUIT")
-        self.comProcess.join()
+        if self.backendThread.ident is not None:  # started
+            self.backendThread.join()
+        if self.comProcess is not None:
+            self.comProcess.join()
         if self.resLT.is_alive():
             self.resLT.join()
         self.parentConnection.close()
+        self.feedbackQueue.cancel_join_thread()
+        if self.profiler.running:
+            self.profiler.stop()
         self.destroy()
 
 
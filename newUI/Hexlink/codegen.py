@@ -0,0 +1,303 @@
+"""
+Generates the protocol definitions of both ends from Hexlink/protocol.toml:
+
+    Hexlink/protocol.py                 struct.Struct codecs, NumPy dtypes, MsgID and the constants
+    TeensySrc/MTFW/src/protocol.h       packed structs with static_asserts on their layout, msgID, the constants
+    TeensySrc/STFW/src/protocol.h
+
+    python -m Hexlink.codegen            # from newUI/
+    python -m Hexlink.codegen --check    # exit 1 when a generated file differs from the schema
+
+Struct Foo becomes FOO_STRUCT and FOO_DTYPE in Python and Foo with FOO_SIZE = sizeof(Foo) in C. u8 arrays are
+bytes in Python, other arrays unpack to one value per element. PacketHeader fields also give the LEN_SIZE,
+SEQ_SIZE, ... constants, and in C their *_OFFSET after START, which is where PacketParser.h reads the header from.
+"""
+
+import os
+import re
+import sys
+import argparse
+import textwrap
+import tomllib
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+SCHEMA_PATH = os.path.join(HERE, "protocol.toml")
+PY_PATH = os.path.join(HERE, "protocol.py")
+C_PATHS = tuple(
+    os.path.join(HERE, "..", "..", "TeensySrc", firmware, "src", "protocol.h") for firmware in ("MTFW", "STFW")
+)
+# type: (struct format, NumPy dtype, C type, bytes)
+TYPES: dict[str, tuple[str, str, str, int]] = {
+    "u8": ("B", "u1", "uint8_t", 1),
+    "i8": ("b", "i1", "int8_t", 1),
+    "u16": ("H", "<u2", "uint16_t", 2),
+    "i16": ("h", "<i2", "int16_t", 2),
+    "u32": ("I", "<u4", "uint32_t", 4),
+    "i32": ("i", "<i4", "int32_t", 4),
+    "f32": ("f", "<f4", "float", 4),
+}
+FIELD_TYPE = re.compile(r"^(\w+)(?:\[(\d+)\])?$")
+
+
+def upper_snake(name: str) -> str:
+    """PackedHeader -> PACKED_HEADER, msgId -> MSG_ID."""
+    return re.sub(r"(?<=[a-z0-9])(?=[A-Z])", "_", name).upper()
+
+
+def parse_field(name: str, spec: str) -> dict:
+    m = FIELD_TYPE.match(spec)
+    if m is None or (m.group(1) not in TYPES and m.group(1) != "pad"):
+        raise ValueError(f"Field {name}: unknown type {spec!r}")
+    kind, count = m.group(1), int(m.group(2) or 0)
+    if kind == "pad" and not count:
+        raise ValueError(f"Field {name}: pad needs a byte count, pad[N]")
+    size = count if kind == "pad" else TYPES[kind][3] * max(count, 1)
+    return {"name": name, "kind": kind, "count": count, "size": size}
+
+
+def load(path: str = SCHEMA_PATH) -> dict:
+    """The schema with every struct's fields parsed and laid out; ValueError on an inconsistent one."""
+    with open(path, "rb") as f:
+        schema = tomllib.load(f)
+    for name, struct in schema["structs"].items():
+        offset = 0
+        fields = []
+        for field_name, spec in struct["fields"]:
+            field = parse_field(field_name, spec)
+            field["offset"] = offset
+            offset += field["size"]
+            fields.append(field)
+        struct["fields"] = fields
+        struct["size"] = offset
+    if schema["packet"]["header"] not in schema["structs"]:
+        raise ValueError(f"packet.header names no struct: {schema['packet']['header']!r}")
+    if schema["packet"]["crc"] not in TYPES:
+        raise ValueError(f"packet.crc: unknown type {schema['packet']['crc']!r}")
+    ids = list(schema["msg_id"].values())
+    if len(set(ids)) != len(ids) or not all(0 <= i <= 0xFF for i in ids):
+        raise ValueError("msg_id values must be distinct bytes")
+    return schema
+
+
+def struct_format(struct: dict) -> str:
+    parts = []
+    for field in struct["fields"]:
+        if field["kind"] == "pad":
+            parts.append(f"{field['count']}x")
+        elif field["kind"] == "u8" and field["count"]:
+            parts.append(f"{field['count']}s")
+        else:
+            parts.append(f"{field['count'] or ''}{TYPES[field['kind']][0]}")
+    return "<" + "".join(parts)
+
+
+def dtype_spec(struct: dict) -> str:
+    names, formats, offsets = [], [], []
+    for field in struct["fields"]:
+        if field["kind"] == "pad":
+            continue
+        dtype = TYPES[field["kind"]][1]
+        names.append(repr(field["name"]))
+        formats.append(f"({dtype!r}, {field['count']})" if field["count"] else repr(dtype))
+        offsets.append(str(field["offset"]))
+    return "\n".join(
+        (
+            "np.dtype(",
+            "    {",
+            f'        "names": [{", ".join(names)}],',
+            f'        "formats": [{", ".join(formats)}],',
+            f'        "offsets": [{", ".join(offsets)}],',
+            f'        "itemsize": {struct["size"]},',
+            "    }",
+            ")",
+        )
+    ).replace("'", '"')
+
+
+def comment(text: str, prefix: str) -> list[str]:
+    return textwrap.wrap(text, width=116, initial_indent=prefix, subsequent_indent=prefix)
+
+
+def python_source(schema: dict) -> str:
+    packet = schema["packet"]
+    header = schema["structs"][packet["header"]]
+    crc = TYPES[packet["crc"]]
+    lines = [
+        '"""',
+        "Hexlink wire protocol: IDs, constants and payload codecs.",
+        "",
+        "Generated by Hexlink/codegen.py from Hexlink/protocol.toml, do not edit: change the schema and run",
+        "python -m Hexlink.codegen, which also regenerates the firmware's protocol.h.",
+        '"""',
+        "",
+        "import struct",
+        "import numpy as np",
+        "from enum import IntEnum",
+        "",
+        f'START_MARKER = b"\\x{packet["start_marker"]:02x}"',
+        "START_SIZE = 1",
+    ]
+    for field in header["fields"]:
+        lines.append(f"{upper_snake(field['name'])}_SIZE = {field['size']}")
+    lines += [
+        f"CRC_SIZE = {crc[3]}",
+        f"HEADER_SIZE = {header['size']}  # {packet['header']} after START",
+        "PAYLOAD_OFFSET = START_SIZE + HEADER_SIZE",
+        "PACKET_OVERHEAD = PAYLOAD_OFFSET + CRC_SIZE",
+        "MIN_PACKET_SIZE = PACKET_OVERHEAD",
+        f"MAX_PACKET_SIZE = {packet['max_payload']} + PACKET_OVERHEAD",
+        "",
+    ]
+    for name, value in schema["nodes"].items():
+        if isinstance(value, list):
+            lines.append(f"NODE_ID_{name} = ({', '.join(f'0x{v:02X}' for v in value)})")
+        else:
+            lines.append(f"NODE_ID_{name} = 0x{value:02X}")
+    lines.append("")
+    for name, constant in schema["constants"].items():
+        value = constant["value"]
+        literal = f"0x{value:02X}" if constant["type"] == "u8" else str(value)
+        lines.append(f"{name} = {literal}" + (f"  # {constant['doc']}" if "doc" in constant else ""))
+    lines += ["", "", "class MsgID(IntEnum):"]
+    for name, value in schema["msg_id"].items():
+        lines.append(f"    {name} = 0x{value:02X}")
+    lines += ["", ""]
+    lines.append(f'CRC_STRUCT = struct.Struct("<{crc[0]}")')
+    for name, struct in schema["structs"].items():
+        prefix = upper_snake(name)
+        lines.append("")
+        if "doc" in struct:
+            lines += comment(struct["doc"], "# ")
+        fields = tuple(f["name"] for f in struct["fields"] if f["kind"] != "pad")
+        lines += [
+            f'{prefix}_STRUCT = struct.Struct("{struct_format(struct)}")',
+            f"{prefix}_DTYPE = {dtype_spec(struct)}",
+            f"{prefix}_FIELDS = {fields!r}".replace("'", '"'),
+        ]
+    return "\n".join(lines) + "\n"
+
+
+def c_header(schema: dict) -> str:
+    packet = schema["packet"]
+    header = schema["structs"][packet["header"]]
+    crc = TYPES[packet["crc"]]
+    lines = [
+        "// Hexlink wire protocol: IDs, constants and payload structs.",
+        "// Generated by newUI/Hexlink/codegen.py from newUI/Hexlink/protocol.toml, do not edit: change the schema and",
+        "// run python -m Hexlink.codegen from newUI/, which also regenerates Hexlink/protocol.py and the other firmware.",
+        "#ifndef PROTOCOL_H",
+        "#define PROTOCOL_H",
+        "",
+        "#include <stddef.h>",
+        "#include <stdint.h>",
+        "",
+    ]
+    for name, value in schema["nodes"].items():
+        if isinstance(value, list):
+            lines.append(f"static constexpr uint8_t NODE_ID_{name}[] = {{{', '.join(f'0x{v:02X}' for v in value)}}};")
+        else:
+            lines.append(f"static constexpr uint8_t NODE_ID_{name} = 0x{value:02X};")
+    lines += [
+        "",
+        f"static constexpr uint8_t START_MARKER = 0x{packet['start_marker']:02X};",
+        "static constexpr size_t START_SIZE = 1;",
+        "static constexpr size_t START_OFFSET = 0;",
+        f"// {packet['header']} fields, offsets counted from after START",
+    ]
+    for field in header["fields"]:
+        prefix = upper_snake(field["name"])
+        lines.append(f"static constexpr size_t {prefix}_SIZE = {field['size']};")
+        lines.append(f"static constexpr size_t {prefix}_OFFSET = {field['offset']};")
+    lines += [
+        f"static constexpr size_t CRC_SIZE = {crc[3]};",
+        f"static constexpr size_t HEADER_SIZE = {header['size']};",
+        "static constexpr size_t PACKET_OVERHEAD = START_SIZE + HEADER_SIZE + CRC_SIZE;",
+        "static constexpr size_t MIN_PACKET_SIZE = PACKET_OVERHEAD;",
+        f"static constexpr size_t MAX_PACKET_SIZE = size_t({packet['max_payload']} + PACKET_OVERHEAD);",
+        "",
+    ]
+    for name, constant in schema["constants"].items():
+        value = constant["value"]
+        literal = f"0x{value:02X}" if constant["type"] == "u8" else str(value)
+        line = f"static constexpr {TYPES[constant['type']][2]} {name} = {literal};"
+        lines.append(line + (f" // {constant['doc']}" if "doc" in constant else ""))
+    width = max(len(name) for name in schema["msg_id"])
+    lines += ["", "namespace msgID", "{"]
+    for name, value in schema["msg_id"].items():
+        lines.append(f"    static constexpr uint8_t {name:<{width}} = 0x{value:02X};")
+    last = max(schema["msg_id"], key=schema["msg_id"].get)
+    lines.append(f"    static constexpr uint8_t {'MAX_VALUE':<{width}} = {last};")
+    lines += [
+        "}",
+        "constexpr size_t MAX_MSG_ID = msgID::MAX_VALUE;",
+        "static inline const char* msgID_toStr(uint8_t id)",
+        "{",
+        "    switch (id)",
+        "    {",
+    ]
+    for name in schema["msg_id"]:
+        lines.append(f"        case msgID::{name + ':':<{width + 1}} return \"{name}\";")
+    lines += [f"        {'default:':<{width + 13}} return \"INVALID\";", "    }", "}"]
+    for name, struct in schema["structs"].items():
+        lines.append("")
+        if "doc" in struct:
+            lines += comment(struct["doc"], "// ")
+        lines += [f"struct __attribute__((packed)) {name}", "{"]
+        for field in struct["fields"]:
+            ctype = "uint8_t" if field["kind"] == "pad" else TYPES[field["kind"]][2]
+            array = f"[{field['count']}]" if field["count"] else ""
+            lines.append(f"    {ctype} {field['name']}{array};")
+        lines.append("};")
+        size = upper_snake(name) + "_SIZE"
+        lines.append(f"static constexpr size_t {size} = sizeof({name});")
+        lines.append(f'static_assert({size} == {struct["size"]}, "{name} layout differs from protocol.toml");')
+        for field in struct["fields"]:
+            if field["kind"] != "pad" and field["offset"]:
+                lines.append(
+                    f"static_assert(offsetof({name}, {field['name']}) == {field['offset']}, "
+                    f'"{name}::{field["name"]} offset differs from protocol.toml");'
+                )
+    lines += ["", "#endif // PROTOCOL_H"]
+    return "\n".join(lines) + "\n"
+
+
+def outputs(schema: dict) -> dict[str, str]:
+    """Generated file path -> contents."""
+    files = {PY_PATH: python_source(schema)}
+    files.update({os.path.normpath(path): c_header(schema) for path in C_PATHS})
+    return files
+
+
+def stale(schema: dict) -> list[str]:
+    """Generated files missing or different from what the schema gives."""
+    problems = []
+    for path, text in outputs(schema).items():
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                if f.read() == text:
+                    continue
+        except FileNotFoundError:
+            pass
+        problems.append(path)
+    return problems
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--check", action="store_true", help="only compare the generated files with the schema")
+    args = parser.parse_args(argv)
+    schema = load()
+    if args.check:
+        problems = stale(schema)
+        for path in problems:
+            print(f"[codegen] : {os.path.relpath(path)} is out of date with {os.path.relpath(SCHEMA_PATH)}")
+        return 1 if problems else 0
+    for path, text in outputs(schema).items():
+        with open(path, "w", encoding="utf-8", newline="\n") as f:
+            f.write(text)
+        print(f"[codegen] : wrote {os.path.relpath(path)}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,41 +1,40 @@
-import struct
 import numpy as np
 from zlib import crc32
-from enum import IntEnum
-
-START_MARKER = b"\x01"
-
-START_SIZE = 1
-LEN_SIZE = 4
-SEQ_SIZE = 4
-FROM_SIZE = 1
-TO_SIZE = 1
-MSG_ID_SIZE = 1
-CRC_SIZE = 4
-PACKET_OVERHEAD = START_SIZE + LEN_SIZE + SEQ_SIZE + FROM_SIZE + TO_SIZE + MSG_ID_SIZE + CRC_SIZE
-MIN_PACKET_SIZE = PACKET_OVERHEAD
-MAX_PACKET_SIZE = 16 * 1024 * 1024 + PACKET_OVERHEAD
-
-
-class MsgID(IntEnum):
-    HEARTBEAT = 0x01
-    ENABLE = 0x02
-    PLAY = 0x03
-    PAUSE = 0x04
-    STOP = 0x05
-    DISABLE = 0x06
-    UPLOAD = 0x07
-    ACK = 0x08
-    NAK = 0x09
-    RESET = 0x0A
-    QUIT = 0x0B
-    CONNECT = 0x0C
-    DISCONNECT = 0x0D
-    MOVE = 0x0E
-    FEEDBACK = 0x0F
-    INFO = 0xFD
-    UNKNOWN = 0xFE
-
+from Hexlink.packing import encode as pack_rows, PACKED_MAX_ERROR
+
+# IDs, packet layout and payload structs are generated from Hexlink/protocol.toml, see Hexlink/codegen.py
+from Hexlink.protocol import (
+    START_MARKER,
+    START_SIZE,
+    LEN_SIZE,
+    SEQ_SIZE,
+    FROM_SIZE,
+    TO_SIZE,
+    MSG_ID_SIZE,
+    CRC_SIZE,
+    HEADER_SIZE,
+    PAYLOAD_OFFSET,
+    PACKET_OVERHEAD,
+    MIN_PACKET_SIZE,
+    MAX_PACKET_SIZE,
+    NODE_ID_MASTER,
+    NODE_ID_PC,
+    NODE_ID_BROADCAST,
+    NODE_ID_SLAVES,
+    STATUS_STREAMING,
+    STATUS_ENDED,
+    STATUS_DRAINED,
+    STATUS_QUEUED,
+    STATUS_PERIOD_MS,
+    MsgID,
+    CRC_STRUCT,
+    PACKET_HEADER_STRUCT,
+    ACK_TIME_STRUCT,
+    STREAM_HEADER_STRUCT,
+    STATUS_STRUCT,
+    HAVE_QUERY_STRUCT,
+    FEEDBACK_STRUCT,
+)
 
 # Access as bytes
 msg_bytes = {msg: bytes([msg.value]) for msg in MsgID}
@@ -45,84 +44,121 @@ msgIDs = {v: k.name for k, v in msg_bytes.items()}
 # print(msgIDs[bytes([0x01])])
 
 
-def encode_packet(seq: int, _msg_id: bytes, _payload: bytes = b"") -> bytearray:
+def encode_packet(
+    seq: int, _msg_id: bytes, _payload: bytes = b"", from_id: int = NODE_ID_PC, to_id: int = NODE_ID_BROADCAST
+) -> bytearray:
     if not isinstance(seq, int) or not (0 <= seq <= 0xFFFFFFFF):
         raise TypeError("Sequence must be an integer between 0 and 0xFFFFFFFF")
     if not isinstance(_msg_id, bytes) or len(_msg_id) != 1:
         raise TypeError("Message ID must be a single byte")
     if not isinstance(_payload, bytes):
         raise TypeError("Payload must be of type bytes")
-    if len(_payload) + PACKET_OVERHEAD > MAX_PACKET_SIZE:
+    length = len(_payload) + PACKET_OVERHEAD
+    if length > MAX_PACKET_SIZE:
         raise ValueError(f"Payload too large: {len(_payload)} bytes")
-    _packet_len = struct.pack("<I", len(_payload) + PACKET_OVERHEAD) if _payload else struct.pack("<I", PACKET_OVERHEAD)
-    _seq = struct.pack("<I", seq)
-    _from_id = b"\xff"
-    _to_id = bytes([(1 << 7) | (0 << 6) | (0 << 5) | (0 << 4) | (0 << 3) | (0 << 2) | (0 << 1) | 0])
-    # _to_id = b"\x00"
-    crc_input = START_MARKER + _packet_len + _seq + _from_id + _to_id + _msg_id + _payload
-    _crc = struct.pack("<I", crc32(crc_input))
-    _raw_packet = bytearray(START_MARKER + _packet_len + _seq + _from_id + _to_id + _msg_id + _payload + _crc)
-    return _raw_packet
+    packet = bytearray(length)
+    packet[0] = START_MARKER[0]
+    PACKET_HEADER_STRUCT.pack_into(packet, START_SIZE, length, seq, from_id, to_id, _msg_id[0])
+    packet[PAYLOAD_OFFSET : length - CRC_SIZE] = _payload
+    CRC_STRUCT.pack_into(packet, length - CRC_SIZE, crc32(memoryview(packet)[: length - CRC_SIZE]))
+    return packet
 
 
-def heartbeat(seq: int) -> bytearray:
-    return encode_packet(seq, _msg_id=msg_bytes[MsgID.HEARTBEAT])
+def heartbeat(seq: int, to_id: int = NODE_ID_BROADCAST) -> bytearray:
+    return encode_packet(seq, _msg_id=msg_bytes[MsgID.HEARTBEAT], to_id=to_id)
 
 
-def enable(seq: int) -> bytearray:
-    return encode_packet(seq, _msg_id=msg_bytes[MsgID.ENABLE])
+def enable(seq: int, to_id: int = NODE_ID_BROADCAST) -> bytearray:
+    return encode_packet(seq, _msg_id=msg_bytes[MsgID.ENABLE], to_id=to_id)
 
 
-def play(seq: int) -> bytearray:
-    return encode_packet(seq, _msg_id=msg_bytes[MsgID.PLAY])
+def play(seq: int, to_id: int = NODE_ID_BROADCAST) -> bytearray:
+    return encode_packet(seq, _msg_id=msg_bytes[MsgID.PLAY], to_id=to_id)
 
 
-def pause(seq: int) -> bytearray:
-    return encode_packet(seq, _msg_id=msg_bytes[MsgID.PAUSE])
+def pause(seq: int, to_id: int = NODE_ID_BROADCAST) -> bytearray:
+    return encode_packet(seq, _msg_id=msg_bytes[MsgID.PAUSE], to_id=to_id)
 
 
-def stop(seq: int) -> bytearray:
-    return encode_packet(seq, _msg_id=msg_bytes[MsgID.STOP])
+def stop(seq: int, to_id: int = NODE_ID_BROADCAST) -> bytearray:
+    return encode_packet(seq, _msg_id=msg_bytes[MsgID.STOP], to_id=to_id)
 
 
-def disable(seq: int) -> bytearray:
-    return encode_packet(seq, _msg_id=msg_bytes[MsgID.DISABLE])
+def disable(seq: int, to_id: int = NODE_ID_BROADCAST) -> bytearray:
+    return encode_packet(seq, _msg_id=msg_bytes[MsgID.DISABLE], to_id=to_id)
 
 
-def reset(seq: int) -> bytearray:
-    return encode_packet(seq, _msg_id=msg_bytes[MsgID.RESET])
+def reset(seq: int, to_id: int = NODE_ID_BROADCAST) -> bytearray:
+    return encode_packet(seq, _msg_id=msg_bytes[MsgID.RESET], to_id=to_id)
 
 
-def quit(seq: int) -> bytearray:
-    return encode_packet(seq, _msg_id=msg_bytes[MsgID.QUIT])
+def quit(seq: int, to_id: int = NODE_ID_BROADCAST) -> bytearray:
+    return encode_packet(seq, _msg_id=msg_bytes[MsgID.QUIT], to_id=to_id)
 
 
-def connect(seq: int) -> bytearray:
-    return encode_packet(seq, _msg_id=msg_bytes[MsgID.CONNECT])
+def connect(seq: int, to_id: int = NODE_ID_BROADCAST) -> bytearray:
+    return encode_packet(seq, _msg_id=msg_bytes[MsgID.CONNECT], to_id=to_id)
 
 
-def disconnect(seq: int) -> bytearray:
-    return encode_packet(seq, _msg_id=msg_bytes[MsgID.DISCONNECT])
+def disconnect(seq: int, to_id: int = NODE_ID_BROADCAST) -> bytearray:
+    return encode_packet(seq, _msg_id=msg_bytes[MsgID.DISCONNECT], to_id=to_id)
 
 
-def upload(seq: int, array: np.ndarray) -> bytearray:
+def upload(seq: int, array: np.ndarray, to_id: int = NODE_ID_BROADCAST) -> bytearray:
     if not isinstance(array, np.ndarray):
         raise TypeError("Array must be a NumPy ndarray")
     if array.ndim != 2 or array.shape[1] != 6:
         raise ValueError("Array must have shape (N, 6)")
     float_array = array.astype(np.float32)
     payload_data = float_array.tobytes()
-    return encode_packet(seq, _msg_id=msg_bytes[MsgID.UPLOAD], _payload=payload_data)
+    return encode_packet(seq, _msg_id=msg_bytes[MsgID.UPLOAD], _payload=payload_data, to_id=to_id)
+
+
+def packed(
+    seq: int, array: np.ndarray, to_id: int = NODE_ID_BROADCAST, max_error: float = PACKED_MAX_ERROR
+) -> bytearray:
+    """UPLOAD as fixed point / difference coded rows, see Hexlink/packing.py. ValueError if it cannot be packed."""
+    payload_data, _ = pack_rows(array, max_error=max_error)
+    return encode_packet(seq, _msg_id=msg_bytes[MsgID.PACKED], _payload=payload_data, to_id=to_id)
+
+
+def have(seq: int, crc: int, rows: int, to_id: int = NODE_ID_BROADCAST) -> bytearray:
+    return encode_packet(seq, _msg_id=msg_bytes[MsgID.HAVE], _payload=HAVE_QUERY_STRUCT.pack(crc, rows), to_id=to_id)
 
 
-def move(seq: int, pose: np.ndarray) -> bytearray:
+def payload_crc(packet: bytes) -> int:
+    """CRC32 of a packet's payload, the tag HAVE asks about."""
+    return crc32(memoryview(packet)[PAYLOAD_OFFSET:-CRC_SIZE])
+
+
+def queue(seq: int, array: np.ndarray, to_id: int = NODE_ID_BROADCAST) -> bytearray:
+    """Rows played right after the active trajectory ends, uploaded while it plays."""
+    if not isinstance(array, np.ndarray):
+        raise TypeError("Array must be a NumPy ndarray")
+    if array.ndim != 2 or array.shape[1] != 6:
+        raise ValueError("Array must have shape (N, 6)")
+    payload_data = array.astype(np.float32).tobytes()
+    return encode_packet(seq, _msg_id=msg_bytes[MsgID.QUEUE], _payload=payload_data, to_id=to_id)
+
+
+def move(seq: int, pose: np.ndarray, to_id: int = NODE_ID_BROADCAST) -> bytearray:
     if not isinstance(pose, np.ndarray):
         raise TypeError("Pose must be a NumPy ndarray")
     if pose.ndim != 1 or pose.shape[0] != 6:
         raise ValueError("Pose must have shape (6,)")
     float_array = pose.astype(np.float32)
     payload_data = float_array.tobytes()
-    return encode_packet(seq, _msg_id=msg_bytes[MsgID.MOVE], _payload=payload_data)
+    return encode_packet(seq, _msg_id=msg_bytes[MsgID.MOVE], _payload=payload_data, to_id=to_id)
+
+
+def stream(seq: int, firstRow: int, array: np.ndarray, to_id: int = NODE_ID_BROADCAST) -> bytearray:
+    """Rows firstRow.. of a streamed trajectory; an empty array ends the stream."""
+    if not isinstance(array, np.ndarray):
+        raise TypeError("Array must be a NumPy ndarray")
+    if array.ndim != 2 or array.shape[1] != 6:
+        raise ValueError("Array must have shape (N, 6)")
+    payload_data = STREAM_HEADER_STRUCT.pack(firstRow) + array.astype(np.float32).tobytes()
+    return encode_packet(seq, _msg_id=msg_bytes[MsgID.STREAM], _payload=payload_data, to_id=to_id)
 
 
 def ack(seq: int, msgID: bytes) -> bytearray:
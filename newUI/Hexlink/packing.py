@@ -0,0 +1,107 @@
+"""
+PACKED trajectory encoding, a compact alternative to the raw float32 UPLOAD payload.
+
+Each axis is quantized to int16 with its own scale and offset, row = offset + scale * q, and q can be sent as its
+first or second difference along time. Smooth trajectories change little from one millisecond to the next, so the
+second difference of q fits int8 and a row takes 6 bytes instead of 24.
+
+    header  order u8, width u8, 2 pad, rows u32, scale f32[6], offset f32[6]
+    seeds   min(order, rows) rows of q as int16
+    body    the order-th difference of q for the remaining rows, int8 (width 1) or int16 (width 2)
+
+Differencing is done on the integers, so the only loss is quantization, at most scale / 2 per axis. decode() is the
+reference for MTFW Packed.h: it integrates in int32 and forms offset + scale * q in float32, as the firmware does.
+"""
+
+import numpy as np
+from Hexlink.protocol import PACKED_HEADER_STRUCT
+
+NUM_COL: int = 6
+Q_MAX: int = 32767
+PACKED_MAX_ERROR: float = 1e-4  # rad, about 0.006°
+# (order, width) tried by encode() when none is given, smallest first
+PACKED_MODES: tuple[tuple[int, int], ...] = ((2, 1), (1, 1), (0, 2))
+
+
+def quantize(array: np.ndarray) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """Per-axis float32 scale and offset mapping the column range onto ±Q_MAX, and the int32 q."""
+    lo, hi = array.min(axis=0), array.max(axis=0)
+    offset = ((lo.astype(np.float64) + hi) / 2).astype(np.float32)
+    span = hi.astype(np.float64) - lo
+    scale = np.where(span > 0, span / (2 * Q_MAX), 1.0).astype(np.float32)
+    q = np.rint((array - offset.astype(np.float64)) / scale.astype(np.float64))
+    return scale, offset, np.clip(q, -Q_MAX, Q_MAX).astype(np.int32)
+
+
+def encode(
+    array: np.ndarray, order: int | None = None, width: int | None = None, max_error: float = PACKED_MAX_ERROR
+) -> tuple[bytes, dict]:
+    """
+    PACKED payload for an (N, 6) trajectory and its figures (mode, bytes, ratio, max_error).
+    With order and width None the smallest mode in PACKED_MODES whose differences fit is used.
+    Raises ValueError when the differences do not fit the width or the decoded rows are off by more than max_error.
+    """
+    if not isinstance(array, np.ndarray):
+        raise TypeError("Array must be a NumPy ndarray")
+    if array.ndim != 2 or array.shape[1] != NUM_COL or not len(array):
+        raise ValueError("Array must have shape (N, 6), N > 0")
+    array = array.astype(np.float32)
+    if not np.isfinite(array).all():
+        raise ValueError("Array must be finite")
+    scale, offset, q = quantize(array)
+
+    modes = PACKED_MODES if order is None else ((order, width if width is not None else 2),)
+    for order, width in modes:
+        if order not in (0, 1, 2) or width not in (1, 2) or (order == 0 and width == 1):
+            raise ValueError(f"Unsupported PACKED mode: order {order}, width {width}")
+        seeds = min(order, len(q))
+        body = np.diff(q, n=order, axis=0) if len(q) > order else np.zeros((0, NUM_COL), dtype=np.int32)
+        limit = 127 if width == 1 else Q_MAX
+        if body.size and np.abs(body).max() > limit:
+            continue
+        payload = (
+            PACKED_HEADER_STRUCT.pack(order, width, len(q), *scale, *offset)
+            + q[:seeds].astype("<i2").tobytes()
+            + body.astype("<i1" if width == 1 else "<i2").tobytes()
+        )
+        error = float(np.abs(decode(payload) - array).max())
+        if error > max_error:
+            raise ValueError(f"Quantization error {error:.3g} above {max_error:.3g}")
+        stats = {
+            "order": order,
+            "width": width,
+            "bytes": len(payload),
+            "ratio": array.nbytes / len(payload),
+            "max_error": error,
+        }
+        return payload, stats
+    raise ValueError(f"Differences do not fit order {order}, width {width}")
+
+
+def decode(payload: bytes) -> np.ndarray | None:
+    """(N, 6) float32 rows of a PACKED payload, None when it is malformed (the firmware NAKs those)."""
+    if len(payload) < PACKED_HEADER_STRUCT.size:
+        return None
+    order, width, rows, *rest = PACKED_HEADER_STRUCT.unpack_from(payload)
+    if order > 2 or width not in (1, 2) or (order == 0 and width == 1):
+        return None
+    scale = np.array(rest[:NUM_COL], dtype=np.float32)
+    offset = np.array(rest[NUM_COL:], dtype=np.float32)
+    seeds = min(order, rows)
+    seedBytes = seeds * NUM_COL * 2
+    if len(payload) != PACKED_HEADER_STRUCT.size + seedBytes + (rows - seeds) * NUM_COL * width:
+        return None
+
+    pos = PACKED_HEADER_STRUCT.size
+    q = np.empty((rows, NUM_COL), dtype=np.int32)
+    q[:seeds] = np.frombuffer(payload, dtype="<i2", count=seeds * NUM_COL, offset=pos).reshape(-1, NUM_COL)
+    body = np.frombuffer(payload, dtype="<i1" if width == 1 else "<i2", offset=pos + seedBytes)
+    body = body.reshape(-1, NUM_COL).astype(np.int32)
+    if order == 0:
+        q[seeds:] = body
+    elif order == 1:
+        q[seeds:] = q[0] + np.cumsum(body, axis=0)
+    elif rows > 1:
+        d1 = (q[1] - q[0]) + np.cumsum(body, axis=0)
+        q[seeds:] = q[1] + np.cumsum(d1, axis=0)
+    return offset + scale * q.astype(np.float32)
@@ -0,0 +1,149 @@
+"""
+Hexlink wire protocol: IDs, constants and payload codecs.
+
+Generated by Hexlink/codegen.py from Hexlink/protocol.toml, do not edit: change the schema and run
+python -m Hexlink.codegen, which also regenerates the firmware's protocol.h.
+"""
+
+import struct
+import numpy as np
+from enum import IntEnum
+
+START_MARKER = b"\x01"
+START_SIZE = 1
+LEN_SIZE = 4
+SEQ_SIZE = 4
+FROM_SIZE = 1
+TO_SIZE = 1
+MSG_ID_SIZE = 1
+CRC_SIZE = 4
+HEADER_SIZE = 11  # PacketHeader after START
+PAYLOAD_OFFSET = START_SIZE + HEADER_SIZE
+PACKET_OVERHEAD = PAYLOAD_OFFSET + CRC_SIZE
+MIN_PACKET_SIZE = PACKET_OVERHEAD
+MAX_PACKET_SIZE = 16777216 + PACKET_OVERHEAD
+
+NODE_ID_MASTER = 0x00
+NODE_ID_PC = 0xFF
+NODE_ID_BROADCAST = 0x80
+NODE_ID_SLAVES = (0x0A, 0x0B, 0x0C)
+
+STATUS_PERIOD_MS = 10  # STATUS interval while streaming
+STATUS_STREAMING = 0x01
+STATUS_ENDED = 0x02  # the empty STREAM that marks the end has arrived
+STATUS_DRAINED = 0x04  # every received row has been played
+STATUS_QUEUED = 0x08  # a QUEUE trajectory is waiting behind the active one
+
+
+class MsgID(IntEnum):
+    HEARTBEAT = 0x01
+    ENABLE = 0x02
+    PLAY = 0x03
+    PAUSE = 0x04
+    STOP = 0x05
+    DISABLE = 0x06
+    UPLOAD = 0x07
+    ACK = 0x08
+    NAK = 0x09
+    RESET = 0x0A
+    QUIT = 0x0B
+    CONNECT = 0x0C
+    DISCONNECT = 0x0D
+    MOVE = 0x0E
+    FEEDBACK = 0x0F
+    STREAM = 0x10
+    STATUS = 0x11
+    QUEUE = 0x12
+    PACKED = 0x13
+    HAVE = 0x14
+    INFO = 0xFD
+    UNKNOWN = 0xFE
+
+
+CRC_STRUCT = struct.Struct("<I")
+
+# After START. LEN counts the whole packet, START and CRC included.
+PACKET_HEADER_STRUCT = struct.Struct("<IIBBB")
+PACKET_HEADER_DTYPE = np.dtype(
+    {
+        "names": ["len", "seq", "from", "to", "msgId"],
+        "formats": ["<u4", "<u4", "u1", "u1", "u1"],
+        "offsets": [0, 4, 8, 9, 10],
+        "itemsize": 11,
+    }
+)
+PACKET_HEADER_FIELDS = ("len", "seq", "from", "to", "msgId")
+
+# ACK from the master: the acknowledged msgID, then its micros() for clock sync. Slaves send the msgID only.
+ACK_TIME_STRUCT = struct.Struct("<BI")
+ACK_TIME_DTYPE = np.dtype(
+    {
+        "names": ["msgId", "deviceTime"],
+        "formats": ["u1", "<u4"],
+        "offsets": [0, 1],
+        "itemsize": 5,
+    }
+)
+ACK_TIME_FIELDS = ("msgId", "deviceTime")
+
+# STREAM payload: first row index, then float32 rows; the empty STREAM ends the stream.
+STREAM_HEADER_STRUCT = struct.Struct("<I")
+STREAM_HEADER_DTYPE = np.dtype(
+    {
+        "names": ["firstRow"],
+        "formats": ["<u4"],
+        "offsets": [0],
+        "itemsize": 4,
+    }
+)
+STREAM_HEADER_FIELDS = ("firstRow",)
+
+# STATUS while streaming: rows consumed, rows received, underruns, flags. Outside a stream: the row being played,
+# the active trajectory length and the QUEUE switch count.
+STATUS_STRUCT = struct.Struct("<IIIB")
+STATUS_DTYPE = np.dtype(
+    {
+        "names": ["consumed", "received", "underruns", "flags"],
+        "formats": ["<u4", "<u4", "<u4", "u1"],
+        "offsets": [0, 4, 8, 12],
+        "itemsize": 13,
+    }
+)
+STATUS_FIELDS = ("consumed", "received", "underruns", "flags")
+
+# HAVE payload: CRC32 and row count of an UPLOAD/PACKED payload. The master answers ACK UPLOAD when PSRAM holds
+# exactly that upload, and NAK HAVE otherwise, remembering the tag for the upload that follows.
+HAVE_QUERY_STRUCT = struct.Struct("<II")
+HAVE_QUERY_DTYPE = np.dtype(
+    {
+        "names": ["crc", "rows"],
+        "formats": ["<u4", "<u4"],
+        "offsets": [0, 4],
+        "itemsize": 8,
+    }
+)
+HAVE_QUERY_FIELDS = ("crc", "rows")
+
+# PACKED payload header, seeds and differences follow (Hexlink/packing.py).
+PACKED_HEADER_STRUCT = struct.Struct("<BB2xI6f6f")
+PACKED_HEADER_DTYPE = np.dtype(
+    {
+        "names": ["order", "width", "rows", "scale", "offset"],
+        "formats": ["u1", "u1", "<u4", ("<f4", 6), ("<f4", 6)],
+        "offsets": [0, 1, 4, 8, 32],
+        "itemsize": 56,
+    }
+)
+PACKED_HEADER_FIELDS = ("order", "width", "rows", "scale", "offset")
+
+# FEEDBACK from a slave axis: its state and the last motor controller frames it sent and received.
+FEEDBACK_STRUCT = struct.Struct("<BBBBfII8s8s")
+FEEDBACK_DTYPE = np.dtype(
+    {
+        "names": ["axisId", "mode", "armed", "calibrated", "setPoint", "tSend", "tRecv", "sent", "recv"],
+        "formats": ["u1", "u1", "u1", "u1", "<f4", "<u4", "<u4", ("u1", 8), ("u1", 8)],
+        "offsets": [0, 1, 2, 3, 4, 8, 12, 16, 24],
+        "itemsize": 32,
+    }
+)
+FEEDBACK_FIELDS = ("axisId", "mode", "armed", "calibrated", "setPoint", "tSend", "tRecv", "sent", "recv")
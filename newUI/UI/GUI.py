@@ -6,6 +6,8 @@ from model import FSM
 import time
 from UI.custom_tabview import CustomTabview
 from UI.custom_combobox import CustomComboBox
+from UI.custom_plotview import PlotView
+from UI.custom_logviewer import LogViewer
 from serial_process import serialServer
 from queue import Empty
 from serial.tools import list_ports, list_ports_common
@@ -51,16 +53,15 @@ class App(ctk.CTk):
         self.logTab = self.tabL.add("  Log  ")
         self.logTab.grid_rowconfigure(0, weight=1)
         self.logTab.grid_columnconfigure(0, weight=1)
-        self.logTerminal: ctk.CTkTextbox = ctk.CTkTextbox(self.logTab)
-        self.logTerminal.tag_config("info", foreground="green")
-        self.logTerminal.tag_config("warning", foreground="orange")
-        self.logTerminal.tag_config("error", foreground="red")
-        self.logTerminal.tag_config("debug", foreground="gray")
+        self.logTerminal: LogViewer = LogViewer(self.logTab, capacity=MAX_LINES)
         self.logTerminal.grid(row=0, column=0, sticky="nsew", padx=(10, 10), pady=(10, 10))
-        self.logTerminal.configure(state="disabled")
 
         self.stateTab: CustomTabview = self.tabL.add("  State  ")
         self.dataTab: CustomTabview = self.tabL.add("  Data  ")
+        self.dataTab.grid_rowconfigure(0, weight=1)
+        self.dataTab.grid_columnconfigure(0, weight=1)
+        self.plotView: PlotView = PlotView(self.dataTab)
+        self.plotView.grid(row=0, column=0, sticky="nsew")
 
         self.tabR: CustomTabview = CustomTabview(self)
         self.tabR.grid(row=1, column=1, sticky="nsew", padx=(10, 10), pady=(10, 10))
@@ -164,7 +165,7 @@ class App(ctk.CTk):
     def responseHandler(self, VirtualEvent=None):
         event = self.response.get("event", None)
         if event is not None:
-            if event in self.fsm.available_transitions():
+            if self.fsm.can(event):
                 self.fsm.trigger(event)
                 if event != "quit":
                     self.configure_widgets(self.fsm.available_transitions(), self.fsm.state)
@@ -186,18 +187,8 @@ class App(ctk.CTk):
 
     def updateLog(self, data):
         # print(data)
-        data_str = "".join(f"{item['tag']}:{item['entry']}" for item in data)
-        self.logTerminal.configure(state="normal")
-        self.logTerminal.insert("end", data_str)
-
-        num_lines = int(self.logTerminal.index("end-1c").split(".")[0])
-        if num_lines > MAX_LINES:
-            self.logTerminal.delete("1.0", f"{num_lines - MAX_LINES}.0")
-        self.logTerminal.configure(state="disabled")
-
-        _, last = self.logTerminal.yview()  # Auto Scroll to the end of the log terminal
-        if last > 0.8:
-            self.logTerminal.yview("end")
+        for item in data:
+            self.logTerminal.update_log(item)
 
     def run(self):
         self.comProcess.start()
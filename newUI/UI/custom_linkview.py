@@ -0,0 +1,91 @@
+import customtkinter as ctk
+
+# (snapshot key, label, format); rates are derived from consecutive snapshots
+ROWS = (
+    ("uptime_s", "Uptime", "{:.0f} s"),
+    ("bytes_in", "Bytes in", "{:,}"),
+    ("rate_in", "Rx rate", "{:.1f} KB/s"),
+    ("bytes_out", "Bytes out", "{:,}"),
+    ("rate_out", "Tx rate", "{:.1f} KB/s"),
+    ("frames_total", "Frames", "{:,}"),
+    ("frame_rate", "Frame rate", "{:.0f} /s"),
+    ("link.quality", "Link quality", "{:.1%}"),
+    ("link.rtt_ms", "Heartbeat RTT", "{:.2f} ms"),
+    ("link.rtt_min_ms", "Heartbeat RTT min", "{:.2f} ms"),
+    ("link.missed", "Missed heartbeats", "{:,}"),
+    ("stream.buffered", "Stream buffered", "{:,} rows"),
+    ("stream.underruns", "Stream underruns", "{:,}"),
+    ("stream.resends", "Stream resends", "{:,}"),
+    ("playqueue.waiting", "Queued trajectories", "{:,}"),
+    ("playqueue.played", "Queue switches", "{:,}"),
+    ("uploads_skipped", "Uploads skipped (HAVE)", "{:,}"),
+    ("seq_lost", "Frames lost (sequence)", "{:,}"),
+    ("seq_loss_ratio", "Frame loss", "{:.3%}"),
+    ("seq_duplicates", "Duplicated frames", "{:,}"),
+    ("seq_reordered", "Reordered frames", "{:,}"),
+    ("seq_restarts", "Sequence restarts", "{:,}"),
+    ("crc_errors", "CRC errors", "{:,}"),
+    ("dropped_packets", "Dropped packets", "{:,}"),
+    ("skipped_bytes", "Resync bytes skipped", "{:,}"),
+    ("buffer_hwm", "Rx buffer high-water", "{:,} B"),
+    ("parse_us_per_chunk", "Parse / chunk", "{:.1f} µs"),
+    ("parse_us_max", "Parse max", "{:.1f} µs"),
+    ("queue.rx_buffer", "Rx buffer", "{:,} B"),
+    ("queue.log_writer", "Log writer queue", "{:,}"),
+    ("queue.feedback", "Feedback queue", "{:,}"),
+    ("queue.pending_acks", "Pending ACKs", "{:,}"),
+)
+
+
+class LinkView(ctk.CTkScrollableFrame):
+    """Table of serial link counters from the serial process METRICS snapshot, plus frames per message type."""
+
+    def __init__(self, parent, **kwargs):
+        super().__init__(parent, **kwargs)
+        self.grid_columnconfigure(1, weight=1)
+        self._previous: dict | None = None
+        self._values: dict[str, ctk.CTkLabel] = {}
+        for row, (key, label, _) in enumerate(ROWS):
+            ctk.CTkLabel(self, text=label, anchor="w").grid(row=row, column=0, sticky="w", padx=(10, 20))
+            self._values[key] = ctk.CTkLabel(self, text="-", anchor="e", font=ctk.CTkFont(family="Consolas"))
+            self._values[key].grid(row=row, column=1, sticky="e", padx=(0, 10))
+        self._framesLabel = ctk.CTkLabel(self, text="", anchor="w", justify="left", font=ctk.CTkFont(family="Consolas"))
+        self._framesLabel.grid(row=len(ROWS), column=0, columnspan=2, sticky="we", padx=10, pady=(10, 0))
+        self._clockLabel = ctk.CTkLabel(self, text="", anchor="w", justify="left", font=ctk.CTkFont(family="Consolas"))
+        self._clockLabel.grid(row=len(ROWS) + 1, column=0, columnspan=2, sticky="we", padx=10, pady=(10, 0))
+
+    def update_metrics(self, snapshot: dict) -> None:
+        frames = snapshot.get("frames", {})
+        snapshot = dict(snapshot, frames_total=sum(frames.values()))
+        previous = self._previous
+        if previous is not None and snapshot["uptime_s"] > previous["uptime_s"]:
+            dt = snapshot["uptime_s"] - previous["uptime_s"]
+            snapshot["rate_in"] = (snapshot["bytes_in"] - previous["bytes_in"]) / dt / 1024
+            snapshot["rate_out"] = (snapshot["bytes_out"] - previous["bytes_out"]) / dt / 1024
+            snapshot["frame_rate"] = (snapshot["frames_total"] - previous["frames_total"]) / dt
+        self._previous = snapshot
+
+        for key, _, fmt in ROWS:
+            value = snapshot.get(key)
+            text = "-" if value is None or value == -1 else fmt.format(value)
+            if self._values[key].cget("text") != text:
+                self._values[key].configure(text=text)
+        lines = [f"{name:<12} {count:>12,}" for name, count in sorted(frames.items(), key=lambda kv: -kv[1])]
+        self._framesLabel.configure(text="\n".join(lines))
+
+        lines = []
+        for source, seq in snapshot.get("sequence", {}).items():
+            lines.append(
+                f"node {source} lost {seq['lost']:,} of {seq['received'] + seq['lost']:,} ({seq['loss_ratio']:.3%})"
+                f" dup {seq['duplicates']:,} reord {seq['reordered']:,}"
+            )
+        for node, clock in snapshot.get("clocks", {}).items():
+            rtt = f" rtt {clock['rtt_us']:.0f} µs" if clock.get("rtt_us") is not None else " one-way"
+            lines.append(f"node {node} drift {clock['drift_ppm']:+6.1f} ppm{rtt}")
+        for axis, stats in snapshot.get("latency", {}).items():
+            if stats.get("count"):
+                lines.append(
+                    f"AXIS {axis} latency {stats['mean_us']:7.0f} ±{stats['std_us']:5.0f} µs"
+                    f" jitter {stats['jitter_us']:5.0f} µs max {stats['max_us']:7.0f} µs"
+                )
+        self._clockLabel.configure(text="\n".join(lines))
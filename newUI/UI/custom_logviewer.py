@@ -1,19 +1,48 @@
 import customtkinter as ctk
 import tkinter as tk
 from tkinter import font as tkfont
+import time
+from UI.log_store import LogStore, LogIndex
+
+FRAME_MS = 16  # appends are coalesced and rendered at most once per frame
 
 
 class LogViewer(ctk.CTkFrame):
-    def __init__(self, parent, **kwargs):
+    def __init__(self, parent, capacity: int = 10000, **kwargs):
         super().__init__(parent, **kwargs)
 
-        # internal state: list of dicts {"tag":..., "entry":...}
-        self.logs = []
+        # internal state: bounded ring of LogEntry, offset of the first visible line
+        self.logs: LogStore = LogStore(capacity)
+        self.index: LogIndex = LogIndex(self.logs)
         self.offset = 0
+        # active filter: query result offsets (relative to _view_base) plus ids of later matching entries
+        self._filter: tuple[str | None, str | None] | None = None
+        self._view = ()
+        self._view_base: int = 0
+        self._view_tail: list[int] = []
+        self._pending: list[tuple[str, str, float]] = []
+        self._flush_id = None
+        # absolute ids [first, stop) currently drawn in the textbox
+        self._drawn: tuple[int, int] = (0, 0)
+
+        # 0) Filter bar: substring search + tag selection
+        self.filterBar = ctk.CTkFrame(self, fg_color="transparent")
+        self.filterBar.grid(row=0, column=0, columnspan=2, sticky="we", pady=(0, 5))
+        self.filterBar.grid_columnconfigure(0, weight=1)
+        self.searchEntry = ctk.CTkEntry(self.filterBar, placeholder_text="search")
+        self.searchEntry.grid(row=0, column=0, sticky="we", padx=(0, 5))
+        self.searchEntry.bind("<Return>", lambda e: self._apply_filter_bar())
+        self.tagSelect = ctk.CTkSegmentedButton(
+            self.filterBar,
+            values=["ALL", "INFO", "WARNING", "ERROR", "DEBUG"],
+            command=lambda v: self._apply_filter_bar(),
+        )
+        self.tagSelect.set("ALL")
+        self.tagSelect.grid(row=0, column=1, sticky="e")
 
         # 1) Textbox without its own scrollbars
         self.textbox = ctk.CTkTextbox(self, wrap="none", state="disabled", activate_scrollbars=False)
-        self.textbox.grid(row=0, column=0, sticky="nsew")
+        self.textbox.grid(row=1, column=0, sticky="nsew")
 
         # 1a) Tag configurations
         self.textbox.tag_config("INFO", foreground="green")
@@ -23,10 +52,10 @@ class LogViewer(ctk.CTkFrame):
 
         # 2) External vertical scrollbar
         self.scrollbar = ctk.CTkScrollbar(self, orientation="vertical", command=self._on_scroll)
-        self.scrollbar.grid(row=0, column=1, sticky="ns")
+        self.scrollbar.grid(row=1, column=1, sticky="ns")
 
         # 3) Make grid expandable
-        self.grid_rowconfigure(0, weight=1)
+        self.grid_rowconfigure(1, weight=1)
         self.grid_columnconfigure(0, weight=1)
 
         # 4) Determine line height for slicing
@@ -48,37 +77,137 @@ class LogViewer(ctk.CTkFrame):
         log_dict must have:
           - "tag":    one of "INFO","WARNING","ERROR","DEBUG"
           - "entry":  the text message
+        Entries are buffered and rendered together on the next frame.
         """
-        tag = log_dict.get("tag", "INFO")
-        entry = log_dict.get("entry", "")
+        tag = str(log_dict.get("tag", "INFO")).upper()
+        entry = str(log_dict.get("entry", "")).rstrip("\n")
+        self._pending.append((tag, entry, log_dict.get("time", time.time())))
+        if self._flush_id is None:
+            self._flush_id = self.after(FRAME_MS, self._flush)
+
+    def _flush(self):
+        self._flush_id = None
+        if not self._pending:
+            return
+        pending, self._pending = self._pending, []
+        visible = self._visible_count()
+        first_before = self.logs.first
         # determine if we're scrolled to bottom
-        at_bottom = self.offset + self._visible_count() >= len(self.logs)
-        self.logs.append({"tag": tag, "entry": entry})
+        at_bottom = self.offset + visible >= self._count()
+        if self._filter is not None:
+            tag, text = self._filter
+            for item in pending:
+                abs_id = self.logs.append(*item)
+                if self.index.matches(self.logs.get(abs_id), tag, text):
+                    self._view_tail.append(abs_id)
+            if at_bottom:
+                self.offset = max(0, self._count() - visible)
+                self._refresh_view()
+            else:
+                self._update_scrollbar(visible)
+            return
+        for tag, entry, t in pending:
+            self.logs.append(tag, entry, t)
+
         if at_bottom:
-            # auto-scroll to show the new line
-            self.offset = max(0, len(self.logs) - self._visible_count())
+            # auto-scroll to show the new lines
+            self.offset = max(0, len(self.logs) - visible)
+            self._render_tail()
+        else:
+            # keep the same lines in view while old entries are evicted underneath
+            self.offset -= self.logs.first - first_before
+            if self.offset < 0:
+                self._refresh_view()
+            else:
+                self._update_scrollbar()
+
+    def filter(self, tag: str | None = None, text: str | None = None):
+        """Show only entries with this tag and/or containing this text (case-insensitive); no arguments clears it."""
+        if not tag and not text:
+            self._filter = None
+            self._view, self._view_tail = (), []
+        else:
+            self._filter = (tag, text)
+            self._view = self.index.query(tag=tag, text=text)
+            self._view_base = self.logs.first
+            self._view_tail = []
+        self.offset = max(0, self._count() - self._visible_count())  # jump to the newest match
         self._refresh_view()
 
+    def _apply_filter_bar(self):
+        tag = self.tagSelect.get()
+        self.filter(tag=None if tag == "ALL" else tag, text=self.searchEntry.get().strip() or None)
+
+    def _count(self) -> int:
+        if self._filter is None:
+            return len(self.logs)
+        return len(self._view) + len(self._view_tail)
+
+    def _rows(self, start: int, stop: int) -> list:
+        """Entries at view positions [start, stop), through the filter when one is active."""
+        if self._filter is None:
+            return self.logs.slice(start, stop)
+        n = len(self._view)
+        ids = [self._view[i] + self._view_base for i in range(max(start, 0), min(stop, n))]
+        ids += self._view_tail[max(start - n, 0) : max(stop - n, 0)]
+        rows = (self.logs.get(abs_id) for abs_id in ids)
+        return [item for item in rows if item is not None]
+
     def _visible_count(self):
         h = self.textbox.winfo_height()
         return max(1, h // self.line_height) if h > 1 else 1
 
+    def _render_tail(self):
+        """Append only the lines that are new since the last draw and trim the top, instead of a full redraw."""
+        visible = self._visible_count()
+        stop = self.logs.next
+        start = self.logs.first + self.offset
+        drawn_first, drawn_stop = self._drawn
+        if drawn_stop <= drawn_first or not (drawn_first <= start <= drawn_stop):
+            self._refresh_view()
+            return
+        self.textbox.configure(state="normal")
+        self._insert_lines(self.logs.slice(drawn_stop - self.logs.first, stop - self.logs.first))
+        trim = start - drawn_first
+        if trim > 0:
+            self.textbox.delete("1.0", f"{trim + 1}.0")
+        self.textbox.configure(state="disabled")
+        self._drawn = (start, stop)
+        self._update_scrollbar(visible)
+
+    def _insert_lines(self, entries):
+        # one insert per run of equally tagged lines keeps Tk calls low for bursts
+        run_tag, run = None, []
+        for item in entries:
+            if item.tag != run_tag and run:
+                self.textbox.insert("end", "".join(run), run_tag)
+                run = []
+            run_tag = item.tag
+            run.append(item.entry + "\n")
+        if run:
+            self.textbox.insert("end", "".join(run), run_tag)
+
     def _refresh_view(self):
         visible = self._visible_count()
-        total = len(self.logs)
+        total = self._count()
         max_off = max(0, total - visible)
         self.offset = min(max(self.offset, 0), max_off)
 
         # redraw only visible slice
         self.textbox.configure(state="normal")
         self.textbox.delete("0.0", "end")
-        for item in self.logs[self.offset : self.offset + visible]:
-            text = item["entry"] + "\n"
-            tag = item.get("tag", "info")
-            self.textbox.insert("end", text, tag)
+        self._insert_lines(self._rows(self.offset, self.offset + visible))
         self.textbox.configure(state="disabled")
+        if self._filter is None:
+            first = self.logs.first + self.offset
+            self._drawn = (first, min(first + visible, self.logs.next))
+        else:
+            self._drawn = (0, 0)
+        self._update_scrollbar(visible)
 
-        # update scrollbar thumb
+    def _update_scrollbar(self, visible=None):
+        visible = self._visible_count() if visible is None else visible
+        total = self._count()
         if total:
             first = self.offset / total
             last = (self.offset + visible) / total
@@ -87,7 +216,7 @@ class LogViewer(ctk.CTkFrame):
             self.scrollbar.set(0, 1)
 
     def _on_scroll(self, *args):
-        total = len(self.logs)
+        total = self._count()
         visible = self._visible_count()
         max_off = max(0, total - visible)
 
@@ -129,8 +258,9 @@ if __name__ == "__main__":
     tags = ["info", "warning", "error", "debug"]
 
     def feed(i=1):
-        viewer.update_log({"tag": random.choice(tags), "entry": f"Live entry #{i}"})
-        root.after(500, lambda: feed(i + 1))
+        for j in range(10):  # ~500 lines per second
+            viewer.update_log({"tag": random.choice(tags), "entry": f"Live entry #{i}.{j}"})
+        root.after(20, lambda: feed(i + 1))
 
     feed()
 
@@ -0,0 +1,196 @@
+import customtkinter as ctk
+import tkinter as tk
+import numpy as np
+
+# channel layout of one FEEDBACK sample: (axisId, setPoint, position, speed, torque)
+SETPOINT, POSITION, SPEED, TORQUE = range(4)
+STRIPS = (
+    ("position [rad]", ((SETPOINT, "orange"), (POSITION, "deep sky blue"))),
+    ("speed [rad/s]", ((SPEED, "lime green"),)),
+    ("torque [N·m]", ((TORQUE, "tomato"),)),
+)
+
+
+def minmax_decimate(y: np.ndarray, width: int) -> tuple[np.ndarray, np.ndarray]:
+    """
+    Reduce y to at most 2 * width points by keeping the min and max of every pixel column.
+    Returns (x, y) with x in pixel columns [0, width). NaNs are ignored inside a column.
+    """
+    n = len(y)
+    if n == 0 or width < 1:
+        return np.empty(0, np.float32), np.empty(0, np.float32)
+    if n <= 2 * width:
+        return np.linspace(0, width - 1, n, dtype=np.float32), y
+    starts = (np.arange(width, dtype=np.int64) * n) // width
+    ys = np.empty(2 * width, dtype=y.dtype)
+    ys[0::2] = np.fmin.reduceat(y, starts)
+    ys[1::2] = np.fmax.reduceat(y, starts)
+    xs = np.repeat(np.arange(width, dtype=np.float32), 2)
+    return xs, ys
+
+
+class PlotView(ctk.CTkFrame):
+    """
+    Live strip chart of per-axis setpoint vs position, speed and torque.
+    push() only copies samples into ring buffers; the canvas is redrawn at most `fps` times per second,
+    with every series min/max decimated to the canvas pixel width.
+    """
+
+    def __init__(self, parent, axes: int = 6, capacity: int = 5000, fps: int = 30, **kwargs):
+        super().__init__(parent, **kwargs)
+        self.axes: int = axes
+        self.capacity: int = capacity
+        self.period_ms: int = max(1, int(1000 / fps))
+        self.axis: int = 1
+        self.dirty: bool = False
+        self.paused: bool = False
+
+        # ring storage: [axis][channel][sample], write cursor counts total samples per axis
+        self._data: np.ndarray = np.full((axes, 4, capacity), np.nan, dtype=np.float32)
+        self._written: np.ndarray = np.zeros(axes, dtype=np.int64)
+
+        self.grid_rowconfigure(1, weight=1)
+        self.grid_columnconfigure(0, weight=1)
+
+        self.toolbar = ctk.CTkFrame(self, fg_color="transparent")
+        self.toolbar.grid(row=0, column=0, sticky="we", padx=5, pady=(5, 0))
+        self.axisSelect = ctk.CTkSegmentedButton(
+            self.toolbar,
+            values=[f"AXIS {i}" for i in range(1, axes + 1)],
+            command=lambda value: self.select_axis(int(value.split()[-1])),
+        )
+        self.axisSelect.set("AXIS 1")
+        self.axisSelect.pack(side="left")
+        self.pauseSwitch = ctk.CTkSwitch(self.toolbar, text="Hold", command=self._toggle_pause)
+        self.pauseSwitch.pack(side="right")
+
+        bg = self._apply_appearance_mode(self.cget("fg_color"))
+        self.canvas = tk.Canvas(self, bg=bg, highlightthickness=0)
+        self.canvas.grid(row=1, column=0, sticky="nsew", padx=5, pady=5)
+
+        # canvas items are created once and only have their coordinates updated
+        self._labels: list[int] = []
+        self._ranges: list[int] = []
+        self._lines: list[list[tuple[int, int]]] = []
+        for title, series in STRIPS:
+            self._labels.append(self.canvas.create_text(0, 0, anchor="nw", text=title, fill="gray70"))
+            self._ranges.append(self.canvas.create_text(0, 0, anchor="ne", text="", fill="gray50"))
+            items = []
+            for channel, color in series:
+                items.append((channel, self.canvas.create_line(0, 0, 0, 0, fill=color, width=1, state="hidden")))
+            self._lines.append(items)
+        self._frames: list[int] = [self.canvas.create_rectangle(0, 0, 0, 0, outline="gray30") for _ in STRIPS]
+
+        self.canvas.bind("<Configure>", lambda e: self._mark_dirty())
+        self.after(self.period_ms, self._tick)
+
+    def push(self, samples) -> None:
+        """Append FEEDBACK samples, an iterable of (axisId, setPoint, position, speed, torque)."""
+        rows = np.asarray(samples, dtype=np.float32)
+        if rows.ndim != 2 or rows.shape[0] == 0:
+            return
+        ids = rows[:, 0].astype(np.int64) - 1
+        for a in np.unique(ids):
+            if not 0 <= a < self.axes:
+                continue
+            values = rows[ids == a, 1:].T  # (4, n)
+            n = values.shape[1]
+            if n > self.capacity:
+                values, n = values[:, -self.capacity :], self.capacity
+            start = int(self._written[a] % self.capacity)
+            first = min(n, self.capacity - start)
+            self._data[a, :, start : start + first] = values[:, :first]
+            self._data[a, :, : n - first] = values[:, first:]
+            self._written[a] += n
+        self.dirty = True
+
+    def clear(self) -> None:
+        self._data.fill(np.nan)
+        self._written.fill(0)
+        self._mark_dirty()
+
+    def select_axis(self, axis: int) -> None:
+        self.axis = axis
+        self._mark_dirty()
+
+    def _toggle_pause(self) -> None:
+        self.paused = bool(self.pauseSwitch.get())
+        self._mark_dirty()
+
+    def _mark_dirty(self) -> None:
+        self.dirty = True
+
+    def _series(self, axis: int) -> np.ndarray:
+        """Samples of one axis in chronological order, shape (4, n)."""
+        written = int(self._written[axis])
+        if written <= self.capacity:
+            return self._data[axis, :, :written]
+        start = written % self.capacity
+        return np.concatenate((self._data[axis, :, start:], self._data[axis, :, :start]), axis=1)
+
+    def _tick(self) -> None:
+        if self.dirty and not self.paused and self.winfo_ismapped():
+            self.dirty = False
+            self._redraw()
+        self.after(self.period_ms, self._tick)
+
+    def _redraw(self) -> None:
+        width, height = self.canvas.winfo_width(), self.canvas.winfo_height()
+        if width < 10 or height < 10:
+            return
+        pad = 4
+        strip_h = height / len(STRIPS)
+        plot_w = width - 2 * pad
+        data = self._series(self.axis - 1)
+        for s, (_, series) in enumerate(STRIPS):
+            top = s * strip_h + pad
+            bottom = (s + 1) * strip_h - pad
+            self.canvas.coords(self._frames[s], pad, top, width - pad, bottom)
+            self.canvas.coords(self._labels[s], pad + 4, top + 2)
+            self.canvas.coords(self._ranges[s], width - pad - 4, top + 2)
+
+            decimated = [(item, *minmax_decimate(data[channel], plot_w)) for channel, item in series]
+            lo = min((np.nanmin(y) for _, _, y in decimated if np.isfinite(y).any()), default=np.nan)
+            hi = max((np.nanmax(y) for _, _, y in decimated if np.isfinite(y).any()), default=np.nan)
+            if not np.isfinite(lo):
+                for item, _, _ in decimated:
+                    self.canvas.itemconfigure(item, state="hidden")
+                self.canvas.itemconfigure(self._ranges[s], text="")
+                continue
+            span = (hi - lo) or 1.0
+            scale = (bottom - top - 16) / span
+            self.canvas.itemconfigure(self._ranges[s], text=f"{lo:.4g} … {hi:.4g}")
+            for item, xs, ys in decimated:
+                keep = np.isfinite(ys)
+                if keep.sum() < 2:
+                    self.canvas.itemconfigure(item, state="hidden")
+                    continue
+                coords = np.empty((int(keep.sum()), 2), dtype=np.float32)
+                coords[:, 0] = xs[keep] + pad
+                coords[:, 1] = bottom - (ys[keep] - lo) * scale
+                self.canvas.coords(item, coords.ravel().tolist())
+                self.canvas.itemconfigure(item, state="normal")
+
+
+if __name__ == "__main__":
+    # Demo: 6 axes of synthetic 1 kHz feedback, pushed in 10 ms batches
+    ctk.set_appearance_mode("dark")
+    root = ctk.CTk()
+    root.geometry("900x500")
+    view = PlotView(root)
+    view.pack(fill="both", expand=True, padx=10, pady=10)
+    t0 = [0.0]
+
+    def feed():
+        t = t0[0] + np.arange(10) * 1e-3
+        t0[0] = t[-1] + 1e-3
+        batch = []
+        for axis in range(1, 7):
+            sp = np.sin(2 * np.pi * 0.5 * t + axis)
+            pos = sp + np.random.normal(0, 0.01, t.size)
+            batch.extend(zip([axis] * t.size, sp, pos, np.cos(t + axis), np.random.normal(0, 1, t.size)))
+        view.push(batch)
+        root.after(10, feed)
+
+    feed()
+    root.mainloop()
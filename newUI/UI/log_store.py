@@ -0,0 +1,375 @@
+import re
+import time
+from array import array
+from bisect import bisect_left
+
+
+class LogEntry:
+    __slots__ = ("tag", "entry", "time")
+
+    def __init__(self, tag: str, entry: str, time: float):
+        self.tag: str = tag
+        self.entry: str = entry
+        self.time: float = time
+
+    def __repr__(self) -> str:
+        return f"<LogEntry {self.tag} {self.entry!r}>"
+
+
+class LogStore:
+    """
+    Fixed-capacity ring of LogEntry objects.
+    Entries are addressed by offset from the oldest retained entry (0 .. len-1);
+    `first` is the absolute number of that oldest entry, so absolute ids never change while offsets shift on eviction.
+    """
+
+    def __init__(self, capacity: int = 10000):
+        if capacity < 1:
+            raise ValueError("capacity must be at least 1")
+        self.capacity: int = capacity
+        self._ring: list[LogEntry | None] = [None] * capacity
+        self._next: int = 0  # absolute id of the next entry to be appended
+        self.index: LogIndex | None = None
+
+    def __len__(self) -> int:
+        return min(self._next, self.capacity)
+
+    @property
+    def first(self) -> int:
+        """Absolute id of the oldest retained entry."""
+        return max(0, self._next - self.capacity)
+
+    @property
+    def next(self) -> int:
+        """Absolute id the next append will get."""
+        return self._next
+
+    def append(self, tag: str, entry: str, t: float | None = None) -> int:
+        """Store an entry, evicting the oldest when full. Returns its absolute id."""
+        abs_id = self._next
+        item = LogEntry(tag, entry, time.time() if t is None else t)
+        self._ring[abs_id % self.capacity] = item
+        self._next += 1
+        if self.index is not None:
+            self.index.add(abs_id, item)
+        return abs_id
+
+    def __getitem__(self, offset: int) -> LogEntry:
+        n = len(self)
+        if offset < 0:
+            offset += n
+        if not 0 <= offset < n:
+            raise IndexError("log offset out of range")
+        return self._ring[(self.first + offset) % self.capacity]
+
+    def get(self, abs_id: int) -> LogEntry | None:
+        """Entry by absolute id, None if evicted or not yet written."""
+        if self.first <= abs_id < self._next:
+            return self._ring[abs_id % self.capacity]
+        return None
+
+    def slice(self, start: int, stop: int) -> list[LogEntry]:
+        """Entries at offsets [start, stop), clamped to the retained range."""
+        n = len(self)
+        start, stop = max(0, start), min(n, stop)
+        if start >= stop:
+            return []
+        lo = (self.first + start) % self.capacity
+        hi = lo + (stop - start)
+        if hi <= self.capacity:
+            return self._ring[lo:hi]
+        return self._ring[lo:] + self._ring[: hi - self.capacity]
+
+    def clear(self) -> None:
+        self._ring = [None] * self.capacity
+        self._next = 0
+        if self.index is not None:
+            self.index.clear()
+
+
+TOKEN_RE = re.compile(r"\w+(?:\.\w+)*")  # words, dotted runs like 0.5123 or sinTraj.csv kept whole
+VOCAB_SCAN_MAX: int = 1 << 15  # tokens a partial query word may expand to before it stops narrowing the search
+INTERSECT_SAMPLE: int = 32  # candidates probed to estimate how much a postings intersection would remove
+CHECK_COST: int = 4  # a text check costs about as much as hashing this many postings
+
+
+class Matches:
+    """
+    Read-only sequence of store offsets backed by a sorted snapshot of absolute ids.
+    Offsets are computed on access, so a query result costs nothing until it is rendered.
+    The ids are copied out of the postings, so later appends and compaction never change a result already handed out.
+    """
+
+    def __init__(self, ids: array, base: int):
+        self._ids: array = ids
+        self._base: int = base
+
+    def __len__(self) -> int:
+        return len(self._ids)
+
+    def __getitem__(self, i):
+        if isinstance(i, slice):
+            return [self[j] for j in range(*i.indices(len(self)))]
+        if i < 0:
+            i += len(self)
+        if not 0 <= i < len(self):
+            raise IndexError("match index out of range")
+        return self._ids[i] - self._base
+
+    def __iter__(self):
+        base = self._base
+        for abs_id in self._ids:
+            yield abs_id - base
+
+
+class LogIndex:
+    """
+    In-memory index over a LogStore: postings of absolute ids per tag and per lowercase token, the lowercase text of
+    every retained entry, and time lookup by binary search over the (time ordered) ring.
+    Evicted ids are skipped by bisecting to store.first and compacted lazily.
+    A text query is split into words; each word narrows the candidates through its postings (words cut off by the
+    query's ends through the vocabulary, one C-level str.find pass over a joined blob), and only the survivors of the
+    intersection are checked against the cached text.
+    """
+
+    def __init__(self, store: LogStore):
+        self.store: LogStore = store
+        self._tags: dict[str, array] = {}
+        self._tokens: dict[str, array] = {}
+        self._text: list[str | None] = [None] * store.capacity  # lowercase entry text, same slots as the ring
+        self._vocab: list[str] = []
+        self._blob: str = "\n"  # the vocabulary, each token between two newlines
+        self._blob_count: int = 0  # vocab tokens already joined into the blob
+        self._added: int = 0
+        store.index = self
+        for offset in range(len(store)):
+            self.add(store.first + offset, store[offset])
+
+    def clear(self) -> None:
+        self._tags.clear()
+        self._tokens.clear()
+        self._text = [None] * self.store.capacity
+        self._vocab.clear()
+        self._blob = "\n"
+        self._blob_count = 0
+
+    def add(self, abs_id: int, item: LogEntry) -> None:
+        ids = self._tags.get(item.tag)
+        if ids is None:
+            ids = self._tags[item.tag] = array("q")
+        ids.append(abs_id)
+        text = self._text[abs_id % self.store.capacity] = item.entry.lower()
+        for token in set(TOKEN_RE.findall(text)):
+            ids = self._tokens.get(token)
+            if ids is None:
+                ids = self._tokens[token] = array("q")
+                self._vocab.append(token)
+            ids.append(abs_id)
+        self._added += 1
+        if self._added >= self.store.capacity:
+            self._prune()
+
+    def _prune(self) -> None:
+        """Forget tokens and tags whose entries have all been evicted, so the vocabulary stays bounded."""
+        self._added = 0
+        first = self.store.first
+        for postings in (self._tags, self._tokens):
+            for key in [k for k, ids in postings.items() if not ids or ids[-1] < first]:
+                del postings[key]
+        self._vocab = list(self._tokens)
+        self._blob = "\n"
+        self._blob_count = 0
+        self._sync_blob()  # here rather than on the next search
+
+    def _live(self, ids: array) -> int:
+        """Index of the first retained id in a postings array, compacting it once half of it is dead."""
+        k = bisect_left(ids, self.store.first)
+        if k and k * 2 >= len(ids):
+            del ids[:k]
+            return 0
+        return k
+
+    def tags(self) -> list[str]:
+        return sorted(self._tags)
+
+    def by_tag(self, tag: str) -> Matches:
+        """Offsets of all retained entries with this tag."""
+        ids = self._tags.get(tag.upper(), array("q"))
+        return Matches(ids[self._live(ids) :], self.store.first)
+
+    def by_time(self, t0: float | None = None, t1: float | None = None) -> range:
+        """Offsets of entries with t0 <= time < t1."""
+        store = self.store
+        n = len(store)
+        times = _TimeView(store)
+        lo = 0 if t0 is None else bisect_left(times, t0, 0, n)
+        hi = n if t1 is None else bisect_left(times, t1, lo, n)
+        return range(lo, hi)
+
+    def _sync_blob(self) -> None:
+        if self._blob_count == len(self._vocab):
+            return
+        self._blob += "\n".join(self._vocab[self._blob_count :]) + "\n"
+        self._blob_count = len(self._vocab)
+
+    def _vocab_matching(self, word: str, prefix: bool, suffix: bool) -> list[str] | None:
+        """
+        Known tokens holding word: starting with it when prefix, ending with it when suffix, anywhere when neither.
+        None when more than VOCAB_SCAN_MAX do, the word then selects too little to be worth its postings.
+        """
+        self._sync_blob()
+        blob, found = self._blob, []
+        pattern = ("\n" if prefix else "") + word + ("\n" if suffix else "")
+        i = blob.find(pattern)
+        while i >= 0:
+            if len(found) >= VOCAB_SCAN_MAX:
+                return None
+            start = i if prefix else blob.rfind("\n", 0, i)
+            end = blob.find("\n", i + len(pattern) - 1)
+            found.append(blob[start + 1 : end])
+            i = blob.find(pattern, end)
+        return found
+
+    def _scan(self, needle: str) -> list[int]:
+        """Offsets of every retained entry containing needle, straight over the cached text."""
+        store, text = self.store, self._text
+        n, lo = len(store), store.first % store.capacity
+        texts = text[lo : lo + n] + text[: max(0, lo + n - store.capacity)]
+        return [k for k, entry in enumerate(texts) if needle in entry]
+
+    def search(self, text: str, tag: str | None = None, limit: int | None = None):
+        """
+        Offsets of entries whose text contains `text` (case-insensitive), optionally restricted to one tag.
+        Every word of the query contributes its postings: a word the query bounds on both sides must be a whole token,
+        the first and last words may be the end or start of one. Postings are intersected from the
+        smallest on, each only when the candidates it is estimated to remove cost more to check against the cached text
+        than the intersection does.
+        """
+        needle = text.lower()
+        store, first = self.store, self.store.first
+        if tag is not None:
+            tag = tag.upper()
+            if tag not in self._tags:
+                return []
+        if not needle:
+            found = self.by_tag(tag) if tag is not None else range(len(store))
+            return found[:limit] if limit is not None else found
+        plans: list[tuple[int, list[array], bool]] = []  # (postings length, postings, from a word rather than the tag)
+        exact = True  # every word narrowed the candidates, so a bare word needs no text check
+        for match in {(m.group(), m.start(), m.end()) for m in TOKEN_RE.finditer(needle)}:
+            word, start, end = match
+            # a "." at the needle's edge may join the word to more of the entry's token
+            prefix = start > (1 if needle[0] == "." else 0)
+            suffix = end < len(needle) - (1 if needle[-1] == "." else 0)
+            if prefix and suffix:
+                tokens = [word] if word in self._tokens else []
+            else:
+                tokens = self._vocab_matching(word, prefix, suffix)
+            if tokens == []:
+                return []
+            if tokens is None:
+                exact = False
+            else:
+                postings = [self._tokens[t] for t in tokens]
+                plans.append((sum(map(len, postings)), postings, True))
+        if tag is not None:
+            plans.append((len(self._tags[tag]), [self._tags[tag]], False))
+        plans.sort(key=lambda plan: plan[0])
+
+        ring, capacity = store._ring, store.capacity
+        if not plans:
+            out = self._scan(needle)
+            if tag is not None:
+                out = [offset for offset in out if ring[(first + offset) % capacity].tag == tag]
+            return out[:limit] if limit is not None else out
+
+        _, postings, _ = plans[0]
+        if len(postings) == 1:
+            candidates = postings[0][self._live(postings[0]) :]
+        else:
+            union: set[int] = set()
+            for ids in postings:
+                union.update(ids)
+            candidates = sorted(union)
+        for size, postings, from_word in plans[1:]:
+            if not candidates:
+                break
+            removed = len(candidates) * (1 - self._kept(candidates, postings))
+            if removed * CHECK_COST < size + len(candidates):
+                # checking the text of the candidates this would remove costs less than hashing the postings
+                exact = exact and not from_word
+                continue
+            keep: set[int] = set()
+            for ids in postings:
+                keep.update(ids)
+            candidates = [abs_id for abs_id in candidates if abs_id in keep]
+
+        if exact and TOKEN_RE.fullmatch(needle):
+            # a bare word: the tokens holding it are exactly the matches, no text to check
+            if len(plans) == 1 and len(plans[0][1]) == 1 and tag is None:
+                found = Matches(candidates, first)
+                return found[:limit] if limit is not None else found
+            out = [abs_id - first for abs_id in candidates if abs_id >= first]
+        else:
+            out = self._verify(needle, candidates)
+        if tag is not None:
+            out = [offset for offset in out if ring[(first + offset) % capacity].tag == tag]
+        return out[:limit] if limit is not None else out
+
+    def _kept(self, candidates, postings: list[array]) -> float:
+        """Estimated fraction of the candidates found in the (sorted) postings, from an even sample."""
+        if len(postings) > INTERSECT_SAMPLE:
+            return min(1.0, sum(map(len, postings)) / max(1, len(self.store)))
+        sample = candidates[:: max(1, len(candidates) // INTERSECT_SAMPLE)]
+        hits = 0
+        for abs_id in sample:
+            for ids in postings:
+                k = bisect_left(ids, abs_id)
+                if k < len(ids) and ids[k] == abs_id:
+                    hits += 1
+                    break
+        return hits / len(sample)
+
+    def _verify(self, needle: str, candidates) -> list[int]:
+        """Offsets of the (sorted, absolute) candidate ids whose cached text contains needle."""
+        first, capacity, texts = self.store.first, self.store.capacity, self._text
+        lo = bisect_left(candidates, first)
+        return [abs_id - first for abs_id in candidates[lo:] if needle in texts[abs_id % capacity]]
+
+    def query(self, tag: str | None = None, text: str | None = None, t0: float | None = None, t1: float | None = None):
+        """Offsets matching every given criterion; an empty query returns every offset."""
+        if text:
+            result = self.search(text, tag)
+        elif tag:
+            result = self.by_tag(tag)
+        else:
+            result = range(len(self.store))
+        if t0 is None and t1 is None:
+            return result
+        span = self.by_time(t0, t1)
+        if isinstance(result, range):
+            return range(max(result.start, span.start), min(result.stop, span.stop))
+        lo = bisect_left(result, span.start)
+        hi = bisect_left(result, span.stop)
+        return result[lo:hi]
+
+    def matches(self, item: LogEntry, tag: str | None = None, text: str | None = None) -> bool:
+        """Whether a single entry passes a tag/text filter, used to extend live filtered views."""
+        if tag and item.tag != tag.upper():
+            return False
+        return not text or text.lower() in item.entry.lower()
+
+
+class _TimeView:
+    """Sequence view of entry times for bisect."""
+
+    __slots__ = ("store",)
+
+    def __init__(self, store: LogStore):
+        self.store = store
+
+    def __len__(self) -> int:
+        return len(self.store)
+
+    def __getitem__(self, offset: int) -> float:
+        return self.store[offset].time
@@ -0,0 +1,109 @@
+"""
+LogViewer search benchmark.
+
+Fills a LogStore ring of --entries (default 10^6) past capacity with a mix of link, setpoint and error lines, then
+times LogIndex.search/query for bare words, rare tokens, multi-word and punctuated phrases, with and without a tag.
+Every query must stay under --limit-ms (first call included, it pays for any lazy index work); results are also
+compared against benchmarks/baseline/logsearch.json.
+
+    python -m benchmarks.logsearch                  # from newUI/
+    python -m benchmarks.logsearch --entries 100000
+    python -m benchmarks.logsearch --save-baseline
+"""
+
+import sys
+import time
+import random
+import argparse
+from UI.log_store import LogStore, LogIndex
+from benchmarks.results import write_results, compare, BASELINE_DIR
+
+QUERIES: tuple[tuple[str, str | None], ...] = (
+    ("crc", None),
+    ("crc mismatch", None),
+    ("CRC mismatch. Expected", None),
+    ("value=0.5", None),
+    ("value=0.5", "INFO"),
+    ("#1199", None),
+    ("timeout", "WARNING"),
+    ("nak seq #1199 timeout", None),
+    ("bytes in 0.0", None),
+    ("axis 3 value=-0.12", None),
+    ("0x0b", None),
+    ("retry", None),
+)
+
+
+def log_lines(n: int, seed: int = 0):
+    """(tag, entry) pairs in the proportions a busy session produces."""
+    rng = random.Random(seed)
+    for i in range(n):
+        r = rng.random()
+        if r < 0.40:
+            yield "INFO", f"setPoint axis {rng.randrange(6)} value={rng.uniform(-1, 1):.4f} rad"
+        elif r < 0.75:
+            n_bytes = rng.choice((16, 24, 19216, 40086))
+            ms = rng.uniform(0.01, 3)
+            yield "DEBUG", f"[sendData] : Sent {n_bytes} bytes in {ms:.2f} ms ({n_bytes / ms:.2f} KB/s)"
+        elif r < 0.85:
+            yield "INFO", f"[INFO] : FEEDBACK node 0x{rng.choice((10, 11, 12)):02X} seq {i}"
+        elif r < 0.95:
+            yield "ERROR", (
+                f"[parser] : Invalid packet: CRC mismatch. Expected CRC: {rng.getrandbits(32):08x},"
+                f" Computed: {rng.getrandbits(32):08x}"
+            )
+        elif r < 0.99:
+            yield "WARNING", f"NAK seq #{rng.randrange(100_000)} timeout after {rng.randrange(5, 500)} ms"
+        else:
+            yield "WARNING", f"[connect] : retry {rng.randrange(10)} on /dev/ttyACM{rng.randrange(4)}"
+
+
+def run_all(entries: int) -> dict:
+    store = LogStore(entries)
+    index = LogIndex(store)
+    t0 = time.perf_counter()
+    for tag, entry in log_lines(entries + entries // 5):
+        store.append(tag, entry, 0.0)
+    results: dict[str, float] = {"append.us": (time.perf_counter() - t0) / (entries + entries // 5) * 1e6}
+    for text, tag in QUERIES:
+        name = f"search.{text}" + (f".{tag}" if tag else "")
+        t0 = time.perf_counter()
+        found = index.query(tag=tag, text=text)
+        first = time.perf_counter() - t0
+        t0 = time.perf_counter()
+        index.query(tag=tag, text=text)
+        again = time.perf_counter() - t0
+        results[f"{name}.first_ms"] = first * 1e3
+        results[f"{name}.ms"] = again * 1e3
+        results[f"{name}.matches"] = len(found)
+    return results
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--entries", type=int, default=1_000_000, help="ring capacity, filled 1.2 times over")
+    ap.add_argument("--limit-ms", type=float, default=100.0, help="slowest query allowed")
+    ap.add_argument("--save-baseline", action="store_true")
+    ap.add_argument("--tolerance", type=float, default=0.15)
+    args = ap.parse_args()
+
+    results = run_all(args.entries)
+    for key, value in results.items():
+        print(f"{key:<56} {value:>14.6g}")
+    slow = [key for key, value in results.items() if key.endswith("ms") and value > args.limit_ms]
+    for key in slow:
+        print(f"TOO SLOW {key}: {results[key]:.1f} ms > {args.limit_ms:.0f} ms")
+
+    if args.save_baseline:
+        print(f"Baseline saved to {write_results('logsearch', results, BASELINE_DIR)}")
+        return 1 if slow else 0
+    print(f"Results saved to {write_results('logsearch', results)}")
+    timings = {key: value for key, value in results.items() if key.endswith("ms") or key.endswith("us")}
+    regressions = compare("logsearch", timings, args.tolerance)
+    for line in regressions:
+        print(f"REGRESSION {line}")
+    return 1 if slow or regressions else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,191 @@
+"""
+Hexlink protocol benchmarks.
+
+Measures the host hot paths: encode_packet/upload throughput across payload sizes, PACKED encode/decode throughput
+and size ratio on the bundled trajectories, Parser.parse throughput on FEEDBACK-heavy, UPLOAD-heavy and noisy
+streams, decodePayload/parse_feedback cost per frame and logDecoder MB/s.
+Results go to benchmarks/results/protocol.json and are compared against benchmarks/baseline/protocol.json.
+
+    python -m benchmarks.protocol                  # from newUI/
+    python -m benchmarks.protocol --quick
+    python -m benchmarks.protocol --save-baseline
+"""
+
+import io
+import sys
+import time
+import random
+import struct
+import argparse
+import contextlib
+import numpy as np
+from parser import Parser, decodePayload, parse_feedback
+from logDecoder import decode_log, frame_rows
+from Hexlink.commands import MsgID, msg_bytes, encode_packet, upload, packed, heartbeat, ack, FEEDBACK_STRUCT
+from Hexlink.packing import encode as pack_rows, decode as unpack_rows
+from benchmarks.results import write_results, compare, BASELINE_DIR
+
+PAYLOAD_SIZES = (0, 33, 1024, 64 * 1024, 1024 * 1024)
+UPLOAD_ROWS = (1_000, 10_000, 100_000)
+PACKED_TRAJECTORIES = ("sinTraj", "camTraj")
+
+
+def best(run, repeat: int) -> float:
+    """Smallest of `repeat` timings; run() does its own setup and returns the seconds it measured."""
+    return min(run() for _ in range(repeat))
+
+
+def timed(fn, *args) -> float:
+    t0 = time.perf_counter()
+    fn(*args)
+    return time.perf_counter() - t0
+
+
+def feedback_packet(seq: int, axisId: int) -> bytearray:
+    recv = bytes([0x95, 0x00, 30, 0x00, 0x80, 0x80, 0x08, 0x00])  # decodes to ~0 rad, ~0 rad/s, ~0 N·m
+    sent = struct.pack("<Bf", 0x95, 0.1) + b"\x00\x00\x00"
+    payload = FEEDBACK_STRUCT.pack(axisId, 1, 1, 1, 0.1, seq, seq + 200, sent, recv)
+    return encode_packet(seq, msg_bytes[MsgID.FEEDBACK], payload, from_id=0x0A + (axisId - 1) // 2, to_id=0xFF)
+
+
+def feedback_stream(frames: int) -> bytes:
+    """6 axes of FEEDBACK with an ACK every 100 frames, like a playing session."""
+    out = bytearray()
+    for i in range(frames):
+        out += feedback_packet(i // 6, i % 6 + 1)
+        if i % 100 == 0:
+            out += ack(i, msg_bytes[MsgID.HEARTBEAT])
+    return bytes(out)
+
+
+def upload_stream(uploads: int, rows: int) -> bytes:
+    data = np.random.default_rng(0).standard_normal((rows, 6)).astype(np.float32)
+    return b"".join(bytes(upload(i, data)) for i in range(uploads))
+
+
+def noisy_stream(frames: int, garbage: float = 0.05, corrupt: float = 0.01, seed: int = 0) -> bytes:
+    """
+    FEEDBACK stream with random garbage runs between packets (resync work) and CRC bit flips
+    on a fraction of packets (CRC failures). Length fields are left intact so the parser never stalls.
+    """
+    rng = random.Random(seed)
+    out = bytearray()
+    for i in range(frames):
+        if rng.random() < garbage:
+            out += bytes(rng.choice(range(2, 256)) for _ in range(rng.randrange(1, 64)))
+        packet = feedback_packet(i // 6, i % 6 + 1)
+        if rng.random() < corrupt:
+            packet[-1 - rng.randrange(4)] ^= 1 << rng.randrange(8)
+        out += packet
+    return bytes(out)
+
+
+def parse_throughput(stream: bytes, repeat: int, chunk: int = 4096) -> tuple[float, int]:
+    """Seconds to parse `stream` fed in serial-sized chunks, and the number of frames produced."""
+    counted = [0]
+
+    def callback(frames):
+        counted[0] += len(frames)
+
+    def run():
+        parser = Parser(callback=callback)
+        buffer = bytearray()
+        counted[0] = 0
+        t0 = time.perf_counter()
+        for start in range(0, len(stream), chunk):
+            buffer.extend(stream[start : start + chunk])
+            parser.parse(buffer)
+        return time.perf_counter() - t0
+
+    with contextlib.redirect_stdout(io.StringIO()):  # CRC failures print
+        elapsed = best(run, repeat)
+    return elapsed, counted[0]
+
+
+def per_call_us(fn, arg, n: int, repeat: int) -> float:
+    def run():
+        t0 = time.perf_counter()
+        for _ in range(n):
+            fn(arg)
+        return time.perf_counter() - t0
+
+    return best(run, repeat) / n * 1e6
+
+
+def run_all(quick: bool = False) -> dict:
+    repeat = 3 if quick else 5
+    scale = 0.2 if quick else 1.0
+    results: dict[str, float] = {}
+
+    for size in PAYLOAD_SIZES:
+        payload = bytes(size)
+        n = max(1, int((2000 if size < 65536 else 20) * scale))
+        elapsed = best(
+            lambda: timed(lambda: [encode_packet(i, msg_bytes[MsgID.INFO], payload) for i in range(n)]), repeat
+        )
+        results[f"encode_packet.{size}B.packets_per_s"] = n / elapsed
+        if size:
+            results[f"encode_packet.{size}B.MBps"] = n * size / elapsed / 1e6
+
+    for rows in UPLOAD_ROWS:
+        data = np.random.default_rng(0).standard_normal((rows, 6))
+        elapsed = best(lambda: timed(upload, 0, data), repeat)
+        results[f"upload.{rows}rows.MBps"] = rows * 24 / elapsed / 1e6
+
+    for name in PACKED_TRAJECTORIES:
+        data = np.loadtxt(f"Trajectories/{name}.csv", delimiter=",", dtype=np.float32, ndmin=2)
+        payload, stats = pack_rows(data)
+        results[f"packed.{name}.ratio"] = stats["ratio"]
+        results[f"packed.{name}.MBps"] = data.nbytes / best(lambda: timed(packed, 0, data), repeat) / 1e6
+        results[f"unpack.{name}.MBps"] = data.nbytes / best(lambda: timed(unpack_rows, payload), repeat) / 1e6
+
+    streams = {
+        "feedback": feedback_stream(int(30_000 * scale)),
+        "upload": upload_stream(4, int(50_000 * scale)),
+        "noisy": noisy_stream(int(30_000 * scale)),
+    }
+    for name, stream in streams.items():
+        elapsed, frames = parse_throughput(stream, repeat)
+        results[f"parse.{name}.MBps"] = len(stream) / elapsed / 1e6
+        results[f"parse.{name}.frames_per_s"] = frames / elapsed
+
+    n = int(20_000 * scale)
+    full_feedback = bytes([MsgID.FEEDBACK]) + bytes(feedback_packet(0, 1)[12:-4])
+    results["decodePayload.FEEDBACK.us"] = per_call_us(decodePayload, full_feedback, n, repeat)
+    results["decodePayload.HEARTBEAT.us"] = per_call_us(decodePayload, bytes([MsgID.HEARTBEAT]), n, repeat)
+    results["decodePayload.ACK.us"] = per_call_us(decodePayload, bytes([MsgID.ACK, MsgID.PLAY]), n, repeat)
+    results["parse_feedback.us"] = per_call_us(parse_feedback, full_feedback, n, repeat)
+
+    log = streams["feedback"] + bytes(heartbeat(0))
+    elapsed = best(lambda: timed(lambda: frame_rows(decode_log(bytearray(log)))), repeat)
+    results["logDecoder.MBps"] = len(log) / elapsed / 1e6
+    return results
+
+
+def higher_is_better(results: dict) -> set[str]:
+    return {key for key in results if key.endswith(("MBps", "per_s", "ratio"))}
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--quick", action="store_true", help="smaller inputs and fewer repeats")
+    ap.add_argument("--save-baseline", action="store_true")
+    ap.add_argument("--tolerance", type=float, default=0.15)
+    args = ap.parse_args()
+
+    results = run_all(args.quick)
+    for key, value in results.items():
+        print(f"{key:<48} {value:>14.6g}")
+
+    if args.save_baseline:
+        print(f"Baseline saved to {write_results('protocol', results, BASELINE_DIR)}")
+        return 0
+    print(f"Results saved to {write_results('protocol', results)}")
+    regressions = compare("protocol", results, args.tolerance, higher_is_better(results))
+    for line in regressions:
+        print(f"REGRESSION {line}")
+    return 1 if regressions else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
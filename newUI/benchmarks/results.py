@@ -0,0 +1,57 @@
+import os
+import json
+import time
+import platform
+
+BENCH_DIR: str = os.path.dirname(os.path.abspath(__file__))
+RESULTS_DIR: str = os.path.join(BENCH_DIR, "results")
+BASELINE_DIR: str = os.path.join(BENCH_DIR, "baseline")
+
+
+def write_results(name: str, results: dict, directory: str = RESULTS_DIR) -> str:
+    """Write {metric: value} plus machine info to <directory>/<name>.json and return the path."""
+    os.makedirs(directory, exist_ok=True)
+    path = os.path.join(directory, f"{name}.json")
+    doc = {
+        "name": name,
+        "time": time.strftime("%Y-%m-%d-%H-%M-%S"),
+        "python": platform.python_version(),
+        "machine": platform.platform(),
+        "results": results,
+    }
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(doc, f, indent=2, sort_keys=True)
+    return path
+
+
+def load_results(name: str, directory: str = BASELINE_DIR) -> dict | None:
+    path = os.path.join(directory, f"{name}.json")
+    if not os.path.exists(path):
+        return None
+    with open(path, "r", encoding="utf-8") as f:
+        return json.load(f)["results"]
+
+
+def compare(name: str, results: dict, tolerance: float = 0.15, higher_is_better: set[str] = frozenset()) -> list[str]:
+    """
+    Compare results against the saved baseline.
+    Metrics are lower-is-better (times) unless listed in higher_is_better (throughputs).
+    Returns one line per metric that regressed by more than `tolerance`; prints a table of all of them.
+    """
+    baseline = load_results(name)
+    if baseline is None:
+        print(f"[compare] : No baseline for '{name}', save one with --save-baseline")
+        return []
+    regressions = []
+    print(f"{'metric':<48} {'baseline':>14} {'current':>14} {'change':>8}")
+    for key in sorted(results):
+        if key not in baseline or not baseline[key]:
+            continue
+        old, new = baseline[key], results[key]
+        change = (new - old) / old
+        worse = -change if key in higher_is_better else change
+        flag = "  <-- REGRESSION" if worse > tolerance else ""
+        print(f"{key:<48} {old:>14.6g} {new:>14.6g} {change:>+8.1%}{flag}")
+        if flag:
+            regressions.append(f"{key}: {old:.6g} -> {new:.6g} ({change:+.1%})")
+    return regressions
@@ -0,0 +1,106 @@
+"""
+GUI startup benchmark.
+
+Runs `python -X importtime -c "import <module>"` in fresh interpreters and records the total and the
+heaviest cumulative imports, optionally also the time until the first window frame is drawn.
+
+    python -m benchmarks.startup                  # from newUI/
+    python -m benchmarks.startup --window         # needs a display
+    python -m benchmarks.startup --save-baseline
+"""
+
+import os
+import re
+import sys
+import argparse
+import subprocess
+from statistics import median
+from benchmarks.results import write_results, compare, BASELINE_DIR
+
+NEWUI_DIR: str = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+IMPORTTIME_RE = re.compile(r"import time:\s+(\d+)\s+\|\s+(\d+)\s+\|(\s*)(\S+)")
+
+WINDOW_SNIPPET = """
+import time
+t0 = time.perf_counter()
+import GUIr
+app = GUIr.App()
+app.update()
+print(time.perf_counter() - t0)
+app.destroy()
+"""
+
+
+def import_profile(module: str) -> tuple[int, dict[str, int]]:
+    """
+    Cumulative import time of `module` in microseconds from one fresh interpreter,
+    plus the cumulative time of each of its direct imports.
+    """
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        cwd=NEWUI_DIR,
+        capture_output=True,
+        text=True,
+    )
+    if proc.returncode != 0:
+        raise RuntimeError(proc.stderr.strip().splitlines()[-1] if proc.stderr else f"import {module} failed")
+    children: dict[str, int] = {}
+    for line in proc.stderr.splitlines():
+        m = IMPORTTIME_RE.match(line)
+        if not m:
+            continue
+        depth = (len(m.group(3)) - 1) // 2
+        name, cumulative = m.group(4), int(m.group(2))
+        if depth == 1:
+            children[name] = cumulative
+        elif depth == 0:
+            # importtime prints children before their parent
+            if name == module:
+                return cumulative, children
+            children = {}
+    raise RuntimeError(f"{module} not found in -X importtime output")
+
+
+def window_time() -> float:
+    proc = subprocess.run([sys.executable, "-c", WINDOW_SNIPPET], cwd=NEWUI_DIR, capture_output=True, text=True)
+    if proc.returncode != 0:
+        raise RuntimeError(proc.stderr.strip().splitlines()[-1])
+    return float(proc.stdout.strip().splitlines()[-1])
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--module", default="GUIr")
+    ap.add_argument("--repeat", type=int, default=5)
+    ap.add_argument("--top", type=int, default=10)
+    ap.add_argument("--window", action="store_true", help="also time App() until the first frame is drawn")
+    ap.add_argument("--save-baseline", action="store_true")
+    ap.add_argument("--tolerance", type=float, default=0.20)
+    args = ap.parse_args()
+
+    runs = [import_profile(args.module) for _ in range(args.repeat)]
+    names = set().union(*(children for _, children in runs))
+    per_pkg = {name: median(children.get(name, 0) for _, children in runs) for name in names}
+    total_ms = median(total for total, _ in runs) / 1e3
+
+    results = {"import_total_ms": total_ms}
+    print(f"import {args.module}: {total_ms:.1f} ms (median of {args.repeat})")
+    for name, us in sorted(per_pkg.items(), key=lambda kv: -kv[1])[: args.top]:
+        print(f"  {name:<32} {us / 1e3:8.1f} ms")
+        results[f"import_ms.{name}"] = us / 1e3
+    if args.window:
+        results["window_ms"] = median(window_time() for _ in range(args.repeat)) * 1e3
+        print(f"first frame: {results['window_ms']:.1f} ms")
+
+    if args.save_baseline:
+        print(f"Baseline saved to {write_results('startup', results, BASELINE_DIR)}")
+        return 0
+    print(f"Results saved to {write_results('startup', results)}")
+    regressions = compare("startup", {k: v for k, v in results.items() if not k.startswith("import_ms.")}, args.tolerance)
+    for line in regressions:
+        print(f"REGRESSION {line}")
+    return 1 if regressions else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,207 @@
+"""
+Host <-> device clock mapping.
+
+Every Teensy stamps with its own 32-bit micros(). The master answers HEARTBEAT with its micros() appended to the ACK,
+so its clock is fitted from round trips (Cristian: the device time belongs to the midpoint of the round trip,
+the lowest-RTT pings carry the least error). Slave clocks are only seen one way, through FEEDBACK tRecv, so their
+mapping follows the lower envelope of (host arrival - device time): latencies derived from it are relative to the
+fastest frame seen in each window, which is what jitter and latency spikes need.
+
+Both fits keep the best sample per one second bucket of device time and fit offset + drift by least squares, so
+crystal drift (tens of ppm, ~1 ms per minute) is tracked instead of accumulating.
+"""
+
+import time
+import struct
+from collections import deque
+
+IDX_RECORD = struct.Struct("<QQ")  # byte offset in the .bin, host time ns of the chunk that starts there
+
+_EPOCH_NS: int = time.time_ns()
+_PERF_NS: int = time.perf_counter_ns()
+
+
+def host_time_ns() -> int:
+    """Wall clock in ns with perf_counter resolution: one epoch anchor taken at import, then the monotonic clock."""
+    return _EPOCH_NS + (time.perf_counter_ns() - _PERF_NS)
+
+
+class NodeClock:
+    """Maps one node's micros() onto host ns. roundtrip=True for nodes answering HEARTBEAT."""
+
+    BUCKET_US: int = 1_000_000
+    BUCKETS: int = 32
+
+    def __init__(self, roundtrip: bool):
+        self.roundtrip: bool = roundtrip
+        self._last_raw: int | None = None
+        self._wraps: int = 0
+        # bucket -> (quality, device_us, offset_ns); quality is RTT for round trips, the offset itself for one-way
+        self._best: dict[int, tuple[int, int, int]] = {}
+        self._order: deque[int] = deque()
+        self.offset_ns: float = 0.0  # host_ns = device_us * 1000 + offset_ns + drift * (device_us - ref_us) * 1000
+        self.drift: float = 0.0
+        self.ref_us: int = 0
+        self.rtt_ns: int | None = None
+        self.samples: int = 0
+
+    def unwrap(self, raw_us: int) -> int:
+        last = self._last_raw
+        if last is not None:
+            if raw_us < last and last - raw_us > 0x80000000:
+                self._wraps += 1
+            elif raw_us > last and raw_us - last > 0x80000000:
+                return raw_us + ((self._wraps - 1) << 32)  # a late sample from before the last wrap
+        self._last_raw = raw_us
+        return raw_us + (self._wraps << 32)
+
+    @property
+    def synced(self) -> bool:
+        return bool(self._best)
+
+    def add(self, device_us: int, offset_ns: int, quality: int) -> None:
+        bucket = device_us // self.BUCKET_US
+        best = self._best.get(bucket)
+        if best is None:
+            self._order.append(bucket)
+            if len(self._order) > self.BUCKETS:
+                self._best.pop(self._order.popleft(), None)
+        elif best[0] <= quality:
+            return
+        self._best[bucket] = (quality, device_us, offset_ns)
+        self._fit()
+
+    def _fit(self) -> None:
+        points = [(dev, off) for _, dev, off in self._best.values()]
+        n = len(points)
+        if n < 3:
+            self.ref_us, self.offset_ns = max(points)
+            self.drift = 0.0
+            return
+        mean_x = sum(x for x, _ in points) / n
+        mean_y = sum(y for _, y in points) / n
+        sxx = sum((x - mean_x) ** 2 for x, _ in points)
+        sxy = sum((x - mean_x) * (y - mean_y) for x, y in points)
+        slope = sxy / sxx if sxx else 0.0  # ns of offset change per device µs
+        self.ref_us = int(mean_x)
+        self.offset_ns = mean_y
+        self.drift = slope / 1000.0
+
+    def to_host(self, device_us: int) -> int:
+        """Host ns for an unwrapped device time."""
+        return int(device_us * 1000 + self.offset_ns + self.drift * (device_us - self.ref_us) * 1000)
+
+    def snapshot(self) -> dict:
+        return {
+            "roundtrip": self.roundtrip,
+            "synced": self.synced,
+            "drift_ppm": -self.drift * 1e6,  # positive when the device clock runs fast
+            "rtt_us": self.rtt_ns / 1e3 if self.rtt_ns is not None else None,
+            "samples": self.samples,
+        }
+
+
+class LatencyStats:
+    """Running mean/min/max (Welford) plus RFC 3550 interarrival jitter of one latency series, in µs."""
+
+    __slots__ = ("count", "mean", "_m2", "min", "max", "jitter", "_last")
+
+    def __init__(self):
+        self.count: int = 0
+        self.mean: float = 0.0
+        self._m2: float = 0.0
+        self.min: float = float("inf")
+        self.max: float = float("-inf")
+        self.jitter: float = 0.0
+        self._last: float | None = None
+
+    def add(self, value: float) -> None:
+        self.count += 1
+        delta = value - self.mean
+        self.mean += delta / self.count
+        self._m2 += delta * (value - self.mean)
+        if value < self.min:
+            self.min = value
+        if value > self.max:
+            self.max = value
+        if self._last is not None:
+            self.jitter += (abs(value - self._last) - self.jitter) / 16.0
+        self._last = value
+
+    def snapshot(self) -> dict:
+        if not self.count:
+            return {"count": 0}
+        std = (self._m2 / (self.count - 1)) ** 0.5 if self.count > 1 else 0.0
+        return {
+            "count": self.count,
+            "mean_us": self.mean,
+            "std_us": std,
+            "min_us": self.min,
+            "max_us": self.max,
+            "jitter_us": self.jitter,
+        }
+
+
+class ClockSync:
+    def __init__(self):
+        self.nodes: dict[int, NodeClock] = {}
+        self.latency: dict[int, LatencyStats] = {}  # per axisId, FEEDBACK tRecv -> host arrival
+
+    def node(self, node_id: int, roundtrip: bool = False) -> NodeClock:
+        clock = self.nodes.get(node_id)
+        if clock is None:
+            clock = self.nodes[node_id] = NodeClock(roundtrip)
+        return clock
+
+    def add_roundtrip(self, node_id: int, host_sent_ns: int, device_raw_us: int, host_recv_ns: int) -> None:
+        clock = self.node(node_id, roundtrip=True)
+        clock.roundtrip = True
+        device_us = clock.unwrap(device_raw_us)
+        rtt = host_recv_ns - host_sent_ns
+        clock.rtt_ns = rtt if clock.rtt_ns is None else (clock.rtt_ns * 7 + rtt) // 8
+        clock.samples += 1
+        clock.add(device_us, (host_sent_ns + host_recv_ns) // 2 - device_us * 1000, rtt)
+
+    def add_oneway(self, node_id: int, device_raw_us: int, host_recv_ns: int) -> int:
+        """Feed a one-way device timestamp; returns the unwrapped device time."""
+        clock = self.node(node_id)
+        device_us = clock.unwrap(device_raw_us)
+        if not clock.roundtrip:
+            offset = host_recv_ns - device_us * 1000
+            clock.samples += 1
+            clock.add(device_us, offset, offset)
+        return device_us
+
+    def feedback(self, node_id: int, axisId: int, tRecv: int, host_recv_ns: int) -> int:
+        """Unified host time of a FEEDBACK sample; records the axis transport latency."""
+        device_us = self.add_oneway(node_id, tRecv, host_recv_ns)
+        device_ns = self.nodes[node_id].to_host(device_us)
+        stats = self.latency.get(axisId)
+        if stats is None:
+            stats = self.latency[axisId] = LatencyStats()
+        stats.add((host_recv_ns - device_ns) / 1e3)
+        return device_ns
+
+    def snapshot(self) -> dict:
+        return {
+            "clocks": {f"0x{node:02X}": clock.snapshot() for node, clock in sorted(self.nodes.items())},
+            "latency": {axis: stats.snapshot() for axis, stats in sorted(self.latency.items())},
+        }
+
+
+if __name__ == "__main__":
+    # Self-check: a device 40 ppm fast with 1.2 ms offset and noisy 0.2..2 ms round trips
+    import random
+
+    rng = random.Random(0)
+    sync = ClockSync()
+    true = lambda host_ns: int((host_ns * (1 + 40e-6)) / 1000 + 1200) & 0xFFFFFFFF
+    host = 4_260_000_000_000  # crosses the 32-bit micros() wrap at ~4295 s
+    for i in range(600):
+        host += 100_000_000
+        up, down = rng.uniform(100e3, 1e6), rng.uniform(100e3, 1e6)
+        sync.add_roundtrip(0x00, host, true(host + up), int(host + up + down))
+    clock = sync.nodes[0x00]
+    probe = host + 50_000_000
+    err_us = (clock.to_host(clock.unwrap(true(probe))) - probe) / 1e3
+    print(f"drift {-clock.drift * 1e6:+.1f} ppm (true +40.0), mapping error {err_us:+.1f} µs")
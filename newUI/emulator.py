@@ -0,0 +1,522 @@
+"""
+Teensy master emulator on a pseudo-terminal.
+
+Speaks Hexlink on the slave end of a pty pair the way TeensySrc/MTFW answers on USB serial: commands are
+ACKed from NODE_ID_MASTER (HEARTBEAT with its micros() appended), UPLOAD rows are stored and replayed by a 1 kHz
+motor tick (same feed-rate ramp as motorTick), and the three slave nodes stream FEEDBACK for their two axes each.
+
+    python emulator.py --rate 1000 --jitter-us 200 --ber 1e-6
+    python emulator.py --replay logs/2025-01-01-12-00-00.bin --replay-speed 4
+    python main.py --emulator
+"""
+
+import os
+import tty
+import math
+import time
+import random
+import select
+import struct
+import argparse
+import numpy as np
+from threading import Thread, Event, Lock
+from parser import Parser
+from replay import CaptureReplay
+from Hexlink.commands import (
+    MsgID,
+    msg_bytes,
+    encode_packet,
+    NODE_ID_MASTER,
+    NODE_ID_PC,
+    NODE_ID_SLAVES,
+    STATUS_STRUCT,
+    ACK_TIME_STRUCT,
+    FEEDBACK_STRUCT,
+    STATUS_STREAMING,
+    STATUS_ENDED,
+    STATUS_DRAINED,
+    STATUS_QUEUED,
+    STATUS_PERIOD_MS,
+)
+
+POSITION_CONTROL = 0x95
+KT: float = 0.116670
+GEAR: float = 9.0
+TICK_S: float = 1e-3
+FR_MAX: int = 100
+LPF_STAGES: int = 100
+LPF_A: float = math.exp(-TICK_S / 0.1)  # LPF<100> slider(0.1, 1e-3)
+STREAM_RING_ROWS: int = 16 * 1024 * 1024 // 24  # maxArrayLength, the PSRAM ring streamed rows go through
+
+
+def _quantize(value: float, lo: float, hi: float, bits: int) -> int:
+    top = (1 << bits) - 1
+    return min(top, max(0, round((value - lo) * top / (hi - lo))))
+
+
+def control_reply(position: float, speed: float, torque: float, temperature: int = 30) -> bytes:
+    """MCResPositionControl frame, the inverse of the decode in parser.parse_feedback."""
+    pos = _quantize(position, -12.5, 12.5, 16)
+    spd = _quantize(speed, -65.0, 65.0, 12)
+    trq = _quantize(torque, -225.0 * KT * GEAR, 225.0 * KT * GEAR, 12)
+    return bytes(
+        [
+            POSITION_CONTROL,
+            0x00,  # SUCCESS
+            temperature & 0xFF,
+            pos & 0xFF,
+            pos >> 8,
+            spd >> 4,
+            ((spd & 0x0F) << 4) | (trq >> 8),
+            trq & 0xFF,
+        ]
+    )
+
+
+class EmulatedAxis:
+    """First order position loop standing in for one motor behind a slave Teensy."""
+
+    __slots__ = ("axisId", "setPoint", "position", "speed", "torque")
+
+    TAU_S: float = 0.02
+    STIFFNESS: float = 20.0  # N·m per rad of tracking error
+
+    def __init__(self, axisId: int):
+        self.axisId: int = axisId
+        self.setPoint: float = 0.0
+        self.position: float = 0.0
+        self.speed: float = 0.0
+        self.torque: float = 0.0
+
+    def step(self, dt: float) -> None:
+        error = self.setPoint - self.position
+        self.speed = max(-65.0, min(65.0, error / self.TAU_S))
+        self.position += self.speed * dt
+        self.torque = max(-200.0, min(200.0, self.STIFFNESS * error))
+
+
+class TeensyEmulator:
+    """
+    rate_hz   : FEEDBACK frames per second per axis (the real slaves answer every CAN reply, ~1 kHz)
+    jitter_us : uniform random delay added to every feedback burst
+    ber       : bit error rate applied to every byte written to the host
+    """
+
+    def __init__(self, rate_hz: float = 1000.0, jitter_us: float = 0.0, ber: float = 0.0, seed: int | None = None):
+        self.rate_hz: float = rate_hz
+        self.jitter_us: float = jitter_us
+        self.ber: float = ber
+        self.rng: random.Random = random.Random(seed)
+        self.port: str = ""
+        self.master_fd: int = -1
+        self.slave_fd: int = -1
+        self.stopEvent: Event = Event()
+        self.writeLock: Lock = Lock()
+        self.parser: Parser = Parser(callback=self.onPacketReceived)
+        self.buffer: bytearray = bytearray()
+        self.threads: list[Thread] = []
+
+        # firmware state, names as in MTFW globals.h
+        self.rows: np.ndarray = np.zeros((0, 6), dtype=np.float32)
+        self.moveData: np.ndarray = np.zeros(6, dtype=np.float32)
+        self.readIndex: int = 0
+        self.feedRate: int = 0
+        self.frRemainder: int = 0
+        self.doPlay: bool = False
+        self.hasData: bool = False
+        self.connected: bool = False
+        self.armed: bool = False
+        self._lpf: list[float] = [0.0] * LPF_STAGES
+        self.queued: np.ndarray | None = None  # QUEUE rows waiting behind self.rows
+        self.dataTag: tuple[int, int] | None = None  # HAVE (crc, rows) of the last upload, and its rows
+        self.taggedRows: np.ndarray | None = None
+        self.pendingTag: tuple[int, int] | None = None
+        self.queueSwitches: int = 0
+        self.streamRing: np.ndarray | None = None  # allocated by the first STREAM
+        self.endStream()
+
+        # every Teensy runs its own crystal: (micros() offset, drift in ppm) per node
+        self.clocks: dict[int, tuple[float, float]] = {
+            node: (self.rng.uniform(0, 2**32), self.rng.uniform(-50, 50)) for node in (NODE_ID_MASTER, *NODE_ID_SLAVES)
+        }
+        self.axes: list[EmulatedAxis] = [EmulatedAxis(i) for i in range(1, 7)]
+        self.feedbackCounter: dict[int, int] = {node: 0 for node in NODE_ID_SLAVES}
+        self.stats: dict[str, int] = {"rx_frames": 0, "tx_bytes": 0, "feedback": 0, "flipped_bits": 0}
+
+    # ---- pty ----
+    def open(self) -> str:
+        """Create the pty pair and start the reader and motor threads. Returns the device path for pyserial."""
+        self.master_fd, self.slave_fd = os.openpty()
+        tty.setraw(self.master_fd)
+        tty.setraw(self.slave_fd)
+        # with no host reading, a blocking write would hang the motor thread once the pty buffer fills
+        os.set_blocking(self.master_fd, False)
+        # the slave fd stays open so the master does not see EIO between host connections
+        self.port = os.ttyname(self.slave_fd)
+        self.stopEvent.clear()
+        self.threads = [
+            Thread(target=self.readLoop, name="EmulatorReader", daemon=True),
+            Thread(target=self.motorLoop, name="EmulatorMotor", daemon=True),
+        ]
+        for thread in self.threads:
+            thread.start()
+        return self.port
+
+    def close(self) -> None:
+        self.stopEvent.set()
+        for thread in self.threads:
+            thread.join()
+        for fd in (self.master_fd, self.slave_fd):
+            if fd >= 0:
+                os.close(fd)
+        self.master_fd = self.slave_fd = -1
+
+    def replayCapture(self, path: str, speed: float = 1.0) -> None:
+        """Stream a recorded capture to the host once it connects, in place of the synthetic FEEDBACK."""
+        self.rate_hz = 0.0
+        thread = Thread(target=self.replayLoop, args=(CaptureReplay(path, speed, aligned=True),), name="EmulatorReplay", daemon=True)
+        self.threads.append(thread)
+        thread.start()
+
+    def replayLoop(self, capture: CaptureReplay) -> None:
+        while not self.connected:
+            if self.stopEvent.wait(0.05):
+                return
+        stats = capture.run(lambda t_ns, data: self.write(data), self.stopEvent)
+        self.logInfo(f"Replay of {os.path.basename(capture.path)} done: {stats['bytes']} bytes in {stats['elapsed_s']:.2f} s")
+
+    def readLoop(self) -> None:
+        while not self.stopEvent.is_set():
+            ready, _, _ = select.select([self.master_fd], [], [], 0.05)
+            if not ready:
+                continue
+            try:
+                data = os.read(self.master_fd, 65536)
+            except OSError as e:
+                print(f"[readLoop] : {e}")
+                continue
+            self.buffer.extend(data)
+            self.parser.parse(self.buffer)
+
+    def write(self, data: bytes | bytearray) -> None:
+        if self.ber > 0:
+            data = self.corrupt(data)
+        with self.writeLock:
+            view = memoryview(data)
+            while view:
+                try:
+                    n = os.write(self.master_fd, view)
+                except BlockingIOError:
+                    if self.stopEvent.is_set():  # nobody will drain the pty any more
+                        return
+                    select.select([], [self.master_fd], [], 0.05)
+                    continue
+                except OSError as e:
+                    print(f"[write] : {e}")
+                    return
+                view = view[n:]
+            self.stats["tx_bytes"] += len(data)
+
+    def corrupt(self, data: bytes | bytearray) -> bytearray:
+        """Flip each bit independently with probability ber."""
+        out = bytearray(data)
+        bits = len(out) * 8
+        # geometric gaps between flipped bits, so clean bytes cost nothing
+        log_q = math.log1p(-min(self.ber, 1.0 - 1e-12))
+        i = -1
+        while True:
+            i += 1 + int(math.log(1.0 - self.rng.random()) / log_q)
+            if i >= bits:
+                break
+            out[i >> 3] ^= 1 << (i & 7)
+            self.stats["flipped_bits"] += 1
+        return out
+
+    # ---- replies, NODE_ID_MASTER -> NODE_ID_PC ----
+    def send(self, seq: int, msg: MsgID, payload: bytes = b"", from_id: int = NODE_ID_MASTER) -> None:
+        self.write(encode_packet(seq, msg_bytes[msg], payload, from_id=from_id, to_id=NODE_ID_PC))
+
+    def ack(self, seq: int, msg: MsgID) -> None:
+        self.send(seq, MsgID.ACK, msg_bytes[msg])
+
+    def nak(self, seq: int, msg: MsgID) -> None:
+        self.send(seq, MsgID.NAK, msg_bytes[msg])
+
+    def micros(self, node: int) -> int:
+        offset, ppm = self.clocks[node]
+        return int(time.perf_counter() * 1e6 * (1 + ppm * 1e-6) + offset) & 0xFFFFFFFF
+
+    def logInfo(self, text: str) -> None:
+        self.send(int(time.monotonic() * 1000) & 0xFFFFFFFF, MsgID.INFO, text.encode("utf-8") + b"\x00")
+
+    def onPacketReceived(self, frames: list[dict]) -> None:
+        """Mirror of MTFW main.cpp onPacketReceived. ENABLE and DISABLE are ACKed here too, the host FSM needs them."""
+        for frame in frames:
+            self.stats["rx_frames"] += 1
+            seq = frame["sequence"]
+            match frame["msg_id"]:
+                case "HEARTBEAT":
+                    self.send(seq, MsgID.ACK, ACK_TIME_STRUCT.pack(MsgID.HEARTBEAT, self.micros(NODE_ID_MASTER)))
+                case "ENABLE":
+                    self.ack(seq, MsgID.ENABLE)
+                    self.armed = True
+                case "PLAY":
+                    self.ack(seq, MsgID.PLAY)
+                    self.doPlay = True
+                    self.feedRate = 100
+                case "PAUSE":
+                    self.ack(seq, MsgID.PAUSE)
+                    self.doPlay = False
+                    self.feedRate = 0
+                case "STOP":
+                    self.ack(seq, MsgID.STOP)
+                    self.endStream()
+                    self.queued = None
+                    self.doPlay = False
+                    self.feedRate = 0
+                case "DISABLE":
+                    self.ack(seq, MsgID.DISABLE)
+                    self.armed = False
+                    self.doPlay = False
+                    self.feedRate = 0
+                case "UPLOAD" | "PACKED":
+                    self.dataTag = None
+                    if frame["payload"] is None:  # MTFW Packed.h rejects a malformed PACKED the same way
+                        self.nak(seq, MsgID.UPLOAD)
+                        continue
+                    rows = np.array(frame["payload"], dtype=np.float32)
+                    if self.pendingTag is not None and self.pendingTag[1] == len(rows):  # MTFW adoptTag
+                        self.dataTag, self.taggedRows = self.pendingTag, rows
+                    self.pendingTag = None
+                    self.uploadDone(seq, rows)
+                case "HAVE":
+                    query = (frame["payload"]["crc"], frame["payload"]["rows"])
+                    if self.dataTag == query and query[1] > 0 and not self.streamMode:
+                        self.uploadDone(seq, self.taggedRows)
+                    else:
+                        self.pendingTag = query
+                        self.nak(seq, MsgID.HAVE)
+                case "RESET":
+                    self.reboot(seq)
+                case "QUIT":
+                    self.ack(seq, MsgID.QUIT)
+                    self.endStream()
+                    self.queued = None
+                    self.hasData = False
+                    self.doPlay = False
+                    self.feedRate = 0
+                case "CONNECT":
+                    self.ack(seq, MsgID.CONNECT)
+                    self.connected = True
+                case "DISCONNECT":
+                    self.ack(seq, MsgID.DISCONNECT)
+                    self.connected = False
+                case "MOVE":
+                    self.ack(seq, MsgID.MOVE)
+                    self.moveData = np.array(frame["payload"][0], dtype=np.float32)
+                    self.setTargets(self.moveData)
+                case "QUEUE":
+                    rows = np.array(frame["payload"], dtype=np.float32)
+                    self.queued = None
+                    # MTFW placeQueue: the queued rows must fit in PSRAM next to the active ones
+                    fits = 0 < len(rows) and len(self.rows) + len(rows) <= STREAM_RING_ROWS
+                    if not fits or not self.hasData or self.streamMode:
+                        self.nak(seq, MsgID.QUEUE)
+                    else:
+                        self.queued = rows
+                        self.ack(seq, MsgID.QUEUE)
+                case "STREAM":
+                    self.receiveStream(seq, frame["payload"]["firstRow"], frame["payload"]["rows"])
+                case "FEEDBACK":
+                    self.logInfo("FEEDBACK\n")
+                case _:
+                    pass
+
+    def reboot(self, seq: int) -> None:
+        self.logInfo("Rebooting in...\n")
+        for i in range(5, 0, -1):
+            self.logInfo(f"{i}... \n")
+        self.logInfo("Rebooting in 1 Second\n")
+        self.ack(seq, MsgID.RESET)
+        self.endStream()
+        self.queued = None
+        self.dataTag = self.pendingTag = None
+        self.hasData = self.doPlay = self.connected = self.armed = False
+        self.feedRate = 0
+        self.rows = np.zeros((0, 6), dtype=np.float32)
+
+    def uploadDone(self, seq: int, rows: np.ndarray) -> None:
+        """MTFW main.cpp uploadDone: UPLOAD, PACKED or a HAVE hit."""
+        self.ack(seq, MsgID.UPLOAD)
+        self.endStream()
+        self.queued = None
+        self.rows = rows
+        self.readIndex = 0
+        if len(self.rows):
+            self.moveData = self.rows[0].copy()
+            self.setTargets(self.moveData)
+        self.hasData = len(self.rows) > 0
+
+    def endStream(self) -> None:
+        self.streamMode = self.streamEnded = self.streamDrained = False
+        self.streamWrite = self.streamRead = self.streamUnderruns = 0
+
+    def status(self, seq: int) -> None:
+        flags = (
+            (STATUS_STREAMING if self.streamMode else 0)
+            | (STATUS_ENDED if self.streamEnded else 0)
+            | (STATUS_DRAINED if self.streamDrained else 0)
+            | (STATUS_QUEUED if self.queued is not None else 0)
+        )
+        if self.streamMode:
+            payload = STATUS_STRUCT.pack(self.streamRead, self.streamWrite, self.streamUnderruns, flags)
+        else:
+            payload = STATUS_STRUCT.pack(self.readIndex, len(self.rows), self.queueSwitches, flags)
+        self.send(seq, MsgID.STATUS, payload)
+
+    def receiveStream(self, seq: int, firstRow: int, rows: np.ndarray) -> None:
+        """MTFW main.cpp STREAM: rows are committed only when they continue the stream, then STATUS answers."""
+        if not self.streamMode:
+            self.streamMode = True
+            self.hasData = False
+            self.queued = None
+            self.dataTag = None
+            if self.streamRing is None:
+                self.streamRing = np.zeros((STREAM_RING_ROWS, 6), dtype=np.float32)
+        if firstRow == self.streamWrite:
+            if len(rows) == 0:
+                self.streamEnded = True
+            slots = (self.streamWrite + np.arange(len(rows))) % STREAM_RING_ROWS
+            self.streamRing[slots] = rows
+            self.streamWrite += len(rows)
+            if self.streamWrite > 0 and not self.hasData:
+                self.moveData = self.streamRing[0].copy()
+                self.setTargets(self.moveData)
+                self.hasData = True
+        self.status(seq)
+
+    def streamTick(self, deltaIndex: int) -> None:
+        """MTFW imports.h streamTick: hold the last row on underrun, stop once an ended stream drains."""
+        nxt = self.streamRead + deltaIndex
+        if nxt >= self.streamWrite:
+            if self.streamEnded:
+                self.streamDrained = True
+                self.doPlay = False
+                self.feedRate = 0
+            elif deltaIndex:
+                self.streamUnderruns += 1
+            nxt = self.streamWrite - 1 if self.streamWrite else 0
+        self.streamRead = nxt
+        if not self.doPlay or not self.hasData:
+            return
+        self.moveData = self.streamRing[self.streamRead % STREAM_RING_ROWS]
+        self.setTargets(self.moveData)
+
+    def setTargets(self, row: np.ndarray) -> None:
+        if not self.armed:
+            return
+        for axis, value in zip(self.axes, row.tolist()):
+            axis.setPoint = value
+
+    # ---- 1 kHz motor tick and feedback ----
+    def motorTick(self) -> None:
+        """Same feed-rate ramp and row stepping as MTFW imports.h motorTick."""
+        v = float(self.feedRate)
+        lpf = self._lpf
+        for k in range(LPF_STAGES):
+            lpf[k] = LPF_A * lpf[k] + (1.0 - LPF_A) * v
+            v = lpf[k]
+        self.frRemainder += int(v)
+        deltaIndex = self.frRemainder // FR_MAX
+        self.frRemainder %= FR_MAX
+        if self.streamMode:
+            self.streamTick(deltaIndex)
+            return
+        nxt = self.readIndex + deltaIndex
+        if nxt >= len(self.rows) and self.queued is not None:
+            # gapless: carry the overshoot into the queued trajectory, MTFW loop() reports the switch
+            nxt -= len(self.rows)
+            self.rows, self.queued = self.queued, None
+            self.queueSwitches += 1
+            self.status(self.queueSwitches)
+        if len(self.rows):
+            self.readIndex = nxt % len(self.rows)
+        if not self.doPlay or not self.hasData:
+            return
+        self.moveData = self.rows[self.readIndex]
+        self.setTargets(self.moveData)
+
+    def feedbackBurst(self) -> bytearray:
+        """One FEEDBACK frame per axis, sequenced per slave node like STFW sendFeedback."""
+        out = bytearray()
+        for axis in self.axes:
+            node = NODE_ID_SLAVES[(axis.axisId - 1) // 2]
+            tRecv = self.micros(node)
+            tSend = (tRecv - 180 - self.rng.randrange(40)) & 0xFFFFFFFF
+            payload = FEEDBACK_STRUCT.pack(
+                axis.axisId,
+                1,
+                self.armed,
+                True,
+                axis.setPoint,
+                tSend,
+                tRecv,
+                struct.pack("<Bf", POSITION_CONTROL, axis.setPoint) + b"\x00\x00\x00",
+                control_reply(axis.position, axis.speed, axis.torque),
+            )
+            seq = self.feedbackCounter[node]
+            self.feedbackCounter[node] = (seq + 1) & 0xFFFFFFFF
+            out += encode_packet(seq, msg_bytes[MsgID.FEEDBACK], payload, from_id=node, to_id=NODE_ID_PC)
+        self.stats["feedback"] += len(self.axes)
+        return out
+
+    def motorLoop(self) -> None:
+        """Runs motorTick on a fixed 1 ms grid and emits feedback at rate_hz, catching up after late wakeups."""
+        start = time.perf_counter()
+        ticks = 0
+        bursts = 0
+        while not self.stopEvent.is_set():
+            now = time.perf_counter()
+            due = int((now - start) / TICK_S)
+            while ticks < due:
+                self.motorTick()
+                for axis in self.axes:
+                    axis.step(TICK_S)
+                ticks += 1
+                if self.streamMode and self.connected and ticks % STATUS_PERIOD_MS == 0:
+                    self.status(ticks)
+            if self.connected and self.rate_hz > 0:
+                burstsDue = int((now - start) * self.rate_hz)
+                if burstsDue > bursts:
+                    if self.jitter_us > 0:
+                        time.sleep(self.rng.uniform(0, self.jitter_us) * 1e-6)
+                    self.write(self.feedbackBurst())
+                bursts = max(bursts, burstsDue)
+            nextTick = start + (ticks + 1) * TICK_S
+            delay = nextTick - time.perf_counter()
+            if delay > 0:
+                time.sleep(delay)
+
+
+if __name__ == "__main__":
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--rate", type=float, default=1000.0, help="FEEDBACK frames per second per axis")
+    ap.add_argument("--jitter-us", type=float, default=0.0)
+    ap.add_argument("--ber", type=float, default=0.0, help="bit error rate on the emulator -> host direction")
+    ap.add_argument("--seed", type=int, default=None)
+    ap.add_argument("--replay", default=None, help="stream this logs/*.bin capture instead of synthetic feedback")
+    ap.add_argument("--replay-speed", type=float, default=1.0, help="1 for real time, N for N times faster, 0 for max")
+    args = ap.parse_args()
+
+    emulator = TeensyEmulator(rate_hz=args.rate, jitter_us=args.jitter_us, ber=args.ber, seed=args.seed)
+    print(f"Teensy emulator on {emulator.open()}")
+    if args.replay:
+        emulator.replayCapture(args.replay, args.replay_speed)
+    try:
+        while True:
+            time.sleep(5)
+            print(f"[emulator] : {emulator.stats}")
+    except KeyboardInterrupt:
+        pass
+    finally:
+        emulator.close()
@@ -5,8 +5,7 @@
 #include <stdint.h>
 
 // ====== Enums ======
-enum class State : uint8_t 
-{
+enum class State : uint8_t {
   IDLE,
   DISCONNECTED,
   CONNECTED,
@@ -14,72 +13,29 @@ enum class State : uint8_t
   STOPPED,
   PLAYING,
   PAUSED,
-  ERROR
+  ERROR,
+  QUEUED,
+  PAUSED_QUEUED
 };
 
-enum class Event : uint8_t 
-{
-  IDLE_TO_DISCONNECTED,
-  IDLE_TO_CONNECTED,
-  IDLE_TO_READY,
-  IDLE_TO_STOPPED,
-  IDLE_TO_PLAYING,
-  IDLE_TO_PAUSED,
-  IDLE_TO_ERROR,
-  DISCONNECTED_TO_IDLE,
-  DISCONNECTED_TO_CONNECTED,
-  DISCONNECTED_TO_READY,
-  DISCONNECTED_TO_STOPPED,
-  DISCONNECTED_TO_PLAYING,
-  DISCONNECTED_TO_PAUSED,
-  DISCONNECTED_TO_ERROR,
-  CONNECTED_TO_IDLE,
-  CONNECTED_TO_DISCONNECTED,
-  CONNECTED_TO_READY,
-  CONNECTED_TO_STOPPED,
-  CONNECTED_TO_PLAYING,
-  CONNECTED_TO_PAUSED,
-  CONNECTED_TO_ERROR,
-  READY_TO_IDLE,
-  READY_TO_DISCONNECTED,
-  READY_TO_CONNECTED,
-  READY_TO_STOPPED,
-  READY_TO_PLAYING,
-  READY_TO_PAUSED,
-  READY_TO_ERROR,
-  STOPPED_TO_IDLE,
-  STOPPED_TO_DISCONNECTED,
-  STOPPED_TO_CONNECTED,
-  STOPPED_TO_READY,
-  STOPPED_TO_PLAYING,
-  STOPPED_TO_PAUSED,
-  STOPPED_TO_ERROR,
-  PLAYING_TO_IDLE,
-  PLAYING_TO_DISCONNECTED,
-  PLAYING_TO_CONNECTED,
-  PLAYING_TO_READY,
-  PLAYING_TO_STOPPED,
-  PLAYING_TO_PAUSED,
-  PLAYING_TO_ERROR,
-  PAUSED_TO_IDLE,
-  PAUSED_TO_DISCONNECTED,
-  PAUSED_TO_CONNECTED,
-  PAUSED_TO_READY,
-  PAUSED_TO_STOPPED,
-  PAUSED_TO_PLAYING,
-  PAUSED_TO_ERROR,
-  ERROR_TO_IDLE,
-  ERROR_TO_DISCONNECTED,
-  ERROR_TO_CONNECTED,
-  ERROR_TO_READY,
-  ERROR_TO_STOPPED,
-  ERROR_TO_PLAYING,
-  ERROR_TO_PAUSED
+enum class Event : uint8_t {
+  PORTSELECT,
+  QUIT,
+  DISCONNECT,
+  CONNECT,
+  RESET,
+  ENABLE,
+  DISABLE,
+  PLAY,
+  UPLOAD,
+  PAUSE,
+  STOP,
+  QUEUE,
+  NEXT
 };
 
 // ====== Name tables ======
-static constexpr const char* STATE_NAMES[] = 
-{
+static constexpr const char* STATE_NAMES[] = {
   "IDLE",
   "DISCONNECTED",
   "CONNECTED",
@@ -88,130 +44,116 @@ static constexpr const char* STATE_NAMES[] =
   "PLAYING",
   "PAUSED",
   "ERROR",
+  "QUEUED",
+  "PAUSED_QUEUED",
 };
-
-static constexpr const char* EVENT_NAMES[] = 
-{
-  "IDLE_TO_DISCONNECTED",
-  "IDLE_TO_CONNECTED",
-  "IDLE_TO_READY",
-  "IDLE_TO_STOPPED",
-  "IDLE_TO_PLAYING",
-  "IDLE_TO_PAUSED",
-  "IDLE_TO_ERROR",
-  "DISCONNECTED_TO_IDLE",
-  "DISCONNECTED_TO_CONNECTED",
-  "DISCONNECTED_TO_READY",
-  "DISCONNECTED_TO_STOPPED",
-  "DISCONNECTED_TO_PLAYING",
-  "DISCONNECTED_TO_PAUSED",
-  "DISCONNECTED_TO_ERROR",
-  "CONNECTED_TO_IDLE",
-  "CONNECTED_TO_DISCONNECTED",
-  "CONNECTED_TO_READY",
-  "CONNECTED_TO_STOPPED",
-  "CONNECTED_TO_PLAYING",
-  "CONNECTED_TO_PAUSED",
-  "CONNECTED_TO_ERROR",
-  "READY_TO_IDLE",
-  "READY_TO_DISCONNECTED",
-  "READY_TO_CONNECTED",
-  "READY_TO_STOPPED",
-  "READY_TO_PLAYING",
-  "READY_TO_PAUSED",
-  "READY_TO_ERROR",
-  "STOPPED_TO_IDLE",
-  "STOPPED_TO_DISCONNECTED",
-  "STOPPED_TO_CONNECTED",
-  "STOPPED_TO_READY",
-  "STOPPED_TO_PLAYING",
-  "STOPPED_TO_PAUSED",
-  "STOPPED_TO_ERROR",
-  "PLAYING_TO_IDLE",
-  "PLAYING_TO_DISCONNECTED",
-  "PLAYING_TO_CONNECTED",
-  "PLAYING_TO_READY",
-  "PLAYING_TO_STOPPED",
-  "PLAYING_TO_PAUSED",
-  "PLAYING_TO_ERROR",
-  "PAUSED_TO_IDLE",
-  "PAUSED_TO_DISCONNECTED",
-  "PAUSED_TO_CONNECTED",
-  "PAUSED_TO_READY",
-  "PAUSED_TO_STOPPED",
-  "PAUSED_TO_PLAYING",
-  "PAUSED_TO_ERROR",
-  "ERROR_TO_IDLE",
-  "ERROR_TO_DISCONNECTED",
-  "ERROR_TO_CONNECTED",
-  "ERROR_TO_READY",
-  "ERROR_TO_STOPPED",
-  "ERROR_TO_PLAYING",
-  "ERROR_TO_PAUSED",
+static constexpr const char* EVENT_NAMES[] = {
+  "PORTSELECT",
+  "QUIT",
+  "DISCONNECT",
+  "CONNECT",
+  "RESET",
+  "ENABLE",
+  "DISABLE",
+  "PLAY",
+  "UPLOAD",
+  "PAUSE",
+  "STOP",
+  "QUEUE",
+  "NEXT",
 };
 inline const char* fsm_state_name(State s) { return STATE_NAMES[(uint8_t)s]; }
 inline const char* fsm_event_name(Event e) { return EVENT_NAMES[(uint8_t)e]; }
 
 // ====== Transition table ======
 struct Transition { State src; Event evt; State dst; };
-static constexpr Transition TRANSITIONS[56] = 
-{
-  { State::IDLE, Event::IDLE_TO_DISCONNECTED, State::DISCONNECTED },
-  { State::IDLE, Event::IDLE_TO_CONNECTED, State::CONNECTED },
-  { State::IDLE, Event::IDLE_TO_READY, State::READY },
-  { State::IDLE, Event::IDLE_TO_STOPPED, State::STOPPED },
-  { State::IDLE, Event::IDLE_TO_PLAYING, State::PLAYING },
-  { State::IDLE, Event::IDLE_TO_PAUSED, State::PAUSED },
-  { State::IDLE, Event::IDLE_TO_ERROR, State::ERROR },
-  { State::DISCONNECTED, Event::DISCONNECTED_TO_IDLE, State::IDLE },
-  { State::DISCONNECTED, Event::DISCONNECTED_TO_CONNECTED, State::CONNECTED },
-  { State::DISCONNECTED, Event::DISCONNECTED_TO_READY, State::READY },
-  { State::DISCONNECTED, Event::DISCONNECTED_TO_STOPPED, State::STOPPED },
-  { State::DISCONNECTED, Event::DISCONNECTED_TO_PLAYING, State::PLAYING },
-  { State::DISCONNECTED, Event::DISCONNECTED_TO_PAUSED, State::PAUSED },
-  { State::DISCONNECTED, Event::DISCONNECTED_TO_ERROR, State::ERROR },
-  { State::CONNECTED, Event::CONNECTED_TO_IDLE, State::IDLE },
-  { State::CONNECTED, Event::CONNECTED_TO_DISCONNECTED, State::DISCONNECTED },
-  { State::CONNECTED, Event::CONNECTED_TO_READY, State::READY },
-  { State::CONNECTED, Event::CONNECTED_TO_STOPPED, State::STOPPED },
-  { State::CONNECTED, Event::CONNECTED_TO_PLAYING, State::PLAYING },
-  { State::CONNECTED, Event::CONNECTED_TO_PAUSED, State::PAUSED },
-  { State::CONNECTED, Event::CONNECTED_TO_ERROR, State::ERROR },
-  { State::READY, Event::READY_TO_IDLE, State::IDLE },
-  { State::READY, Event::READY_TO_DISCONNECTED, State::DISCONNECTED },
-  { State::READY, Event::READY_TO_CONNECTED, State::CONNECTED },
-  { State::READY, Event::READY_TO_STOPPED, State::STOPPED },
-  { State::READY, Event::READY_TO_PLAYING, State::PLAYING },
-  { State::READY, Event::READY_TO_PAUSED, State::PAUSED },
-  { State::READY, Event::READY_TO_ERROR, State::ERROR },
-  { State::STOPPED, Event::STOPPED_TO_IDLE, State::IDLE },
-  { State::STOPPED, Event::STOPPED_TO_DISCONNECTED, State::DISCONNECTED },
-  { State::STOPPED, Event::STOPPED_TO_CONNECTED, State::CONNECTED },
-  { State::STOPPED, Event::STOPPED_TO_READY, State::READY },
-  { State::STOPPED, Event::STOPPED_TO_PLAYING, State::PLAYING },
-  { State::STOPPED, Event::STOPPED_TO_PAUSED, State::PAUSED },
-  { State::STOPPED, Event::STOPPED_TO_ERROR, State::ERROR },
-  { State::PLAYING, Event::PLAYING_TO_IDLE, State::IDLE },
-  { State::PLAYING, Event::PLAYING_TO_DISCONNECTED, State::DISCONNECTED },
-  { State::PLAYING, Event::PLAYING_TO_CONNECTED, State::CONNECTED },
-  { State::PLAYING, Event::PLAYING_TO_READY, State::READY },
-  { State::PLAYING, Event::PLAYING_TO_STOPPED, State::STOPPED },
-  { State::PLAYING, Event::PLAYING_TO_PAUSED, State::PAUSED },
-  { State::PLAYING, Event::PLAYING_TO_ERROR, State::ERROR },
-  { State::PAUSED, Event::PAUSED_TO_IDLE, State::IDLE },
-  { State::PAUSED, Event::PAUSED_TO_DISCONNECTED, State::DISCONNECTED },
-  { State::PAUSED, Event::PAUSED_TO_CONNECTED, State::CONNECTED },
-  { State::PAUSED, Event::PAUSED_TO_READY, State::READY },
-  { State::PAUSED, Event::PAUSED_TO_STOPPED, State::STOPPED },
-  { State::PAUSED, Event::PAUSED_TO_PLAYING, State::PLAYING },
-  { State::PAUSED, Event::PAUSED_TO_ERROR, State::ERROR },
-  { State::ERROR, Event::ERROR_TO_IDLE, State::IDLE },
-  { State::ERROR, Event::ERROR_TO_DISCONNECTED, State::DISCONNECTED },
-  { State::ERROR, Event::ERROR_TO_CONNECTED, State::CONNECTED },
-  { State::ERROR, Event::ERROR_TO_READY, State::READY },
-  { State::ERROR, Event::ERROR_TO_STOPPED, State::STOPPED },
-  { State::ERROR, Event::ERROR_TO_PLAYING, State::PLAYING },
-  { State::ERROR, Event::ERROR_TO_PAUSED, State::PAUSED },
+static constexpr Transition TRANSITIONS[54] = {
+  { State::IDLE, Event::PORTSELECT, State::DISCONNECTED },
+  { State::IDLE, Event::QUIT, State::IDLE },
+  { State::DISCONNECTED, Event::PORTSELECT, State::DISCONNECTED },
+  { State::DISCONNECTED, Event::DISCONNECT, State::DISCONNECTED },
+  { State::DISCONNECTED, Event::CONNECT, State::CONNECTED },
+  { State::DISCONNECTED, Event::QUIT, State::IDLE },
+  { State::CONNECTED, Event::DISCONNECT, State::DISCONNECTED },
+  { State::CONNECTED, Event::RESET, State::DISCONNECTED },
+  { State::CONNECTED, Event::ENABLE, State::STOPPED },
+  { State::CONNECTED, Event::DISABLE, State::ERROR },
+  { State::CONNECTED, Event::QUIT, State::IDLE },
+  { State::READY, Event::DISCONNECT, State::DISCONNECTED },
+  { State::READY, Event::RESET, State::DISCONNECTED },
+  { State::READY, Event::PLAY, State::PLAYING },
+  { State::READY, Event::DISABLE, State::ERROR },
+  { State::READY, Event::QUIT, State::IDLE },
+  { State::STOPPED, Event::DISCONNECT, State::DISCONNECTED },
+  { State::STOPPED, Event::RESET, State::DISCONNECTED },
+  { State::STOPPED, Event::UPLOAD, State::READY },
+  { State::STOPPED, Event::DISABLE, State::ERROR },
+  { State::STOPPED, Event::QUIT, State::IDLE },
+  { State::PLAYING, Event::DISCONNECT, State::DISCONNECTED },
+  { State::PLAYING, Event::RESET, State::DISCONNECTED },
+  { State::PLAYING, Event::PAUSE, State::PAUSED },
+  { State::PLAYING, Event::STOP, State::STOPPED },
+  { State::PLAYING, Event::QUEUE, State::QUEUED },
+  { State::PLAYING, Event::DISABLE, State::ERROR },
+  { State::PLAYING, Event::QUIT, State::IDLE },
+  { State::PAUSED, Event::DISCONNECT, State::DISCONNECTED },
+  { State::PAUSED, Event::RESET, State::DISCONNECTED },
+  { State::PAUSED, Event::PLAY, State::PLAYING },
+  { State::PAUSED, Event::STOP, State::STOPPED },
+  { State::PAUSED, Event::DISABLE, State::ERROR },
+  { State::PAUSED, Event::QUIT, State::IDLE },
+  { State::ERROR, Event::DISCONNECT, State::DISCONNECTED },
+  { State::ERROR, Event::RESET, State::DISCONNECTED },
+  { State::ERROR, Event::DISABLE, State::ERROR },
+  { State::ERROR, Event::QUIT, State::IDLE },
+  { State::QUEUED, Event::DISCONNECT, State::DISCONNECTED },
+  { State::QUEUED, Event::RESET, State::DISCONNECTED },
+  { State::QUEUED, Event::QUEUE, State::QUEUED },
+  { State::QUEUED, Event::NEXT, State::PLAYING },
+  { State::QUEUED, Event::PAUSE, State::PAUSED_QUEUED },
+  { State::QUEUED, Event::STOP, State::STOPPED },
+  { State::QUEUED, Event::DISABLE, State::ERROR },
+  { State::QUEUED, Event::QUIT, State::IDLE },
+  { State::PAUSED_QUEUED, Event::DISCONNECT, State::DISCONNECTED },
+  { State::PAUSED_QUEUED, Event::RESET, State::DISCONNECTED },
+  { State::PAUSED_QUEUED, Event::PLAY, State::QUEUED },
+  { State::PAUSED_QUEUED, Event::QUEUE, State::PAUSED_QUEUED },
+  { State::PAUSED_QUEUED, Event::NEXT, State::PAUSED },
+  { State::PAUSED_QUEUED, Event::STOP, State::STOPPED },
+  { State::PAUSED_QUEUED, Event::DISABLE, State::ERROR },
+  { State::PAUSED_QUEUED, Event::QUIT, State::IDLE },
+};
+
+// ====== Lookup tables ======
+static constexpr uint8_t STATE_COUNT = 10;
+static constexpr uint8_t EVENT_COUNT = 13;
+static constexpr uint8_t FSM_INVALID = 0xFF;  // no transition
+// NEXT_STATE[state][event]: the destination state, or FSM_INVALID
+static constexpr uint8_t NEXT_STATE[STATE_COUNT][EVENT_COUNT] = {
+  { 1, 0, FSM_INVALID, FSM_INVALID, FSM_INVALID, FSM_INVALID, FSM_INVALID, FSM_INVALID, FSM_INVALID, FSM_INVALID, FSM_INVALID, FSM_INVALID, FSM_INVALID },  // IDLE
+  { 1, 0, 1, 2, FSM_INVALID, FSM_INVALID, FSM_INVALID, FSM_INVALID, FSM_INVALID, FSM_INVALID, FSM_INVALID, FSM_INVALID, FSM_INVALID },  // DISCONNECTED
+  { FSM_INVALID, 0, 1, FSM_INVALID, 1, 4, 7, FSM_INVALID, FSM_INVALID, FSM_INVALID, FSM_INVALID, FSM_INVALID, FSM_INVALID },  // CONNECTED
+  { FSM_INVALID, 0, 1, FSM_INVALID, 1, FSM_INVALID, 7, 5, FSM_INVALID, FSM_INVALID, FSM_INVALID, FSM_INVALID, FSM_INVALID },  // READY
+  { FSM_INVALID, 0, 1, FSM_INVALID, 1, FSM_INVALID, 7, FSM_INVALID, 3, FSM_INVALID, FSM_INVALID, FSM_INVALID, FSM_INVALID },  // STOPPED
+  { FSM_INVALID, 0, 1, FSM_INVALID, 1, FSM_INVALID, 7, FSM_INVALID, FSM_INVALID, 6, 4, 8, FSM_INVALID },  // PLAYING
+  { FSM_INVALID, 0, 1, FSM_INVALID, 1, FSM_INVALID, 7, 5, FSM_INVALID, FSM_INVALID, 4, FSM_INVALID, FSM_INVALID },  // PAUSED
+  { FSM_INVALID, 0, 1, FSM_INVALID, 1, FSM_INVALID, 7, FSM_INVALID, FSM_INVALID, FSM_INVALID, FSM_INVALID, FSM_INVALID, FSM_INVALID },  // ERROR
+  { FSM_INVALID, 0, 1, FSM_INVALID, 1, FSM_INVALID, 7, FSM_INVALID, FSM_INVALID, 9, 4, 8, 5 },  // QUEUED
+  { FSM_INVALID, 0, 1, FSM_INVALID, 1, FSM_INVALID, 7, 8, FSM_INVALID, FSM_INVALID, 4, 9, 6 },  // PAUSED_QUEUED
+};
+// VALID_EVENTS[state]: bit e set when Event e is valid in that state
+typedef uint16_t EventMask;
+static constexpr EventMask VALID_EVENTS[STATE_COUNT] = {
+  0x0003,  // IDLE
+  0x000F,  // DISCONNECTED
+  0x0076,  // CONNECTED
+  0x00D6,  // READY
+  0x0156,  // STOPPED
+  0x0E56,  // PLAYING
+  0x04D6,  // PAUSED
+  0x0056,  // ERROR
+  0x1E56,  // QUEUED
+  0x1CD6,  // PAUSED_QUEUED
 };
 
 // ====== Global state & API ======
@@ -219,24 +161,19 @@ static volatile State g_state = State::IDLE;
 inline State fsm_state() { return g_state; }
 
 // Check if event 'e' is valid from current state; optionally return next state.
-inline bool isValid(Event e, State* out_next = nullptr) 
-{
-  const State s = g_state;
-  for (size_t  i = 0; i < (size_t )(sizeof(TRANSITIONS)/sizeof(TRANSITIONS[0])); ++i)
-    {
-      const Transition& t = TRANSITIONS[i];
-        if (t.src == s && t.evt == e) 
-        {
-          if (out_next) *out_next = t.dst;
-          return true;
-        }
-    }
-  return false;
+inline bool isValid(Event e, State* out_next = nullptr) {
+  if ((uint8_t)e >= EVENT_COUNT) return false;
+  const uint8_t next = NEXT_STATE[(uint8_t)g_state][(uint8_t)e];
+  if (next == FSM_INVALID) return false;
+  if (out_next) *out_next = (State)next;
+  return true;
 }
 
+// Events valid from the current state, bit e for Event e.
+inline EventMask fsm_valid_events() { return VALID_EVENTS[(uint8_t)g_state]; }
+
 // Commit transition if valid; returns true on state change.
-inline bool fsm_trigger(Event e) 
-{
+inline bool fsm_trigger(Event e) {
   State next;
   if (!isValid(e, &next)) return false;
   g_state = next;
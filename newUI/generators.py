@@ -0,0 +1,125 @@
+"""
+Parametric trajectories computed in memory, no CSV on disk.
+
+A spec is (duration_s, axes, fade_s). axes is one signal for all six axes or a tuple of six, each signal a tuple:
+
+    ("sine", amplitude, frequency, phase)
+    ("chirp", amplitude, f0, f1, sweep)          sweep "linear" or "log"
+    ("multisine", amplitude, f_low, f_high, tones)   Schroeder phases, peak scaled to amplitude
+    ("steps", amplitude, dwell_s, *levels)       levels in [-1, 1], held dwell_s each, cycled
+    ("zero",)
+
+Amplitudes are rad, frequencies Hz. The first and last fade_s seconds are tapered with a raised cosine so the
+platform leaves and returns to zero at rest. Specs are plain tuples so they hash and pickle: generate() is cached
+by them, and an UPLOAD or QUEUE request carries one under "generator" instead of a "filePath".
+"""
+
+import numpy as np
+from functools import lru_cache
+
+TICK_HZ: int = 1000
+NUM_COL: int = 6
+FADE_S: float = 1.0
+GENERATOR_CACHE: int = 16  # a 60 s trajectory is 1.4 MB of float32
+PRESETS: dict[str, tuple] = {
+    "Sine 0.5 Hz": (20.0, ("sine", 0.3, 0.5, 0.0), FADE_S),
+    "Sine 3 Hz": (10.0, ("sine", 0.1, 3.0, 0.0), FADE_S),
+    "Chirp 0.1-5 Hz": (60.0, ("chirp", 0.15, 0.1, 5.0, "log"), 2.0),
+    "Multisine 0.1-3 Hz": (60.0, ("multisine", 0.2, 0.1, 3.0, 30), 2.0),
+    "Steps": (30.0, ("steps", 0.2, 3.0, 0.0, 1.0, -1.0, 0.5, -0.5), 0.0),
+}
+
+
+def sine(t: np.ndarray, amplitude: float, frequency: float, phase: float = 0.0) -> np.ndarray:
+    return amplitude * np.sin(2 * np.pi * frequency * t + phase)
+
+
+def chirp(t: np.ndarray, amplitude: float, f0: float, f1: float, sweep: str = "linear") -> np.ndarray:
+    """Frequency from f0 at t = 0 to f1 at the last sample, linearly or exponentially in time."""
+    duration = max(t[-1], 1 / TICK_HZ)
+    if sweep == "linear":
+        phase = 2 * np.pi * (f0 * t + (f1 - f0) * t**2 / (2 * duration))
+    elif sweep == "log":
+        if f0 <= 0 or f1 <= 0:
+            raise ValueError("A log chirp needs f0, f1 > 0")
+        if f0 == f1:
+            phase = 2 * np.pi * f0 * t
+        else:
+            k = np.log(f1 / f0)
+            phase = 2 * np.pi * f0 * duration / k * np.expm1(k * t / duration)
+    else:
+        raise ValueError(f"Unknown chirp sweep {sweep!r}")
+    return amplitude * np.sin(phase)
+
+
+def multisine(t: np.ndarray, amplitude: float, f_low: float, f_high: float, tones: int) -> np.ndarray:
+    """tones equal-amplitude sines evenly spaced over [f_low, f_high], Schroeder phases to keep the crest low."""
+    if tones < 1 or f_low <= 0 or f_high < f_low:
+        raise ValueError("A multisine needs tones >= 1 and 0 < f_low <= f_high")
+    k = np.arange(1, tones + 1)
+    frequencies = np.linspace(f_low, f_high, tones)
+    phases = -np.pi * k * (k - 1) / tones
+    # (N, tones) would be 1.8 GB for a minute of 30 tones, so sum one tone at a time
+    x = np.zeros_like(t)
+    for f, p in zip(frequencies, phases):
+        x += np.sin(2 * np.pi * f * t + p)
+    peak = np.abs(x).max()
+    return amplitude * x / peak if peak > 0 else x
+
+
+def steps(t: np.ndarray, amplitude: float, dwell: float, *levels: float) -> np.ndarray:
+    if dwell <= 0 or not levels:
+        raise ValueError("Steps need dwell_s > 0 and at least one level")
+    levels = np.asarray(levels, dtype=np.float64)
+    return amplitude * levels[(t // dwell).astype(np.int64) % len(levels)]
+
+
+SIGNALS = {
+    "sine": sine,
+    "chirp": chirp,
+    "multisine": multisine,
+    "steps": steps,
+    "zero": lambda t: np.zeros_like(t),
+}
+
+
+def fade(n: int, samples: int) -> np.ndarray:
+    """Raised-cosine window, 0 -> 1 over the first samples and back to 0 over the last."""
+    window = np.ones(n)
+    samples = min(samples, n // 2)
+    if samples > 0:
+        ramp = 0.5 - 0.5 * np.cos(np.pi * np.arange(samples) / samples)
+        window[:samples] = ramp
+        window[n - samples :] = ramp[::-1]
+    return window
+
+
+@lru_cache(maxsize=GENERATOR_CACHE)
+def generate(duration: float, axes: tuple, fade_s: float = FADE_S, rate: float = TICK_HZ) -> np.ndarray:
+    """
+    (N, 6) float32 rows at rate Hz, ready for upload(). Cached by the spec, so the array is read-only: copy it
+    before changing it. Raises ValueError for an unknown signal or bad parameters.
+    """
+    if duration <= 0 or rate <= 0 or fade_s < 0:
+        raise ValueError("duration and rate must be > 0, fade_s >= 0")
+    if axes and isinstance(axes[0], str):
+        axes = (axes,) * NUM_COL
+    if len(axes) != NUM_COL:
+        raise ValueError(f"Expected one signal or {NUM_COL}, got {len(axes)}")
+    n = int(round(duration * rate)) + 1
+    t = np.arange(n) / rate
+    window = fade(n, int(round(fade_s * rate)))
+    rows = np.empty((n, NUM_COL), dtype=np.float32)
+    computed: dict[tuple, np.ndarray] = {}  # axes often repeat a signal
+    for col, signal in enumerate(axes):
+        if signal not in computed:
+            kind, *params = signal
+            if kind not in SIGNALS:
+                raise ValueError(f"Unknown signal {kind!r}, expected one of {tuple(SIGNALS)}")
+            try:
+                computed[signal] = SIGNALS[kind](t, *params) * window
+            except TypeError as e:
+                raise ValueError(f"Bad parameters for {kind}: {params}") from e
+        rows[:, col] = computed[signal]
+    rows.flags.writeable = False
+    return rows
@@ -0,0 +1,144 @@
+"""
+Inverse kinematics of a rotary-actuator Stewart platform: platform poses to the six crank angles UPLOAD and MOVE
+carry (rad, 0 at the home pose).
+
+Leg i has a crank of length crank at base joint B_i, turning in the vertical plane of its rest direction beta_i,
+and a rod of length rod to platform anchor P_i. With l = T + R P_i - B_i the rod closes when
+
+    M sin(alpha) + N cos(alpha) = L,  L = |l|² - (rod² - crank²),  M = 2 crank l_z,  N = 2 crank (l_x cos beta + l_y sin beta)
+
+so alpha = asin(L / hypot(M, N)) - atan2(N, M), evaluated as a single atan2. |L| > hypot(M, N) is a pose the rod cannot reach, and alpha is
+also checked against the crank limits, in the same pass.
+
+Joints sit in pairs on two circles, pair k centred on 120° k, the two joints spread apart by base_spread and
+platform_spread; the platform pairs are turned 60° so each crank reaches across to the neighbouring pair. Poses
+are (x, y, z, roll, pitch, yaw) in m and rad relative to the home pose, where every crank is horizontal; rotation
+is R = Rz(yaw) Ry(pitch) Rx(roll) about the platform centre. Leg i drives column i.
+"""
+
+import numpy as np
+from functools import lru_cache
+
+NUM_COL: int = 6
+BLOCK_ROWS: int = 8192  # (6, BLOCK_ROWS) float32 temporaries stay in cache
+# placeholder dimensions: measure the rig and pass its own to inverse()
+GEOMETRY: dict = {
+    "base_radius": 0.12,  # m, crank axes
+    "platform_radius": 0.09,  # m, rod ends
+    "base_spread": np.radians(20.0),
+    "platform_spread": np.radians(20.0),
+    "crank": 0.04,  # m
+    "rod": 0.16,  # m
+    "crank_min": -np.pi / 2,
+    "crank_max": np.pi / 2,
+}
+
+
+@lru_cache(maxsize=8)
+def precompute(
+    base_radius: float,
+    platform_radius: float,
+    base_spread: float,
+    platform_spread: float,
+    crank: float,
+    rod: float,
+    crank_min: float,
+    crank_max: float,
+) -> dict:
+    """GEMM weights and home values of one geometry for inverse(), cached by its parameters."""
+    if min(base_radius, platform_radius, crank, rod) <= 0 or crank_min >= crank_max:
+        raise ValueError("Radii and link lengths must be > 0, crank_min < crank_max")
+    centre = np.repeat(np.radians([0.0, 120.0, 240.0]), 2)
+    side = np.tile([-0.5, 0.5], 3)
+    base = centre + side * base_spread
+    platform = centre + np.radians(60.0) - side[::-1] * platform_spread
+    platform = np.roll(platform, 1)  # anchor i is the one of the neighbouring pair closest to joint i
+    beta = base + side * np.pi  # the cranks of a pair point away from each other
+    bx, by = base_radius * np.cos(base), base_radius * np.sin(base)
+    px, py = platform_radius * np.cos(platform), platform_radius * np.sin(platform)
+    # home: every crank horizontal, the platform straight above at height h0
+    reach = (px - bx - crank * np.cos(beta)) ** 2 + (py - by - crank * np.sin(beta)) ** 2
+    if (reach >= rod**2).any():
+        raise ValueError("Rods too short to reach the platform with the cranks horizontal")
+    h0 = np.sqrt(rod**2 - reach)
+    if np.ptp(h0) > 1e-9:
+        raise ValueError("Legs disagree on the home height, the geometry is not symmetric")
+    # l = R P + T - B is taken from home, l = lh + dl, so float32 only carries the small dl. dl and the parts of
+    # L, M and N linear in it are weights on the inverse() features (R00 - 1, R01, x, R10, R11 - 1, y, R20, R21, z)
+    lhx, lhy, lhz = px - bx, py - by, h0
+    zero, one = np.zeros(NUM_COL), np.ones(NUM_COL)
+    dlx = np.stack((px, py, one, zero, zero, zero, zero, zero, zero))
+    dly = np.stack((zero, zero, zero, px, py, one, zero, zero, zero))
+    dlz = np.stack((zero, zero, zero, zero, zero, zero, px, py, one))
+    L1 = 2 * (lhx * dlx + lhy * dly + lhz * dlz)
+    N1 = 2 * crank * (np.cos(beta) * dlx + np.sin(beta) * dly)
+    M1 = 2 * crank * dlz
+    legs = np.stack((dlx, dly, dlz, L1, M1, N1)).transpose(0, 2, 1).reshape(-1, 9).astype(np.float32)
+    legs.flags.writeable = False
+    g = {
+        "legs": legs,
+        # home values, L = N and alpha = 0 there
+        "L0": (lhx**2 + lhy**2 + lhz**2 - (rod**2 - crank**2)).astype(np.float32)[:, None],
+        "M0": (2 * crank * lhz).astype(np.float32)[:, None],
+        "N0": (2 * crank * (np.cos(beta) * lhx + np.sin(beta) * lhy)).astype(np.float32)[:, None],
+        "crank_min": crank_min,
+        "crank_max": crank_max,
+    }
+    for value in g.values():
+        if isinstance(value, np.ndarray):
+            value.flags.writeable = False
+    return g
+
+
+def inverse(poses, geometry: dict | None = None) -> tuple[np.ndarray, np.ndarray]:
+    """
+    (N, 6) float32 crank angles for (N, 6) poses, and an (N,) bool that is False for rows outside the workspace
+    (a rod that cannot reach, or a crank past its limits); those rows hold NaN. geometry overrides GEOMETRY keys.
+    """
+    poses = np.asarray(poses, dtype=np.float64)
+    if poses.ndim == 1:
+        poses = poses[None, :]
+    if poses.ndim != 2 or poses.shape[1] != NUM_COL:
+        raise ValueError("Poses must have shape (N, 6)")
+    g = precompute(**(GEOMETRY | (geometry or {})))
+    n = len(poses)
+    angles = np.empty((n, NUM_COL), dtype=np.float32)
+    valid = np.empty(n, dtype=bool)
+    for start in range(0, n, BLOCK_ROWS):
+        block = poses[start : start + BLOCK_ROWS].T  # (6, n): every array below is leg or feature major
+        angle = block[3:].astype(np.float32)
+        cos, sin = np.cos(angle), np.sin(angle)
+        (cr, cp, cy), (sr, sp, sy) = cos, sin
+        # R - I and T per row; every leg quantity below is linear in them or their square, so one GEMM
+        features = np.empty((9, block.shape[1]), dtype=np.float32)
+        features[0], features[1], features[2] = cy * cp - 1, cy * sp * sr - sy * cr, block[0]
+        features[3], features[4], features[5] = sy * cp, sy * sp * sr + cy * cr - 1, block[1]
+        features[6], features[7], features[8] = -sp, cp * sr, block[2]
+        dlx, dly, dlz, L, M, N = (g["legs"] @ features).reshape(6, NUM_COL, -1)
+        L += g["L0"]
+        L += dlx * dlx
+        L += dly * dly
+        L += dlz * dlz
+        M += g["M0"]
+        N += g["N0"]
+        # asin(L / rho) - atan2(N, M) as one atan2, rho² = M² + N²: sin and cos of the difference, times rho²
+        c = M * M
+        c += N * N
+        c -= L * L
+        with np.errstate(invalid="ignore"):
+            np.sqrt(c, out=c)  # NaN where the rod cannot reach
+        alpha = np.arctan2(L * M - c * N, c * M + L * N)
+        ok = (alpha >= g["crank_min"]) & (alpha <= g["crank_max"])  # False for NaN
+        alpha[~ok] = np.nan
+        angles[start : start + BLOCK_ROWS] = alpha.T
+        valid[start : start + BLOCK_ROWS] = ok.all(axis=0)
+    return angles, valid
+
+
+def to_actuators(poses, geometry: dict | None = None) -> np.ndarray:
+    """inverse() for UPLOAD and MOVE: raises ValueError naming the first row outside the workspace."""
+    angles, valid = inverse(poses, geometry)
+    if not valid.all():
+        bad = np.flatnonzero(~valid)
+        raise ValueError(f"{len(bad):,} poses outside the workspace, first at row {bad[0]}")
+    return angles
@@ -0,0 +1,172 @@
+"""
+Heartbeat link monitor.
+
+Sends HEARTBEAT every `period_s` while active and matches the ACKs. A beat not ACKed within `timeout_s` is missed;
+`max_missed` consecutive misses declare the link dead and call on_dead() once, so a pulled cable or a hung
+master is noticed within max_missed * period_s + timeout_s instead of whenever the OS reports it.
+
+RTT is smoothed like TCP (RFC 6298 srtt/rttvar) and link quality is an EWMA of 1 per ACKed beat, 0 per miss.
+"""
+
+import time
+from threading import Event, Lock, Thread
+from clocksync import host_time_ns
+
+HEARTBEAT_SEQ_BASE: int = 0x80000000  # heartbeats use the top half of the sequence space, GUI requests the bottom
+HEARTBEAT_PERIOD_S: float = 0.02
+HEARTBEAT_TIMEOUT_S: float = 0.05
+HEARTBEAT_MAX_MISSED: int = 3
+QUALITY_ALPHA: float = 0.05
+
+
+class LinkMonitor:
+    def __init__(
+        self,
+        send,
+        on_dead,
+        period_s: float = HEARTBEAT_PERIOD_S,
+        timeout_s: float = HEARTBEAT_TIMEOUT_S,
+        max_missed: int = HEARTBEAT_MAX_MISSED,
+    ):
+        """
+        send(seq) writes one HEARTBEAT and returns True if it went out.
+        on_dead(reason) is called from the monitor thread when the link is declared dead.
+        """
+        self.send = send
+        self.on_dead = on_dead
+        self.period_s: float = period_s
+        self.timeout_s: float = timeout_s
+        self.max_missed: int = max_missed
+        self._pending: dict[int, int] = {}  # seq -> host_time_ns() when sent
+        self._lock: Lock = Lock()
+        self._stop: Event = Event()
+        self._active: bool = False
+        self._suspended: int = 0
+        self._count: int = 0
+        self._thread: Thread | None = None
+        self.reset()
+
+    def reset(self) -> None:
+        self.sent: int = 0
+        self.acked: int = 0
+        self.missed: int = 0
+        self.late: int = 0
+        self.consecutive: int = 0
+        self.quality: float = 1.0
+        self.srtt_ns: float | None = None
+        self.rttvar_ns: float = 0.0
+        self.rtt_min_ns: int | None = None
+        self.alive: bool = False
+
+    def start(self) -> None:
+        self._stop.clear()
+        self._thread = Thread(target=self._run, name="LinkMonitor", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+        if self._thread is not None and self._thread.is_alive():
+            self._thread.join()
+
+    def activate(self) -> None:
+        """Start beating, called once the port is open."""
+        with self._lock:
+            self._pending.clear()
+            self.reset()
+            self.alive = True
+            self._active = True
+
+    def deactivate(self) -> None:
+        with self._lock:
+            self._active = False
+            self._pending.clear()
+            self.alive = False
+
+    def suspend(self) -> None:
+        """Stop counting misses while a bulk transfer holds the link, e.g. a large UPLOAD."""
+        with self._lock:
+            self._suspended += 1
+
+    def resume(self) -> None:
+        with self._lock:
+            self._suspended = max(0, self._suspended - 1)
+            self._pending.clear()  # beats queued behind the transfer say nothing about the link
+
+    def is_heartbeat(self, seq: int) -> bool:
+        return seq >= HEARTBEAT_SEQ_BASE
+
+    def on_ack(self, seq: int, recv_ns: int | None = None) -> int | None:
+        """
+        Match an ACK received at recv_ns (host_time_ns of its chunk, now if None).
+        Returns the host_time_ns the beat was sent at, None for an unknown or expired beat.
+        """
+        now = host_time_ns() if recv_ns is None else recv_ns
+        with self._lock:
+            sent = self._pending.pop(seq, None)
+            if sent is None:
+                self.late += 1
+                return None
+            rtt = now - sent
+            if self.srtt_ns is None:
+                self.srtt_ns, self.rttvar_ns = float(rtt), rtt / 2
+            else:
+                self.rttvar_ns += (abs(self.srtt_ns - rtt) - self.rttvar_ns) / 4
+                self.srtt_ns += (rtt - self.srtt_ns) / 8
+            if self.rtt_min_ns is None or rtt < self.rtt_min_ns:
+                self.rtt_min_ns = rtt
+            self.acked += 1
+            self.consecutive = 0
+            self.quality += QUALITY_ALPHA * (1.0 - self.quality)
+            return sent
+
+    def _expire(self, now: int) -> str | None:
+        """Count overdue beats as missed. Returns a reason when the link should be declared dead."""
+        deadline = now - int(self.timeout_s * 1e9)
+        for seq in [seq for seq, sent in self._pending.items() if sent < deadline]:
+            del self._pending[seq]
+            self.missed += 1
+            self.consecutive += 1
+            self.quality -= QUALITY_ALPHA * self.quality
+        if self.consecutive >= self.max_missed:
+            return f"{self.consecutive} heartbeats missed (timeout {self.timeout_s * 1e3:.0f} ms)"
+        return None
+
+    def _run(self) -> None:
+        next_beat = time.perf_counter()
+        while not self._stop.is_set():
+            delay = next_beat - time.perf_counter()
+            if delay > 0:
+                self._stop.wait(delay)
+            next_beat = max(next_beat + self.period_s, time.perf_counter())
+            with self._lock:
+                if not self._active or self._suspended:
+                    continue
+                reason = self._expire(host_time_ns())
+                if reason is not None:
+                    self._active = False
+                    self.alive = False
+                    self._pending.clear()
+                else:
+                    seq = HEARTBEAT_SEQ_BASE | (self._count & 0x7FFFFFFF)
+                    self._count += 1
+                    self._pending[seq] = host_time_ns()
+                    self.sent += 1
+            if reason is not None:
+                self.on_dead(reason)
+            elif not self.send(seq):
+                with self._lock:
+                    self._pending.pop(seq, None)
+
+    def snapshot(self) -> dict:
+        return {
+            "alive": self.alive,
+            "sent": self.sent,
+            "acked": self.acked,
+            "missed": self.missed,
+            "late": self.late,
+            "consecutive_missed": self.consecutive,
+            "quality": self.quality,
+            "rtt_ms": self.srtt_ns / 1e6 if self.srtt_ns is not None else None,
+            "rtt_var_ms": self.rttvar_ns / 1e6,
+            "rtt_min_ms": self.rtt_min_ns / 1e6 if self.rtt_min_ns is not None else None,
+        }
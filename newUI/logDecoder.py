@@ -6,7 +6,6 @@ import numpy as np
 from collections import defaultdict
 from tkinter import filedialog
 from parser import Parser
-import pandas as pd
 
 
 def flatten_dict(d, parent_key="", sep="."):
@@ -21,14 +20,20 @@ def flatten_dict(d, parent_key="", sep="."):
     return dict(items)
 
 
-def process_frames(frames, outfile="frames.xlsx"):
+def decode_log(data: bytearray):
+    """Parse a raw .bin capture into frames. Consumes data."""
+    parser = Parser()
+    parser.parse(data)
+    return parser.frames
+
+
+def frame_rows(frames) -> dict[str, list[dict]]:
     """
-    Process a list of frames into an Excel file.
+    Group frames into flat rows per sheet.
     - FEEDBACK frames → split by axisId (sheet per axis).
     - Other frames → sheet per msg_id.
     - Dicts are flattened so no nested blobs.
     """
-    # Collect frames into buckets by sheet name
     buckets = {}
 
     for frame in frames:
@@ -48,8 +53,14 @@ def process_frames(frames, outfile="frames.xlsx"):
         if sheet_name not in buckets:
             buckets[sheet_name] = []
         buckets[sheet_name].append(flat)
+    return buckets
 
-    # Write each bucket into Excel
+
+def process_frames(frames, outfile="frames.xlsx"):
+    """Process a list of frames into an Excel file, one sheet per frame_rows() bucket."""
+    import pandas as pd
+
+    buckets = frame_rows(frames)
     with pd.ExcelWriter(outfile, engine="xlsxwriter") as writer:
         for sheet_name, rows in buckets.items():
             df = pd.DataFrame(rows)
@@ -71,14 +82,13 @@ def main():
     # ---- Read all bytes ----
     with open(file_path, "rb") as file:
         data = bytearray(file.read())
-    parser = Parser()
-    parser.parse(data)
+    frames = decode_log(data)
 
-    # for frame in parser.frames:
+    # for frame in frames:
     #     print("-" * 20)
     #     print(frame)
     #     print("-" * 20)
-    process_frames(parser.frames, outfile=f"{filename}.xlsx")
+    process_frames(frames, outfile=f"{filename}.xlsx")
 
 
 if __name__ == "__main__":
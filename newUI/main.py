@@ -1,10 +1,32 @@
+import argparse
 from GUIr import App
 
 if __name__ == "__main__":
-    app = App()
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--emulator", action="store_true", help="run against the pty Teensy emulator instead of hardware")
+    ap.add_argument("--emulator-rate", type=float, default=1000.0, help="FEEDBACK frames per second per axis")
+    ap.add_argument("--emulator-jitter-us", type=float, default=0.0)
+    ap.add_argument("--emulator-ber", type=float, default=0.0)
+    ap.add_argument("--replay", default=None, help="replay a logs/*.bin capture, through the emulator with --emulator")
+    ap.add_argument("--replay-speed", type=float, default=1.0, help="1 for real time, N for N times faster, 0 for max")
+    args = ap.parse_args()
+
+    emulator = None
+    if args.emulator:
+        from emulator import TeensyEmulator
+
+        emulator = TeensyEmulator(args.emulator_rate, args.emulator_jitter_us, args.emulator_ber)
+        print(f"Teensy emulator on {emulator.open()}")
+        if args.replay:
+            emulator.replayCapture(args.replay, args.replay_speed)
+
+    replay = (args.replay, args.replay_speed) if args.replay and not emulator else None
+    app = App(extraPorts=[emulator.port] if emulator else None, replay=replay)
     try:
         app.run()
     except KeyboardInterrupt:
         app.on_closing()
     finally:
+        if emulator:
+            emulator.close()
         print("Done.")
@@ -0,0 +1,66 @@
+import time
+
+
+def qsize(q) -> int:
+    """Queue depth, -1 where the platform does not implement it (multiprocessing.Queue on macOS)."""
+    try:
+        return q.qsize()
+    except (NotImplementedError, AttributeError):
+        return -1
+
+
+class LinkMetrics:
+    """
+    Plain integer counters bumped on the serial hot path; nothing is computed until snapshot() is called.
+    Parser keeps its own counters (frames per type, CRC failures, skipped bytes, sequence accounting) and is folded in
+    at snapshot time.
+    """
+
+    __slots__ = (
+        "started",
+        "bytes_in",
+        "chunks_in",
+        "bytes_out",
+        "writes",
+        "send_ns",
+        "parse_ns",
+        "parse_ns_max",
+        "buffer_hwm",
+    )
+
+    def __init__(self):
+        self.reset()
+
+    def reset(self) -> None:
+        self.started: float = time.monotonic()
+        self.bytes_in: int = 0
+        self.chunks_in: int = 0
+        self.bytes_out: int = 0
+        self.writes: int = 0
+        self.send_ns: int = 0
+        self.parse_ns: int = 0
+        self.parse_ns_max: int = 0
+        self.buffer_hwm: int = 0
+
+    def snapshot(self, parser=None, queues: dict | None = None) -> dict:
+        out = {
+            "uptime_s": time.monotonic() - self.started,
+            "bytes_in": self.bytes_in,
+            "chunks_in": self.chunks_in,
+            "bytes_out": self.bytes_out,
+            "writes": self.writes,
+            "send_ms_total": self.send_ns / 1e6,
+            "parse_ms_total": self.parse_ns / 1e6,
+            "parse_us_per_chunk": self.parse_ns / self.chunks_in / 1e3 if self.chunks_in else 0.0,
+            "parse_us_max": self.parse_ns_max / 1e3,
+            "buffer_hwm": self.buffer_hwm,
+        }
+        if parser is not None:
+            out["frames"] = dict(parser.frameCounts)
+            out["crc_errors"] = parser.crcErrors
+            out["dropped_packets"] = parser.droppedPackets
+            out["skipped_bytes"] = parser.skippedBytes
+            out.update(parser.sequences.snapshot())
+        for name, q in (queues or {}).items():
+            out[f"queue.{name}"] = q if isinstance(q, int) else qsize(q)
+        return out
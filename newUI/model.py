@@ -8,6 +8,8 @@ states: list[str] = [
     "PLAYING",
     "PAUSED",
     "ERROR",
+    "QUEUED",  # playing, with the next trajectory uploaded behind it
+    "PAUSED_QUEUED",  # paused, the queue still waiting behind the trajectory
 ]
 
 transitions: list[dict[str, str | list[str]]] = [
@@ -22,31 +24,80 @@ transitions: list[dict[str, str | list[str]]] = [
     {"transition": "PLAY", "source": "PAUSED", "dest": "PLAYING"},
     {"transition": "STOP", "source": "PLAYING", "dest": "STOPPED"},
     {"transition": "STOP", "source": "PAUSED", "dest": "STOPPED"},
+    {"transition": "QUEUE", "source": "PLAYING", "dest": "QUEUED"},
+    {"transition": "QUEUE", "source": "QUEUED", "dest": "QUEUED"},
+    {"transition": "NEXT", "source": "QUEUED", "dest": "PLAYING"},
+    {"transition": "PAUSE", "source": "QUEUED", "dest": "PAUSED_QUEUED"},
+    {"transition": "STOP", "source": "QUEUED", "dest": "STOPPED"},
+    {"transition": "PLAY", "source": "PAUSED_QUEUED", "dest": "QUEUED"},
+    {"transition": "QUEUE", "source": "PAUSED_QUEUED", "dest": "PAUSED_QUEUED"},
+    {"transition": "NEXT", "source": "PAUSED_QUEUED", "dest": "PAUSED"},
+    {"transition": "STOP", "source": "PAUSED_QUEUED", "dest": "STOPPED"},
     {"transition": "RESET", "source": states[2:], "dest": "DISCONNECTED"},
     {"transition": "DISABLE", "source": states[2:], "dest": "ERROR"},
     {"transition": "QUIT", "source": states, "dest": "IDLE"},
 ]
 # ─────────────────────────────────────────────────────────────────────────
-import networkx as nx
 
 
 class FSM:
+    """
+    Table-driven FSM compiled from the states/transitions lists.
+    trigger()/can() are a dict lookup plus a list index; the networkx graph is only built on demand
+    (print_fsm_h, drawing) so importing this module stays cheap.
+    """
+
+    INVALID: int = -1
+
     def __init__(
         self, states: list[str] = states, transitions: list[dict[str, str | list[str]]] = transitions, initial: str = ""
     ) -> None:
-        # build the graph
-        self._G: nx.MultiDiGraph = nx.MultiDiGraph()
-        self._G.add_nodes_from(states)
+        self._states: list[str] = list(states)
+        self._transitions: list[dict[str, str | list[str]]] = transitions
+        self._state_idx: dict[str, int] = {s: i for i, s in enumerate(self._states)}
         # flatten each transition’s source(s) into edges
-        edges: list[tuple[str, str, str]] = [
+        self._edges: list[tuple[str, str, str]] = [
             (src, t["dest"], t["transition"])
             for t in transitions
             for src in (t["source"] if isinstance(t["source"], list) else [t["source"]])
         ]
-        for u, v, trig in edges:
-            self._G.add_edge(u, v, transition=trig)
+        # events by first appearance
+        self._events: list[str] = list(dict.fromkeys(trig for _, _, trig in self._edges))
+        self._event_idx: dict[str, int] = {e: i for i, e in enumerate(self._events)}
+        # dense [state][event] -> next state, first matching edge wins (same as scanning out_edges in order)
+        self._table: list[list[int]] = [[self.INVALID] * len(self._events) for _ in self._states]
+        for u, v, trig in self._edges:
+            row = self._table[self._state_idx[u]]
+            if row[self._event_idx[trig]] == self.INVALID:
+                row[self._event_idx[trig]] = self._state_idx[v]
+        self._available: list[tuple[str, ...]] = [
+            tuple(e for e, nxt in zip(self._events, row) if nxt != self.INVALID) for row in self._table
+        ]
+        self._available_sets: list[frozenset[str]] = [frozenset(a) for a in self._available]
+        self._graph = None
         # set initial state
-        self.state: str = initial if initial else states[0]
+        self._s: int = self._state_idx[initial if initial else self._states[0]]
+
+    @property
+    def state(self) -> str:
+        return self._states[self._s]
+
+    @state.setter
+    def state(self, name: str) -> None:
+        self._s = self._state_idx[name]
+
+    @property
+    def graph(self):
+        """networkx.MultiDiGraph of the same machine, built (and networkx imported) on first use."""
+        if self._graph is None:
+            import networkx as nx
+
+            G = nx.MultiDiGraph()
+            G.add_nodes_from(self._states)
+            for u, v, trig in self._edges:
+                G.add_edge(u, v, transition=trig)
+            self._graph = G
+        return self._graph
 
     def trigger(self, name: str) -> str:
         """
@@ -54,16 +105,20 @@ class FSM:
         On success: updates self.state and returns the new state.
         On failure: raises ValueError.
         """
-        # search outgoing edges for this transition
-        for _, dest, key, data in self._G.out_edges(self.state, keys=True, data=True):
-            if data["transition"] == name:
-                self.state = dest
-                return dest
-        raise ValueError(f"No transition '{name}' from state '{self.state}'")
+        e = self._event_idx.get(name)
+        nxt = self._table[self._s][e] if e is not None else self.INVALID
+        if nxt == self.INVALID:
+            raise ValueError(f"No transition '{name}' from state '{self.state}'")
+        self._s = nxt
+        return self._states[nxt]
+
+    def can(self, name: str) -> bool:
+        """Whether `name` is a valid transition from the current state."""
+        return name in self._available_sets[self._s]
 
     def available_transitions(self) -> list[str]:
         """List all valid transitions from the current state."""
-        return list({data["transition"] for _, _, _, data in self._G.out_edges(self.state, keys=True, data=True)})
+        return list(self._available[self._s])
 
     def __repr__(self) -> str:
         return f"<Current State={self.state!r}>"
@@ -71,16 +126,19 @@ class FSM:
     def print_fsm_h(self, path: str = "fsm.h", header_guard: str = "FSM_H_") -> None:
         """
         Minimal generator with name tables + two-step API:
-        - isValid(Event e, State* out_next=nullptr): check/resolve next state
+        - isValid(Event e, State* out_next=nullptr): check/resolve next state, one load from NEXT_STATE
         - fsm_trigger(Event e): uses isValid(); commits on success
+        NEXT_STATE[state][event] holds FSM_INVALID where there is no transition, VALID_EVENTS[state] has bit e set
+        for every event valid there; the first matching edge wins, as in TRANSITIONS order. check_fsm_h() verifies both.
         """
-        states = list(self._G.nodes)
+        G = self.graph
+        states = list(G.nodes)
         state_to_idx = {s: i for i, s in enumerate(states)}
         initial_state = self.state if self.state else states[0]
 
         # expand edges
         edges = []
-        for u, v, k, data in self._G.edges(keys=True, data=True):
+        for u, v, k, data in G.edges(keys=True, data=True):
             edges.append((u, data["transition"], v))
 
         # event ordering by first appearance
@@ -105,6 +163,15 @@ class FSM:
         event_enum_vals = [c_ident(e) for e in events]
         initial_ident = c_ident(initial_state)
 
+        next_state = [[None] * len(events) for _ in states]
+        for s_i, e_i, d_i in rows:
+            if next_state[s_i][e_i] is None:
+                next_state[s_i][e_i] = d_i
+        mask_bits = next(bits for bits in (8, 16, 32, 64) if len(events) <= bits)
+        masks = [sum(1 << e_i for e_i, d_i in enumerate(row) if d_i is not None) for row in next_state]
+        if len(states) > 255:
+            raise ValueError("NEXT_STATE is uint8_t, 255 is the sentinel: at most 255 states")
+
         lines = []
         emit = lines.append
 
@@ -146,23 +213,39 @@ class FSM:
             emit(f"  {{ State::{state_enum_vals[s_i]}, Event::{event_enum_vals[e_i]}, State::{state_enum_vals[d_i]} }},")
         emit("};")
         emit("")
+        emit("// ====== Lookup tables ======")
+        emit(f"static constexpr uint8_t STATE_COUNT = {len(states)};")
+        emit(f"static constexpr uint8_t EVENT_COUNT = {len(events)};")
+        emit("static constexpr uint8_t FSM_INVALID = 0xFF;  // no transition")
+        emit("// NEXT_STATE[state][event]: the destination state, or FSM_INVALID")
+        emit("static constexpr uint8_t NEXT_STATE[STATE_COUNT][EVENT_COUNT] = {")
+        for s_i, row in enumerate(next_state):
+            cells = ", ".join("FSM_INVALID" if d_i is None else f"{d_i}" for d_i in row)
+            emit(f"  {{ {cells} }},  // {states[s_i]}")
+        emit("};")
+        emit("// VALID_EVENTS[state]: bit e set when Event e is valid in that state")
+        emit(f"typedef uint{mask_bits}_t EventMask;")
+        emit("static constexpr EventMask VALID_EVENTS[STATE_COUNT] = {")
+        for s_i, mask in enumerate(masks):
+            emit(f"  0x{mask:0{mask_bits // 4}X},  // {states[s_i]}")
+        emit("};")
+        emit("")
         emit("// ====== Global state & API ======")
         emit(f"static volatile State g_state = State::{initial_ident};")
         emit("inline State fsm_state() { return g_state; }")
         emit("")
         emit("// Check if event 'e' is valid from current state; optionally return next state.")
         emit("inline bool isValid(Event e, State* out_next = nullptr) {")
-        emit("  const State s = g_state;")
-        emit("  for (size_t  i = 0; i < (size_t )(sizeof(TRANSITIONS)/sizeof(TRANSITIONS[0])); ++i) {")
-        emit("    const Transition& t = TRANSITIONS[i];")
-        emit("    if (t.src == s && t.evt == e) {")
-        emit("      if (out_next) *out_next = t.dst;")
-        emit("      return true;")
-        emit("    }")
-        emit("  }")
-        emit("  return false;")
+        emit("  if ((uint8_t)e >= EVENT_COUNT) return false;")
+        emit("  const uint8_t next = NEXT_STATE[(uint8_t)g_state][(uint8_t)e];")
+        emit("  if (next == FSM_INVALID) return false;")
+        emit("  if (out_next) *out_next = (State)next;")
+        emit("  return true;")
         emit("}")
         emit("")
+        emit("// Events valid from the current state, bit e for Event e.")
+        emit("inline EventMask fsm_valid_events() { return VALID_EVENTS[(uint8_t)g_state]; }")
+        emit("")
         emit("// Commit transition if valid; returns true on state change.")
         emit("inline bool fsm_trigger(Event e) {")
         emit("  State next;")
@@ -176,6 +259,58 @@ class FSM:
         with open(path, "w", encoding="utf-8") as f:
             f.write("\n".join(lines))
 
+    def check_fsm_h(self, path: str = "fsm.h") -> list[str]:
+        """
+        Parse the enums, NEXT_STATE and VALID_EVENTS out of a generated header and compare every (state, event)
+        cell with the first matching out-edge of the networkx graph. Returns the mismatches, empty when it agrees.
+        """
+        import re
+
+        with open(path, "r", encoding="utf-8") as f:
+            text = f.read()
+
+        def block(pattern: str) -> str:
+            m = re.search(pattern + r"\s*=?\s*\{(.*?)\n\};", text, re.S)
+            if m is None:
+                raise ValueError(f"{path}: no match for {pattern!r}")
+            return re.sub(r"//[^\n]*", "", m.group(1))
+
+        h_states = re.findall(r"\w+", block(r"enum class State : uint8_t"))
+        h_events = re.findall(r"\w+", block(r"enum class Event : uint8_t"))
+        invalid = int(re.search(r"FSM_INVALID = (0x[0-9A-Fa-f]+|\d+)", text).group(1), 0)
+        table = [
+            [invalid if cell.strip() == "FSM_INVALID" else int(cell) for cell in row.split(",")]
+            for row in re.findall(r"\{([^{}]*)\}", block(r"NEXT_STATE\[STATE_COUNT\]\[EVENT_COUNT\]"))
+        ]
+        masks = [int(m, 16) for m in re.findall(r"0x([0-9A-Fa-f]+)", block(r"VALID_EVENTS\[STATE_COUNT\]"))]
+
+        errors: list[str] = []
+        G = self.graph
+        if h_states != list(G.nodes):
+            errors.append(f"State enum {h_states} != graph nodes {list(G.nodes)}")
+        graph_events = list(dict.fromkeys(d["transition"] for _, _, d in G.edges(data=True)))
+        if h_events != graph_events:
+            errors.append(f"Event enum {h_events} != graph events {graph_events}")
+        if errors:
+            return errors
+        if len(table) != len(h_states) or any(len(row) != len(h_events) for row in table):
+            return [f"NEXT_STATE is not {len(h_states)} x {len(h_events)}"]
+        if len(masks) != len(h_states):
+            return [f"VALID_EVENTS has {len(masks)} entries, expected {len(h_states)}"]
+        for s_i, state in enumerate(h_states):
+            expected: dict[str, str] = {}
+            for _, dest, data in G.out_edges(state, data=True):
+                expected.setdefault(data["transition"], dest)
+            for e_i, event in enumerate(h_events):
+                want = h_states.index(expected[event]) if event in expected else invalid
+                if table[s_i][e_i] != want:
+                    errors.append(f"NEXT_STATE[{state}][{event}] = {table[s_i][e_i]}, graph says {want}")
+                if bool(masks[s_i] >> e_i & 1) != (event in expected):
+                    errors.append(f"VALID_EVENTS[{state}] bit {event} disagrees with the graph")
+            if masks[s_i] >> len(h_events):
+                errors.append(f"VALID_EVENTS[{state}] has bits past EVENT_COUNT")
+        return errors
+
 
 def test() -> None:
     import random
@@ -199,3 +334,5 @@ if __name__ == "__main__":
     # test()
     fsm: FSM = FSM(states, transitions, initial="IDLE")
     fsm.print_fsm_h(path="fsm.h", header_guard="FSM_H_")
+    problems = fsm.check_fsm_h("fsm.h")
+    print("\n".join(problems) if problems else "fsm.h matches the graph")
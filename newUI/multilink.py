@@ -0,0 +1,287 @@
+"""
+Several rigs from one serial process.
+
+MultiLinkServer keeps one serialServer per port, each with its own Parser, ReaderThread, heartbeat monitor and
+capture file (logs/<time>-<link>.bin), and drives them all from a single request pipe:
+
+    {"event": "PORTSELECT", "link": "rigA", "port": "COM5", "sequence": 0}   # the link is created on first use
+    {"event": "ENABLE", "link": "rigA", "sequence": 1}                        # one rig
+    {"event": "PLAY", "sequence": 2}                                         # every link
+    {"event": "MOVE", "link": "rigB", "to": 0x0A, "position": 0.1, "sequence": 3}
+
+"to" sets the packet to_id (default broadcast). A request answered by several links comes back once, with
+"links": {name: status} and status True only when every link ACKed; single link answers also carry "link".
+Unsolicited responses (a link lost) are forwarded at once with their "link". FEEDBACK batches arrive on the
+feedback queue as (link, batch).
+
+    python multilink.py --emulators 3       # self-check against pty emulators
+"""
+
+import time
+import argparse
+from threading import Lock
+from metrics import qsize
+from profiler import StackSampler, profiling_requested
+from linkhealth import HEARTBEAT_PERIOD_S, HEARTBEAT_MAX_MISSED
+from serial_process_threaded import serialServer
+
+# requests a link can only answer with an ACK, i.e. when its port is open
+ACKED_EVENTS = frozenset({"DISCONNECT", "ENABLE", "UPLOAD", "QUEUE", "PLAY", "PAUSE", "STOP", "DISABLE", "RESET", "MOVE"})
+QUIT_WAIT_S: float = 0.5
+
+
+class LinkPipe:
+    """Stands in for the pipe of one serialServer; its responses go back through MultiLinkServer.collect()."""
+
+    def __init__(self, server, name: str):
+        self.server = server
+        self.name: str = name
+
+    def send(self, response: dict) -> None:
+        self.server.collect(self.name, response)
+
+    def close(self) -> None:
+        pass
+
+
+class LinkFeedback:
+    """Stands in for the feedback queue of one serialServer, tagging every batch with the link name."""
+
+    def __init__(self, queue, name: str):
+        self.queue = queue
+        self.name: str = name
+
+    def put(self, batch: list[tuple]) -> None:
+        self.queue.put((self.name, batch))
+
+    def qsize(self) -> int:
+        return qsize(self.queue)
+
+    def cancel_join_thread(self) -> None:
+        self.queue.cancel_join_thread()
+
+
+class MultiLinkServer:
+    def __init__(
+        self,
+        pipe,
+        feedbackQueue=None,
+        heartbeatPeriod: float = HEARTBEAT_PERIOD_S,
+        maxMissed: int = HEARTBEAT_MAX_MISSED,
+    ):
+        self.pipe = pipe
+        self.feedbackQueue = feedbackQueue
+        self.heartbeatPeriod: float = heartbeatPeriod
+        self.maxMissed: int = maxMissed
+        self.running: bool = False
+        self.links: dict[str, serialServer] = {}
+        self.pending: dict[int, dict] = {}  # request sequence -> {"request", "waiting", "links", "results"}
+        self.lock: Lock | None = None  # created in run(), like every thread primitive here
+        self.pipeLock: Lock | None = None
+        self.profiler: StackSampler | None = None
+
+    def addLink(self, name: str) -> serialServer:
+        feedback = LinkFeedback(self.feedbackQueue, name) if self.feedbackQueue is not None else None
+        link = serialServer(LinkPipe(self, name), feedback, self.heartbeatPeriod, self.maxMissed, name=name)
+        link.startWorkers()
+        self.links[name] = link
+        print(f"[addLink] : {name}")
+        return link
+
+    def removeLink(self, name: str) -> None:
+        link = self.links.pop(name)
+        link.stopWorkers()
+        self.failLink(name)
+
+    def targets(self, request: dict) -> list[str]:
+        name = request.get("link")
+        if name is None:
+            return list(self.links)
+        return [name] if name in self.links else []
+
+    def dispatch(self, request: dict, names: list[str]) -> None:
+        """Hand a request to each named link and wait for all of their answers before responding."""
+        if not names:
+            print(f"[dispatch] : No link for {request}")
+            self.sendResponse(request, False)
+            return
+        sequence = request["sequence"]
+        with self.lock:
+            self.pending[sequence] = {"request": request, "waiting": set(names), "links": {}, "results": {}}
+        for name in names:
+            link = self.links[name]
+            if request["event"] in ACKED_EVENTS and not link.connected:
+                self.resolve(name, sequence, False)
+                continue
+            try:
+                link.handleRequest(dict(request))  # links annotate their copy (metrics, stats)
+            except Exception as e:
+                print(f"[dispatch] : {name} failed on {request['event']} - {e}")
+                self.resolve(name, sequence, False)
+
+    def collect(self, name: str, response: dict) -> None:
+        """Response from one link, called from that link's reader, monitor or request thread."""
+        sequence = response.get("sequence")
+        with self.lock:
+            entry = self.pending.get(sequence)
+            expected = entry is not None and name in entry["waiting"]
+        if expected:
+            self.resolve(name, sequence, response.get("status", False), response)
+            return
+        self.sendResponse(dict(response, link=name), response.get("status", False))
+        if response.get("event") == "DISCONNECT" and sequence == -1:
+            self.failLink(name)  # it will not ACK anything still outstanding
+
+    def resolve(self, name: str, sequence: int, status: bool, response: dict | None = None) -> None:
+        with self.lock:
+            entry = self.pending.get(sequence)
+            if entry is None or name not in entry["waiting"]:
+                return
+            entry["waiting"].discard(name)
+            entry["links"][name] = status
+            extra = {k: v for k, v in (response or {}).items() if k not in entry["request"] and k != "status"}
+            if extra:
+                entry["results"][name] = extra
+            if entry["waiting"]:
+                return
+            del self.pending[sequence]
+        out = dict(entry["request"], links=entry["links"])
+        if entry["results"]:
+            out["results"] = entry["results"]
+        if len(entry["links"]) == 1:
+            out["link"] = name
+        self.sendResponse(out, all(entry["links"].values()))
+
+    def failLink(self, name: str) -> None:
+        """Answer False for name in every outstanding request."""
+        with self.lock:
+            sequences = [seq for seq, entry in self.pending.items() if name in entry["waiting"]]
+        for sequence in sequences:
+            self.resolve(name, sequence, False)
+
+    def sendResponse(self, response: dict, success: bool = False) -> None:
+        response["status"] = success
+        try:
+            with self.pipeLock:
+                self.pipe.send(response)
+        except Exception as e:
+            print(f"[sendResponse] : Error sending response - {e}")
+
+    def metricsSnapshot(self) -> dict:
+        return {name: link.metricsSnapshot() for name, link in self.links.items()}
+
+    def RequestRouter(self):
+        while self.running:
+            try:
+                request = self.pipe.recv()
+            except (EOFError, OSError) as e:
+                print(f"[RequestRouter] : Pipe closed - {e}")
+                break
+            except Exception as e:
+                print(f"[RequestRouter] : Error receiving request - {e}")
+                continue
+
+            match request["event"]:
+                case "PORTSELECT":
+                    name = request.setdefault("link", request["port"])
+                    if name not in self.links:
+                        self.addLink(name)
+                    self.dispatch(request, [name])
+                case "REMOVELINK":
+                    if request.get("link") in self.links:
+                        self.removeLink(request["link"])
+                        self.sendResponse(request, True)
+                    else:
+                        self.sendResponse(request, False)
+                case "METRICS":
+                    request["metrics"] = self.metricsSnapshot()
+                    self.sendResponse(request, True)
+                case "PROFILE":
+                    if request.get("enable", not self.profiler.running):
+                        self.profiler.start()
+                        request["path"] = None
+                    else:
+                        request["path"] = self.profiler.stop()
+                    request["enable"] = self.profiler.running
+                    self.sendResponse(request, True)
+                case "QUIT":
+                    self.dispatch(request, self.targets(request) or list(self.links))
+                    break
+                case _:
+                    self.dispatch(request, self.targets(request))
+
+    def run(self):
+        try:
+            print("Multi-link server started.")
+            self.lock = Lock()
+            self.pipeLock = Lock()
+            self.profiler = StackSampler("multilink")
+            if profiling_requested():
+                self.profiler.start()
+            self.running = True
+            self.RequestRouter()
+        except Exception as e:
+            print(f"[run] : Exception in multi-link server run - {e}")
+        finally:
+            self.stop()
+            print("Multi-link server stopped.")
+
+    def stop(self):
+        self.running = False
+        deadline = time.monotonic() + QUIT_WAIT_S
+        while self.pending and time.monotonic() < deadline:  # let the QUIT ACKs come in
+            time.sleep(0.01)
+        for name in list(self.links):
+            self.removeLink(name)  # answers False for whatever is still outstanding
+        if self.feedbackQueue is not None:
+            self.feedbackQueue.cancel_join_thread()  # nobody reads feedback after QUIT, it must not hold up the exit
+        if self.profiler is not None and self.profiler.running:
+            self.profiler.stop()
+        self.pipe.close()
+
+
+if __name__ == "__main__":
+    # Self-check: one process driving several emulated rigs
+    from multiprocessing import Process, Pipe, Queue
+    from emulator import TeensyEmulator
+
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--emulators", type=int, default=2)
+    args = ap.parse_args()
+
+    emulators = [TeensyEmulator(seed=i) for i in range(args.emulators)]
+    parent, child = Pipe()
+    feedback = Queue()
+    server = MultiLinkServer(child, feedback)
+    process = Process(target=server.run, name="MultiLinkServerProcess")
+    process.start()
+
+    sequence = 0
+
+    def request(event: str, **kwargs) -> dict:
+        global sequence
+        parent.send({"event": event, "sequence": sequence, **kwargs})
+        sequence += 1
+        response = parent.recv()
+        while response.get("sequence") == -1:
+            print(f"[{response.get('link')}] {response}")
+            response = parent.recv()
+        return response
+
+    for i, emulator in enumerate(emulators):
+        print(request("PORTSELECT", link=f"rig{i}", port=emulator.open()))
+    print(request("CONNECT"))
+    print(request("ENABLE", link="rig0"))
+    print(request("MOVE", position=0.1))
+    time.sleep(1.0)
+    perLink: dict[str, int] = {}
+    while not feedback.empty():
+        name, batch = feedback.get()
+        perLink[name] = perLink.get(name, 0) + len(batch)
+    print(f"feedback samples per link: {perLink}")
+    for name, metrics in request("METRICS")["metrics"].items():
+        print(f"{name}: frames {metrics['frames']} rtt {metrics['link.rtt_ms']} ms")
+    print(request("QUIT"))
+    process.join(5)
+    for emulator in emulators:
+        emulator.close()
@@ -9,14 +9,19 @@ from Hexlink.commands import (
     PACKET_OVERHEAD,
     MAX_PACKET_SIZE,
     msgIDs,
-    LEN_SIZE,
-    SEQ_SIZE,
-    FROM_SIZE,
-    TO_SIZE,
-    MSG_ID_SIZE,
     CRC_SIZE,
     START_SIZE,
+    PAYLOAD_OFFSET,
+    CRC_STRUCT,
+    PACKET_HEADER_STRUCT,
+    ACK_TIME_STRUCT,
+    STREAM_HEADER_STRUCT,
+    STATUS_STRUCT,
+    HAVE_QUERY_STRUCT,
+    FEEDBACK_STRUCT,
 )
+from Hexlink.packing import decode as unpack_rows
+from seqtrack import SequenceTracker, SEQUENCED
 
 
 class ParseState(Enum):
@@ -47,6 +52,13 @@ class Parser:
         self._payload_size: int = 0
         self.frames: deque[dict] = deque()
 
+        # counters read by metrics.LinkMetrics.snapshot()
+        self.frameCounts: dict[str, int] = {}
+        self.crcErrors: int = 0
+        self.droppedPackets: int = 0
+        self.skippedBytes: int = 0
+        self.sequences: SequenceTracker = SequenceTracker()  # per-source gaps, duplicates and reorders
+
     def parse(self, buffer: bytearray) -> None:
         """
         Consume as many packets from buffer as possible.
@@ -58,26 +70,32 @@ class Parser:
                 case ParseState.AWAIT_START:
                     idx = buffer.find(START_MARKER[0])  # Find single byte, not bytes object
                     if idx < 0:
+                        self.skippedBytes += len(buffer)
                         buffer.clear()
                         break
                     if idx > 0:
+                        self.skippedBytes += idx
                         del buffer[:idx]
                     self.state = ParseState.AWAIT_HEADER
 
                 case ParseState.AWAIT_HEADER:
-                    # Need: START(1) + LEN(4) + SEQ(4) + FROM(1) + TO(1) + MSG_ID(1) = 12 bytes minimum
-                    if len(buffer) < 12:
+                    # Need: START + PacketHeader (LEN, SEQ, FROM, TO, MSG_ID)
+                    if len(buffer) < PAYLOAD_OFFSET:
                         break
-                    start_marker = buffer[0]  # Should be START_MARKER[0]
-                    self._packet_length = struct.unpack_from("<I", buffer, 1)[0]  # bytes 1-4
-                    self._sequence = struct.unpack_from("<I", buffer, 5)[0]  # bytes 5-8
-                    self._from_id = buffer[9]  # byte 9
-                    self._to_id = buffer[10]  # byte 10
-                    self._msg_id = buffer[11]  # byte 11
+                    (
+                        self._packet_length,
+                        self._sequence,
+                        self._from_id,
+                        self._to_id,
+                        self._msg_id,
+                    ) = PACKET_HEADER_STRUCT.unpack_from(buffer, START_SIZE)
 
                     self._payload_size = self._packet_length - PACKET_OVERHEAD
 
-                    if self._payload_size < 0 or self._packet_length < PACKET_OVERHEAD:
+                    if self._payload_size < 0 or not PACKET_OVERHEAD <= self._packet_length <= MAX_PACKET_SIZE:
+                        # not a real header: skip this start byte and resync on the next one
+                        del buffer[:1]
+                        self.skippedBytes += 1
                         self.state = ParseState.PACKET_ERROR
                     else:
                         self.state = ParseState.AWAIT_PAYLOAD
@@ -89,17 +107,17 @@ class Parser:
 
                 case ParseState.PACKET_FOUND:
                     # Extract payload and CRC
-                    payload_start = 12  # START(1) + LEN(4) + SEQ(4) + FROM(1) + TO(1) + MSG_ID(1)
-                    payload_end = payload_start + self._payload_size
-                    crc_start = payload_end
+                    crc_start = PAYLOAD_OFFSET + self._payload_size
 
-                    payload = bytes(buffer[payload_start:payload_end])
-                    self._crc_expected = struct.unpack_from("<I", buffer, crc_start)[0]
-                    crc_input = bytes(buffer[:crc_start])  # Everything up to but not including CRC
-                    self._crc_computed = zlib.crc32(crc_input) & 0xFFFFFFFF
+                    payload = bytes(buffer[PAYLOAD_OFFSET:crc_start])
+                    (self._crc_expected,) = CRC_STRUCT.unpack_from(buffer, crc_start)
+                    with memoryview(buffer) as view:  # everything up to but not including CRC, without a copy
+                        self._crc_computed = zlib.crc32(view[:crc_start]) & 0xFFFFFFFF
 
                     valid = self._crc_computed == self._crc_expected
                     if valid:
+                        if self._msg_id in SEQUENCED:
+                            self.sequences.add(self._from_id, self._msg_id, self._sequence)
                         full_payload = bytes([self._msg_id]) + payload
                         _id, payloadDecoded = decodePayload(full_payload)
                         frame = {
@@ -109,7 +127,10 @@ class Parser:
                             "msg_id": _id,
                             "payload": payloadDecoded,
                         }
+                        if _id == "ACK" and len(payload) >= ACK_TIME_STRUCT.size:
+                            frame["deviceTime"] = ACK_TIME_STRUCT.unpack_from(payload)[1]  # sender micros()
                         self.frames.append(frame)
+                        self.frameCounts[_id] = self.frameCounts.get(_id, 0) + 1
                         del buffer[: self._packet_length]
                         self.state = ParseState.PACKET_HANDLING
 
@@ -119,6 +140,7 @@ class Parser:
                         )
                         # Remove entire packet from buffer
                         del buffer[: self._packet_length]
+                        self.crcErrors += 1
                         self.state = ParseState.PACKET_ERROR
 
                 case ParseState.PACKET_HANDLING:
@@ -130,6 +152,7 @@ class Parser:
 
                 case ParseState.PACKET_ERROR:
                     print("[Parser.parse] : Dropping Packet")
+                    self.droppedPackets += 1
                     self.state = ParseState.AWAIT_START
 
                 case _:  # default case
@@ -167,8 +190,20 @@ def decodePayload(payload):
             decodedPayload = "CONNECT"
         case "DISCONNECT":
             decodedPayload = "DISCONNECT"
-        case "UPLOAD" | "MOVE":
+        case "UPLOAD" | "QUEUE" | "MOVE":
             decodedPayload = np.frombuffer(payload[1:], dtype=np.float32).reshape(-1, 6)
+        case "STREAM":
+            (firstRow,) = STREAM_HEADER_STRUCT.unpack_from(payload, 1)
+            rows = np.frombuffer(payload, dtype=np.float32, offset=1 + STREAM_HEADER_STRUCT.size).reshape(-1, 6)
+            decodedPayload = {"firstRow": firstRow, "rows": rows}
+        case "PACKED":
+            decodedPayload = unpack_rows(payload[1:])
+        case "HAVE":
+            crc, rows = HAVE_QUERY_STRUCT.unpack_from(payload, 1)
+            decodedPayload = {"crc": crc, "rows": rows}
+        case "STATUS":
+            consumed, received, underruns, flags = STATUS_STRUCT.unpack_from(payload, 1)
+            decodedPayload = {"consumed": consumed, "received": received, "underruns": underruns, "flags": flags}
         case "INFO":
             decodedPayload = payload[1:].decode("utf-8")
         case "FEEDBACK":
@@ -181,12 +216,11 @@ def decodePayload(payload):
 
 def parse_feedback(payload: bytes) -> dict:
 
-    # ---- fixed layout from your packed C struct ----
-    FEEDBACK = struct.Struct("<4B f 2I 8s 8s")  # axisId, mode, armed, calibrated, setPoint, tSend, tRecv, sent[8], recv[8]
-    if len(payload) < 1 + FEEDBACK.size:
-        raise ValueError(f"payload too short: need {1 + FEEDBACK.size} bytes, got {len(payload)}")
+    # ---- Feedback layout from Hexlink/protocol.toml ----
+    if len(payload) < 1 + FEEDBACK_STRUCT.size:
+        raise ValueError(f"payload too short: need {1 + FEEDBACK_STRUCT.size} bytes, got {len(payload)}")
 
-    axisId, mode, armed, calibrated, setPoint, tSend, tRecv, sent, recv = FEEDBACK.unpack_from(payload, 1)
+    axisId, mode, armed, calibrated, setPoint, tSend, tRecv, sent, recv = FEEDBACK_STRUCT.unpack_from(payload, 1)
 
     # ---- helpers (all local so this stays self-contained) ----
     def _u32delta(a, b):  # micros() wrap-safe delta
@@ -387,8 +421,7 @@ def main():
         print(f"Encoded packet: {encoded_packet.hex()}")
 
         # Decode packet structure for verification
-        packet_len = struct.unpack("<I", encoded_packet[1:5])[0]
-        seq_decoded = struct.unpack("<I", encoded_packet[5:9])[0]
+        packet_len, seq_decoded, *_ = PACKET_HEADER_STRUCT.unpack_from(encoded_packet, START_SIZE)
         print(f"Packet length: {packet_len}, Sequence: {seq_decoded}")
 
         received_frames = []
@@ -591,6 +624,32 @@ def main():
         print("CRC validation correctly rejected corrupted packet")
         return True
 
+    def test_sequence_accounting():
+        """Test per-node FEEDBACK sequence accounting: gaps, reorders, replayed runs and restarts"""
+        from Hexlink.protocol import FEEDBACK_STRUCT
+
+        cases = [
+            # (sequences from node 0x0A, expected received, lost, duplicates, reordered, restarts)
+            ("gap and reorder", [0, 1, 3, 2, 4, 7], 6, 2, 0, 1, 0),
+            ("replayed run", [0, 1, 2, 3, 2, 3, 4], 5, 0, 2, 0, 0),
+            ("wrap-around", [0xFFFFFFFE, 0xFFFFFFFF, 0, 1], 4, 0, 0, 0, 0),
+            ("reboot", [*range(100), *range(10)], 110, 0, 0, 0, 1),
+            ("reboot, first frame lost", [*range(200), *range(1, 50)], 249, 0, 0, 0, 1),
+        ]
+        for name, sequence, *expected in cases:
+            parser = Parser(lambda frames: None)
+            buffer = bytearray()
+            for seq in sequence:
+                buffer += encode_packet(seq, msg_bytes[MsgID.FEEDBACK], bytes(FEEDBACK_STRUCT.size), from_id=0x0A)
+            parser.parse(buffer)
+            counts = parser.sequences.snapshot()["sequence"]["0x0A FEEDBACK"]
+            got = [counts[k] for k in ("received", "lost", "duplicates", "reordered", "restarts")]
+            print(f"{name}: received, lost, duplicates, reordered, restarts = {got}")
+            if got != expected:
+                print(f" Expected {expected}")
+                return False
+        return True
+
     # Run all tests
     tests = [
         ("Single Packet Test", test_single_packet),
@@ -598,6 +657,7 @@ def main():
         ("Multiple Packets in Buffer Test", test_multiple_packets_in_buffer),
         ("Partial Packets Test", test_partial_packets),
         ("CRC Validation Test", test_crc_validation),
+        ("Sequence Accounting Test", test_sequence_accounting),
     ]
 
     print("Starting Parser Test Suite")
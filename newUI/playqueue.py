@@ -0,0 +1,77 @@
+"""
+Gapless trajectory queue.
+
+While a trajectory plays, the next one is uploaded with QUEUE into free PSRAM beside it. The master switches to it
+in motorTick when the active one ends, carrying the fractional row over, and reports the switch with a STATUS whose
+QUEUED flag is clear. Files queued while the device slot is taken wait here and go out one per switch, so a test
+campaign plays back to back instead of idling through STOP -> UPLOAD -> PLAY for every file.
+"""
+
+from collections import deque
+from threading import Lock
+from Hexlink.commands import STATUS_QUEUED
+
+
+class PlayQueue:
+    def __init__(self):
+        self.pending: deque[dict] = deque()  # QUEUE requests not sent yet, oldest first
+        self.onDevice: dict | None = None  # QUEUE request uploaded, waiting behind the active trajectory
+        self.switches: int = 0  # device switch count at the last STATUS
+        self.played: int = 0  # trajectories switched to since the queue was last cleared
+        self.lock: Lock = Lock()
+
+    def __len__(self) -> int:
+        return len(self.pending) + (self.onDevice is not None)
+
+    def push(self, request: dict) -> bool:
+        """
+        Queue a request. True when the device slot is free and it should be uploaded now, its ACK answers it.
+        Otherwise it waits, answered at once with its place in request["queued"], and goes out untracked later.
+        """
+        with self.lock:
+            if self.onDevice is None:
+                self.onDevice = request
+                return True
+            self.pending.append(request)
+            request["queued"] = len(self.pending) + 1
+            return False
+
+    def rejected(self, sequence: int | None = None) -> tuple[dict | None, dict | None]:
+        """
+        The master NAKed the upload (no room beside the active trajectory) or it never went out. Returns the dropped
+        request and the next one to upload in its place (None when none is waiting); a NAK of another sequence is
+        ignored.
+        """
+        with self.lock:
+            dropped = self.onDevice
+            if dropped is None or (sequence is not None and dropped["sequence"] != sequence):
+                return None, None
+            self.onDevice = self.pending.popleft() if self.pending else None
+            return dropped, self.onDevice
+
+    def on_status(self, status: dict) -> tuple[bool, dict | None]:
+        """
+        STATUS outside a stream, its underruns field counts switches. Returns whether the device switched since
+        the last STATUS and, if so, the next request to upload (None when the queue ran dry).
+        """
+        with self.lock:
+            switched = status["underruns"] != self.switches and not status["flags"] & STATUS_QUEUED
+            self.switches = status["underruns"]
+            if not switched or self.onDevice is None:
+                return False, None
+            self.played += 1
+            self.onDevice = self.pending.popleft() if self.pending else None
+            return True, self.onDevice
+
+    def clear(self) -> None:
+        with self.lock:
+            self.pending.clear()
+            self.onDevice = None
+            self.played = 0
+
+    def snapshot(self) -> dict:
+        return {
+            "waiting": len(self.pending),
+            "on_device": self.onDevice.get("filePath", self.onDevice.get("name")) if self.onDevice else None,
+            "played": self.played,
+        }
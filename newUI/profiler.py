@@ -0,0 +1,121 @@
+"""
+In-process sampling profiler.
+
+A daemon thread snapshots every thread's Python stack with sys._current_frames() at a fixed rate and
+counts identical stacks. stop() writes them in collapsed-stack form (one "thread;outer;...;inner count" line
+per stack), which flamegraph.pl, speedscope and inferno read directly.
+
+    HEXAPOD_PROFILE=1 python main.py          # profile the GUI and serial processes from startup
+    HEXAPOD_PROFILE_HZ=500                    # sampling rate, default 250 Hz
+"""
+
+import os
+import sys
+import time
+import threading
+from collections import Counter
+
+PROFILE_ENV: str = "HEXAPOD_PROFILE"
+PROFILE_HZ_ENV: str = "HEXAPOD_PROFILE_HZ"
+DEFAULT_HZ: float = 250.0
+MAX_DEPTH: int = 128
+
+
+def profiling_requested() -> bool:
+    return os.environ.get(PROFILE_ENV, "").strip().lower() not in ("", "0", "false", "no", "off")
+
+
+def _label(code) -> str:
+    return f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})"
+
+
+class StackSampler:
+    def __init__(self, name: str, hz: float | None = None, directory: str = "logs"):
+        self.name: str = name
+        self.hz: float = hz or float(os.environ.get(PROFILE_HZ_ENV, DEFAULT_HZ))
+        self.directory: str = directory
+        self.stacks: Counter = Counter()
+        self.samples: int = 0
+        self._labels: dict = {}  # code object -> label, so formatting is paid once per function
+        self._stop: threading.Event = threading.Event()
+        self._thread: threading.Thread | None = None
+        self._started: str = ""
+
+    @property
+    def running(self) -> bool:
+        return self._thread is not None and self._thread.is_alive()
+
+    def start(self) -> None:
+        if self.running:
+            return
+        self.stacks.clear()
+        self.samples = 0
+        self._stop.clear()
+        self._started = time.strftime("%Y-%m-%d-%H-%M-%S")
+        self._thread = threading.Thread(target=self._run, name=f"StackSampler-{self.name}", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> str | None:
+        """Stop sampling and write the collapsed stacks. Returns the file path, None if nothing was sampled."""
+        if self._thread is None:
+            return None
+        self._stop.set()
+        self._thread.join()
+        self._thread = None
+        return self.write()
+
+    def _run(self) -> None:
+        period = 1.0 / self.hz
+        me = threading.get_ident()
+        labels = self._labels
+        deadline = time.perf_counter()
+        while not self._stop.is_set():
+            names = {t.ident: t.name for t in threading.enumerate()}
+            for ident, frame in sys._current_frames().items():
+                if ident == me:
+                    continue
+                stack = []
+                while frame is not None and len(stack) < MAX_DEPTH:
+                    code = frame.f_code
+                    label = labels.get(code)
+                    if label is None:
+                        label = labels[code] = _label(code)
+                    stack.append(label)
+                    frame = frame.f_back
+                stack.append(names.get(ident, f"thread-{ident}"))
+                self.stacks[tuple(reversed(stack))] += 1
+            self.samples += 1
+            deadline += period
+            delay = deadline - time.perf_counter()
+            if delay > 0:
+                self._stop.wait(delay)
+            else:
+                deadline = time.perf_counter()  # fell behind, do not burst to catch up
+
+    def write(self) -> str | None:
+        if not self.stacks:
+            return None
+        os.makedirs(self.directory, exist_ok=True)
+        path = os.path.join(self.directory, f"profile-{self.name}-{self._started}.folded")
+        with open(path, "w", encoding="utf-8") as f:
+            for stack, count in sorted(self.stacks.items()):
+                f.write(f"{';'.join(stack)} {count}\n")
+        print(f"[StackSampler] : {self.samples} samples at {self.hz:g} Hz written to {path}")
+        return path
+
+
+if __name__ == "__main__":
+    # Self-check: profile a busy thread for half a second and print the hottest stacks
+    def busy():
+        end = time.perf_counter() + 0.5
+        while time.perf_counter() < end:
+            sum(i * i for i in range(1000))
+
+    sampler = StackSampler("selftest", directory=os.path.join("logs", "selftest"))
+    sampler.start()
+    worker = threading.Thread(target=busy, name="Busy")
+    worker.start()
+    worker.join()
+    path = sampler.stop()
+    for stack, count in sampler.stacks.most_common(3):
+        print(count, ";".join(stack))
@@ -0,0 +1,144 @@
+"""
+Capture replay.
+
+Reads a logs/*.bin capture back in the chunks it was received in, using the .idx sidecar written by file_writer
+for the chunk boundaries and their host arrival times, and hands them to a sink at the original pace, N times
+faster, or as fast as the sink takes them (speed 0). Captures without a .idx are cut into CHUNK_BYTES pieces and
+can only be replayed flat out.
+
+Sinks are fn(t_ns, data): serialServer.replay() feeds SerialProtocol.data_received (Parser and handle_frame exactly
+as live, stamped with the recorded arrival times, so clock sync and latency statistics come out the same), and
+TeensyEmulator.replayCapture() writes the bytes to its pty so the whole host stack runs against them.
+
+    python replay.py logs/2025-01-01-12-00-00.bin --speed 0     # headless, reports parse throughput
+    python main.py --replay logs/2025-01-01-12-00-00.bin --replay-speed 2
+"""
+
+import os
+import time
+import struct
+import argparse
+from threading import Event
+from clocksync import IDX_RECORD
+from Hexlink.commands import START_MARKER, START_SIZE, PACKET_OVERHEAD, MAX_PACKET_SIZE
+
+CHUNK_BYTES: int = 4096  # chunking for captures without a .idx, about one USB read
+
+
+def load_capture(path: str) -> list[tuple[int | None, bytes]]:
+    """[(host_time_ns or None, chunk)] in capture order."""
+    with open(path, "rb") as f:
+        data = f.read()
+    idxPath = os.path.splitext(path)[0] + ".idx"
+    if not os.path.exists(idxPath):
+        return [(None, data[i : i + CHUNK_BYTES]) for i in range(0, len(data), CHUNK_BYTES)]
+
+    with open(idxPath, "rb") as f:
+        raw = f.read()
+    records = list(IDX_RECORD.iter_unpack(raw[: len(raw) - len(raw) % IDX_RECORD.size]))
+    chunks = []
+    for i, (offset, t_ns) in enumerate(records):
+        end = records[i + 1][0] if i + 1 < len(records) else len(data)
+        if offset < min(end, len(data)):  # the .bin may be shorter than its index after a crash
+            chunks.append((t_ns, data[offset:end]))
+    return chunks
+
+
+def packet_aligned(chunks: list[tuple[int | None, bytes]]) -> list[tuple[int | None, bytes]]:
+    """
+    Regroup chunks so every one ends on a packet boundary, for sinks that interleave their own packets between
+    writes (the emulator ACKs live heartbeats). Bytes that are not a plausible header are passed through as they are.
+    """
+    out = []
+    pending = bytearray()
+    pos = 0  # start of the first packet not yet complete in pending
+    for t_ns, chunk in chunks:
+        pending += chunk
+        while pos + START_SIZE + 4 <= len(pending):
+            if pending[pos] != START_MARKER[0]:
+                pos += 1
+                continue
+            length = struct.unpack_from("<I", pending, pos + START_SIZE)[0]
+            if not PACKET_OVERHEAD <= length <= MAX_PACKET_SIZE:
+                pos += 1
+            elif pos + length <= len(pending):
+                pos += length
+            else:
+                break
+        if pos:
+            out.append((t_ns, bytes(pending[:pos])))
+            del pending[:pos]
+            pos = 0
+    if pending:
+        out.append((chunks[-1][0], bytes(pending)))
+    return out
+
+
+class CaptureReplay:
+    def __init__(self, path: str, speed: float = 1.0, aligned: bool = False):
+        """
+        speed: 1.0 for the original pace, 10.0 for ten times faster, 0 for as fast as the sink allows.
+        aligned: cut at packet boundaries instead of the recorded chunk boundaries, see packet_aligned().
+        """
+        self.path: str = path
+        self.speed: float = speed
+        self.chunks: list[tuple[int | None, bytes]] = load_capture(path)
+        if aligned:
+            self.chunks = packet_aligned(self.chunks)
+        self.bytes: int = sum(len(chunk) for _, chunk in self.chunks)
+        times = [t for t, _ in self.chunks if t is not None]
+        self.timed: bool = bool(times)
+        self.duration_s: float = (times[-1] - times[0]) / 1e9 if times else 0.0
+
+    def run(self, sink, stopEvent: Event | None = None) -> dict:
+        """Feed every chunk to sink(t_ns, data). Returns throughput and pacing figures."""
+        paced = self.speed > 0 and self.timed
+        if self.speed > 0 and not self.timed:
+            print(f"[CaptureReplay] : no .idx for {self.path}, replaying as fast as possible")
+        first = next((t for t, _ in self.chunks if t is not None), 0)
+        start = time.perf_counter()
+        late = 0.0
+        sent = 0
+        for t_ns, chunk in self.chunks:
+            if stopEvent is not None and stopEvent.is_set():
+                break
+            if paced and t_ns is not None:
+                delay = start + (t_ns - first) / 1e9 / self.speed - time.perf_counter()
+                if delay > 0:
+                    time.sleep(delay)
+                else:
+                    late = max(late, -delay)
+            sink(t_ns, chunk)
+            sent += len(chunk)
+        elapsed = time.perf_counter() - start
+        return {
+            "path": self.path,
+            "bytes": sent,
+            "chunks": len(self.chunks),
+            "elapsed_s": elapsed,
+            "capture_s": self.duration_s,
+            "speed": self.duration_s / elapsed if elapsed > 0 and self.timed else None,
+            "mb_per_s": sent / elapsed / 1e6 if elapsed > 0 else 0.0,
+            "max_late_ms": late * 1e3,
+        }
+
+
+if __name__ == "__main__":
+    from serial_process_threaded import serialServer
+
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("path", help="logs/*.bin capture")
+    ap.add_argument("--speed", type=float, default=0.0, help="1 for real time, N for N times faster, 0 for max")
+    args = ap.parse_args()
+
+    server = serialServer(pipe=None)
+    stats = server.replay(args.path, args.speed)
+    metrics = server.metricsSnapshot()
+    print(
+        f"{stats['bytes']:,} B in {stats['elapsed_s']:.3f} s ({stats['mb_per_s']:.2f} MB/s), "
+        f"parse {metrics['parse_us_per_chunk']:.1f} µs/chunk, max {metrics['parse_us_max']:.1f} µs"
+    )
+    print(f"frames {metrics['frames']}, crc errors {metrics['crc_errors']}, skipped {metrics['skipped_bytes']} B")
+    for axis, latency in metrics["latency"].items():
+        if latency.get("count"):
+            print(f"AXIS {axis} latency {latency['mean_us']:.0f} ±{latency['std_us']:.0f} µs")
@@ -0,0 +1,223 @@
+"""
+Per-source sequence accounting: frames lost, duplicated and reordered on their way from each node.
+
+Only FEEDBACK is counted. Every slave numbers its FEEDBACK frames with its own uint32 counter (STFW sendFeedback),
+one step per frame, while ACK and NAK echo the host's request sequence and STATUS and INFO carry millis(), so gaps
+in those mean nothing. Each (node, msg id) source keeps the highest sequence seen, unwrapped past 2**32, and a
+bitmap of the WINDOW sequences below it, as RTP receivers do (RFC 3550 A.1):
+
+    ahead of the highest          the frames skipped are lost, until they turn up
+    behind, not seen yet          reordered, and no longer lost
+    behind, seen already          duplicated
+    further behind than WINDOW    the node restarted its counter (a slave reboot), and counting starts over
+
+A duplicate followed by its successors may be a replayed chunk or a reboot inside the window. The run is held back
+until it settles: it is a restart once it starts at 0 (the first frame after a reboot) or reaches RESTART_RUN frames
+in order, and ordinary duplicates and reorders as soon as it breaks. Counters lag by at most that run.
+
+lost = expected - received, expected spanning the first to the highest sequence of each run between restarts.
+Gaps, duplicates, reorders and restarts are also kept as events; serialServer stamps them with the arrival time of
+their chunk and records them next to the capture, <capture>.seq, as SEQ_RECORDs. read_events() reads them back.
+
+    python seqtrack.py logs/2025-01-01-12-00-00.bin    # loss summary of a capture
+"""
+
+import os
+import argparse
+import numpy as np
+from collections import deque
+from Hexlink.protocol import MsgID
+
+SEQUENCED: frozenset[int] = frozenset({MsgID.FEEDBACK})
+WINDOW: int = 1024  # sequences behind the highest still told apart as reordered or duplicated
+WINDOW_MASK: int = (1 << WINDOW) - 1
+RESTART_RUN: int = 32  # in-order frames below the highest that prove a restart
+EVENTS_MAX: int = 4096  # events kept until pack_events() takes them, the oldest go first
+SEQ_MASK: int = 0xFFFFFFFF
+GAP, DUPLICATE, REORDERED, RESTART = 1, 2, 3, 4
+KINDS: dict[int, str] = {GAP: "gap", DUPLICATE: "duplicate", REORDERED: "reordered", RESTART: "restart"}
+# host time ns, node, msg id, kind, sequence, frames (lost by a GAP, 1 otherwise)
+SEQ_RECORD = np.dtype(
+    [("t_ns", "<u8"), ("node", "u1"), ("msg", "u1"), ("kind", "u1"), ("pad", "u1"), ("seq", "<u4"), ("count", "<u4")]
+)
+
+
+class SequenceSource:
+    """Counters of one (node, msg id) sequence."""
+
+    __slots__ = (
+        "base",
+        "high",
+        "seen",
+        "pending",
+        "runReceived",
+        "received",
+        "duplicates",
+        "reordered",
+        "restarts",
+        "lostBefore",
+    )
+
+    def __init__(self, seq: int):
+        self.received: int = 0
+        self.duplicates: int = 0
+        self.reordered: int = 0
+        self.restarts: int = 0
+        self.lostBefore: int = 0  # lost in runs before the last restart
+        self.start(seq)
+
+    def start(self, seq: int) -> None:
+        self.base: int = seq  # first sequence of the run, unwrapped like high
+        self.high: int = seq
+        self.seen: int = 1  # bit i set when high - i has arrived
+        self.pending: list[int] = []  # consecutive frames behind high, from a duplicate on: a restart or a replay
+        self.runReceived: int = 1
+        self.received += 1
+
+    @property
+    def lost(self) -> int:
+        return self.lostBefore + (self.high - self.base + 1) - self.runReceived
+
+    def snapshot(self) -> dict:
+        expected = self.received + self.lost
+        return {
+            "received": self.received,
+            "lost": self.lost,
+            "duplicates": self.duplicates,
+            "reordered": self.reordered,
+            "restarts": self.restarts,
+            "loss_ratio": self.lost / expected if expected else 0.0,
+        }
+
+
+class SequenceTracker:
+    """Fed by Parser with every valid frame of a SEQUENCED type; counters are read by metrics.LinkMetrics.snapshot()."""
+
+    def __init__(self):
+        self.sources: dict[tuple[int, int], SequenceSource] = {}
+        self.events: deque[tuple[int, int, int, int, int]] = deque(maxlen=EVENTS_MAX)
+
+    def add(self, node: int, msg: int, seq: int) -> None:
+        source = self.sources.get((node, msg))
+        if source is None:
+            self.sources[(node, msg)] = SequenceSource(seq)
+            return
+        delta = (seq - source.high) & SEQ_MASK
+        if delta == 0 or delta >= 0x80000000:
+            self._behind(source, node, msg, seq, (0x100000000 - delta) & SEQ_MASK)
+            return
+        if source.pending:
+            self._settle(source, node, msg)
+        if delta > 1:
+            self.events.append((node, msg, GAP, seq, delta - 1))
+        source.high += delta
+        source.seen = ((source.seen << delta) | 1) & WINDOW_MASK if delta < WINDOW else 1
+        source.runReceived += 1
+        source.received += 1
+
+    def _behind(self, source: SequenceSource, node: int, msg: int, seq: int, back: int) -> None:
+        pending = source.pending
+        if pending and seq == (pending[-1] + 1) & SEQ_MASK:
+            pending.append(seq)
+            if pending[0] == 0 or len(pending) >= RESTART_RUN:
+                self._restart(source, node, msg)
+            return
+        if pending:
+            self._settle(source, node, msg)
+        if back >= WINDOW:
+            pending.append(seq)
+            self._restart(source, node, msg)
+        elif source.seen >> back & 1:
+            pending.append(seq)
+        else:
+            self._classify(source, node, msg, seq, back)
+
+    def _classify(self, source: SequenceSource, node: int, msg: int, seq: int, back: int) -> None:
+        if source.seen >> back & 1:
+            source.duplicates += 1
+            self.events.append((node, msg, DUPLICATE, seq, 1))
+        else:
+            source.seen |= 1 << back
+            source.runReceived += 1
+            source.received += 1
+            source.reordered += 1
+            self.events.append((node, msg, REORDERED, seq, 1))
+
+    def _settle(self, source: SequenceSource, node: int, msg: int) -> None:
+        """The held-back run broke off: its frames were duplicates and reorders after all."""
+        for seq in source.pending:
+            self._classify(source, node, msg, seq, (source.high - seq) & SEQ_MASK)
+        source.pending.clear()
+
+    def _restart(self, source: SequenceSource, node: int, msg: int) -> None:
+        """The counter went back: the held-back run is the start of a new one."""
+        first, *rest = source.pending
+        source.lostBefore = source.lost
+        source.restarts += 1
+        source.start(first)
+        self.events.append((node, msg, RESTART, first, 1))
+        for seq in rest:
+            self.add(node, msg, seq)
+
+    def pack_events(self, t_ns: int) -> bytes:
+        """The events so far as SEQ_RECORDs stamped t_ns, and forget them."""
+        records = np.zeros(len(self.events), dtype=SEQ_RECORD)
+        if len(records):
+            node, msg, kind, seq, count = zip(*self.events)
+            records["t_ns"], records["node"], records["msg"] = t_ns, node, msg
+            records["kind"], records["seq"], records["count"] = kind, seq, count
+        self.events.clear()
+        return records.tobytes()
+
+    def snapshot(self) -> dict:
+        sources = {
+            f"0x{node:02X} {MsgID(msg).name}": source.snapshot() for (node, msg), source in sorted(self.sources.items())
+        }
+        totals = {key: sum(s[key] for s in sources.values()) for key in ("received", "lost", "duplicates", "reordered")}
+        expected = totals["received"] + totals["lost"]
+        return {
+            "seq_lost": totals["lost"],
+            "seq_duplicates": totals["duplicates"],
+            "seq_reordered": totals["reordered"],
+            "seq_restarts": sum(s["restarts"] for s in sources.values()),
+            "seq_loss_ratio": totals["lost"] / expected if expected else 0.0,
+            "sequence": sources,
+        }
+
+
+def read_events(path: str) -> np.ndarray:
+    """SEQ_RECORDs of a capture: the .seq next to a .bin, or the .seq itself. Empty when there is none."""
+    path = os.path.splitext(path)[0] + ".seq"
+    if not os.path.exists(path):
+        return np.zeros(0, dtype=SEQ_RECORD)
+    return np.fromfile(path, dtype=SEQ_RECORD)
+
+
+def summary(events: np.ndarray, bin_s: float = 1.0) -> list[str]:
+    """Per source event totals, and the bin_s windows that lost the most frames."""
+    lines = []
+    for node, msg in sorted(set(zip(events["node"].tolist(), events["msg"].tolist()))):
+        ev = events[(events["node"] == node) & (events["msg"] == msg)]
+        counts = {name: int(ev["count"][ev["kind"] == kind].sum()) for kind, name in KINDS.items()}
+        lines.append(
+            f"node 0x{node:02X} {MsgID(msg).name:<9} lost {counts['gap']:,} in {int((ev['kind'] == GAP).sum()):,} gaps,"
+            f" {counts['duplicate']:,} duplicated, {counts['reordered']:,} reordered, {counts['restart']:,} restarts"
+        )
+    gaps = events[events["kind"] == GAP]
+    if len(gaps):
+        t0 = events["t_ns"].min()
+        bins = ((gaps["t_ns"] - t0) / (bin_s * 1e9)).astype(np.int64)
+        lost = np.bincount(bins, weights=gaps["count"])
+        for b in np.argsort(lost)[::-1][:5]:
+            if lost[b]:
+                lines.append(f"  {b * bin_s:8.1f} s  {int(lost[b]):,} frames lost")
+    return lines
+
+
+if __name__ == "__main__":
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("capture", help="logs/*.bin capture, or its .seq")
+    ap.add_argument("--bin-s", type=float, default=1.0, help="window of the worst-loss listing, s")
+    args = ap.parse_args()
+    events = read_events(args.capture)
+    print("\n".join(summary(events, args.bin_s)) if len(events) else "no sequence events recorded")
@@ -4,19 +4,31 @@ import serial
 import serial.threaded
 import numpy as np
 from parser import Parser, print_feedback_line
+from metrics import LinkMetrics
+from profiler import StackSampler, profiling_requested
+from clocksync import ClockSync, host_time_ns, IDX_RECORD
+from linkhealth import LinkMonitor, HEARTBEAT_PERIOD_S, HEARTBEAT_MAX_MISSED
+from replay import CaptureReplay
+from streaming import TrajectoryStreamer, csv_chunks, array_chunks, STREAM_AUTO_BYTES
+from playqueue import PlayQueue
+import trajectory
+from generators import generate
+from kinematics import to_actuators
 from Hexlink.commands import *
 from multiprocessing import Process, Queue
-from more_itertools import chunked
-from threading import Thread, Event
+from threading import Thread, Event, Lock, current_thread
 
 np.set_printoptions(precision=6, suppress=True)
 
+BULK_WRITE_BYTES: int = 64 * 1024  # writes this large hold the link long enough to suspend heartbeat timeouts
+
 
 class SerialProtocol(serial.threaded.Protocol):
     """Protocol class for handling serial communication using serial.threaded"""
 
-    def __init__(self, serial_server):
+    def __init__(self, serial_server, record: bool = True):
         self.serial_server = serial_server
+        self.record = record  # False when replaying a capture, it is already on disk
         self.buffer = bytearray()
 
     def connection_made(self, transport):
@@ -24,15 +36,34 @@ class SerialProtocol(serial.threaded.Protocol):
         self.transport = transport
         print("Serial connection established")
 
-    def data_received(self, data):
-        """Called when data is received from serial port"""
+    def data_received(self, data, now: int | None = None):
+        """Called when data is received from serial port, or by replay() with the recorded arrival time"""
         try:
+            now = host_time_ns() if now is None else now
+            self.serial_server.chunkTime = now
+            metrics = self.serial_server.metrics
+            metrics.bytes_in += len(data)
+            metrics.chunks_in += 1
             self.buffer.extend(data)
-            self.serial_server.byteBuffer.put(data)
+            if self.record:
+                self.serial_server.byteBuffer.put((now, data))
+            if len(self.buffer) > metrics.buffer_hwm:
+                metrics.buffer_hwm = len(self.buffer)
 
             # Process complete packets
             if len(self.buffer) >= MIN_PACKET_SIZE:
+                t0 = time.perf_counter_ns()
                 self.serial_server.parser.parse(self.buffer)
+                elapsed = time.perf_counter_ns() - t0
+                metrics.parse_ns += elapsed
+                if elapsed > metrics.parse_ns_max:
+                    metrics.parse_ns_max = elapsed
+            self.serial_server.flush_feedback()
+            sequences = self.serial_server.parser.sequences
+            if sequences.events:
+                records = sequences.pack_events(now)
+                if self.record:
+                    self.serial_server.byteBuffer.put((None, records))
 
         except Exception as e:
             print(f"[data_received] : Exception: {e} | Data : {data}")
@@ -52,8 +83,20 @@ class SerialProtocol(serial.threaded.Protocol):
 
 
 class serialServer:
-    def __init__(self, pipe):
+    def __init__(
+        self,
+        pipe,
+        feedbackQueue=None,
+        heartbeatPeriod: float = HEARTBEAT_PERIOD_S,
+        maxMissed: int = HEARTBEAT_MAX_MISSED,
+        name: str = "",
+    ):
         self.pipe = pipe
+        self.name: str = name  # link name under a MultiLinkServer, also tags the capture file
+        self.heartbeatPeriod: float = heartbeatPeriod
+        self.maxMissed: int = maxMissed
+        self.feedbackQueue = feedbackQueue
+        self.feedbackBatch: list[tuple] = []
         self.running: bool = False
         self.portStr: str = ""
         self.filePath: str = ""
@@ -61,10 +104,25 @@ class serialServer:
         self.byteBuffer = Queue()
         self.startTimeStr = time.strftime("%Y-%m-%d-%H-%M-%S")
         self.parser = None  # Will be initialized in run()
+        self.metrics: LinkMetrics = LinkMetrics()
+        self.clock: ClockSync = ClockSync()
+        self.chunkTime: int = 0  # host_time_ns() of the chunk being parsed, stamped onto its frames
+        self.linkMonitor: LinkMonitor | None = None  # created in run() with the other threads
+        self.writeLock = None
+        self.profiler: StackSampler | None = None  # created in run(), it holds thread primitives
+        self.replayStop: Event | None = None
+        self.replayT: Thread | None = None
+        self.streamer: TrajectoryStreamer | None = None
+        self.streamT: Thread | None = None
+        self.playQueue: PlayQueue | None = None  # created in startWorkers(), it holds a Lock
+        self.deviceHolds: tuple[int, int] | None = None  # (payload CRC32, rows) of the device trajectory, None if unknown
+        self.pendingUploads: dict[int, tuple[bytearray | None, tuple[int, int]]] = {}  # sequence -> (packet, key)
+        self.uploadsSkipped: int = 0
+        self._writer: Process | None = None
         self.protocol = None
         self.serial_worker = None
         self.port: serial.Serial = serial.Serial(port=None, timeout=None)
-        self.path = f"logs/{self.startTimeStr}.bin"
+        self.path = f"logs/{self.startTimeStr}-{name}.bin" if name else f"logs/{self.startTimeStr}.bin"
 
     @property
     def connected(self) -> bool:
@@ -74,6 +132,14 @@ class serialServer:
             print(f"[connected] : Error - {e}")
             return False
 
+    @property
+    def replaying(self) -> bool:
+        return self.replayT is not None and self.replayT.is_alive()
+
+    @property
+    def streaming(self) -> bool:
+        return self.streamT is not None and self.streamT.is_alive()
+
     def connect(self):
         if not self.portStr:
             print("[connect] : No Port Selected")  # should not happen, but still here to handle gracefully
@@ -82,17 +148,25 @@ class serialServer:
         if self.connected and (self.port.port == self.portStr):  # Only disconnect if we're actually connected
             return True
 
+        if self.replaying:
+            print("[connect] : Replay in progress")
+            return False
+
         try:
             self.port.open()
             self.serial_worker = serial.threaded.ReaderThread(self.port, lambda: SerialProtocol(self))
             self.serial_worker.start()
             self.transport, self.protocol = self.serial_worker.connect()
+            self.linkMonitor.activate()
+            self.deviceHolds = None  # PSRAM outlives the host session, ask before assuming anything
             return True
         except Exception as e:
             print(f"[connect] : Error opening port - {e}")
             return False
 
     def disconnect(self):
+        self.linkMonitor.deactivate()
+        self.endPlayback()
         if not self.connected:
             return True
         try:
@@ -110,6 +184,8 @@ class serialServer:
         """Called by protocol when connection is lost"""
         self.serial_worker = None
         self.protocol = None
+        self.linkMonitor.deactivate()
+        self.endPlayback()
         if popup:
             self.sendResponse({"event": "DISCONNECT", "sequence": -1, "popup": "Connection lost"}, True)
         try:
@@ -118,31 +194,234 @@ class serialServer:
         except Exception as e:
             print(f"[on_connection_lost] : Error closing port - {e} | {self.port.is_open}")
 
-    def sendData(self, data: bytes, sequence: int):
+    def sendData(self, data: bytes, sequence: int, track: bool = True):
         if not self.connected or not data:
             print(f"[sendData] Aborted: connected={self.connected}, data_length={len(data) if data else 0}")
             return False
+        bulk = len(data) >= BULK_WRITE_BYTES
+        if bulk:
+            self.linkMonitor.suspend()
         try:
             if self.protocol and self.protocol.transport:
                 byteSent = 0
-                startTime_ns = time.perf_counter_ns()
-                for chunk in chunked(data, 2048):
-                    chunk_bytes = bytes(chunk)
-                    self.protocol.transport.write(chunk_bytes)
-                    byteSent += len(chunk_bytes)
-                # self.protocol.transport.write(data)
-                # byteSent += len(data)
-                elapsedTime_ns = time.perf_counter_ns() - startTime_ns
-                if elapsedTime_ns > 1:
+                if track:
+                    self.sequenceList.append(sequence)  # before the write: a fast ACK can arrive before it returns
+                with self.writeLock:  # heartbeats are written from the monitor thread
+                    startTime_ns = time.perf_counter_ns()
+                    view = memoryview(data)
+                    for start in range(0, len(view), 2048):
+                        chunk_bytes = bytes(view[start : start + 2048])
+                        self.protocol.transport.write(chunk_bytes)
+                        byteSent += len(chunk_bytes)
+                    # self.protocol.transport.write(data)
+                    # byteSent += len(data)
+                    elapsedTime_ns = time.perf_counter_ns() - startTime_ns
+                self.metrics.bytes_out += byteSent
+                self.metrics.writes += 1
+                self.metrics.send_ns += elapsedTime_ns
+                if track and elapsedTime_ns > 1:
                     print(
                         f"[sendData] : Sent {byteSent} bytes in {elapsedTime_ns / 1e6:.2f} ms ({(byteSent * 1e9) / (elapsedTime_ns * 1024):.2f} KB/s)"
                     )
-                if byteSent == len(data):
-                    self.sequenceList.append(sequence)
-                    return True
+                return True
         except Exception as e:
             print(f"[sendData] : Error in sendData - {e}")
+            if track and sequence in self.sequenceList:
+                self.sequenceList.remove(sequence)
+            return False
+        finally:
+            if bulk:
+                self.linkMonitor.resume()
+
+    def sendHeartbeat(self, sequence: int) -> bool:
+        return bool(self.sendData(heartbeat(sequence), sequence=sequence, track=False))
+
+    def linkDead(self, reason: str):
+        """Called by the LinkMonitor thread: tell the GUI FSM and drop the port without waiting for the OS."""
+        print(f"[linkDead] : {reason}")
+        self.sendResponse({"event": "DISCONNECT", "sequence": -1, "popup": f"Link lost: {reason}"}, True)
+        self.disconnect()
+
+    def startStream(self, request: dict, to: int):
+        """
+        UPLOAD a trajectory too large for PSRAM as a stream: the UPLOAD is answered once the device window is full,
+        so the FSM goes to READY and PLAY starts it; a STOP with the stream statistics follows when it has drained.
+        """
+        self.cancelStream()
+        self.deviceHolds = None  # the stream ring starts at row 0
+        answered = Event()
+
+        def primed():
+            answered.set()
+            self.sendResponse(request, True)
+
+        def send(sequence: int, firstRow: int, rows: np.ndarray) -> bool:
+            return bool(self.sendData(stream(sequence, firstRow, rows, to_id=to), sequence=sequence, track=False))
+
+        def run():
+            try:
+                stats = self.streamer.run()
+            except Exception as e:
+                print(f"[startStream] : Error streaming {request.get('filePath', request.get('generator'))} - {e}")
+                self.streamer.cancel()
+                stats = None
+            if not answered.is_set():
+                self.sendResponse(request, False)
+            elif stats is not None and stats["completed"]:
+                print(f"[startStream] : {stats}")
+                popup = f"Stream finished: {stats['rows_played']:,} rows, {stats['underruns']} underruns"
+                self.sendResponse({"event": "STOP", "sequence": -1, "stream": stats, "popup": popup}, True)
+
+        def generated():
+            yield from array_chunks(generate(*request["generator"]))  # lazily, so a bad spec fails in run()
+
+        chunks = generated() if "generator" in request else csv_chunks(request["filePath"])
+        if request.get("pose"):
+            chunks = (to_actuators(rows, request.get("geometry")) for rows in chunks)
+        self.streamer = TrajectoryStreamer(send, chunks, on_primed=primed)
+        self.streamT = Thread(target=run, name="TrajectoryStreamer", daemon=True)
+        self.streamT.start()
+
+    def cancelStream(self):
+        if self.streamer is not None:
+            self.streamer.cancel()
+        if self.streaming and self.streamT is not current_thread():
+            self.streamT.join()
+
+    def endPlayback(self):
+        """Whatever the device plays next is decided again: drop the stream and the trajectory queue."""
+        self.cancelStream()
+        if self.playQueue is not None:
+            self.playQueue.clear()
+
+    def loadRows(self, request: dict) -> np.ndarray:
+        """
+        Rows of an UPLOAD or QUEUE request: a generators spec, or a file (keyframe files resampled to 1 kHz).
+        With request["pose"] the rows are platform poses, converted to actuator angles for request["geometry"].
+        """
+        rows = generate(*request["generator"]) if "generator" in request else trajectory.load(request["filePath"])
+        if request.get("pose"):
+            rows = to_actuators(rows, request.get("geometry"))
+        return rows
+
+    def uploadPacket(self, request: dict, data_array: np.ndarray, to: int) -> bytearray:
+        """
+        float32 rows, exactly as loaded. PACKED fixed point (lossy, within request["max_error"]) only when the request
+        opts in with request["packed"] and the rows can be packed that closely.
+        """
+        if request.get("packed", False):
+            try:
+                packet = packed(request["sequence"], data_array, to_id=to, max_error=request.get("max_error", PACKED_MAX_ERROR))
+                print(f"[uploadPacket] : PACKED {len(packet):,} B, {data_array.nbytes / len(packet):.2f}x smaller")
+                return packet
+            except ValueError as e:
+                print(f"[uploadPacket] : Sending float32 rows - {e}")
+        return upload(request["sequence"], data_array, to_id=to)
+
+    def sendUpload(self, request: dict, packet: bytearray, rows: int, to: int):
+        """
+        Every UPLOAD asks HAVE first: a hit completes it in one round trip, a miss names the payload to the device
+        (it keeps the name once the rows arrive) and uploadAnswered() sends the packet.
+        """
+        sequence = request["sequence"]
+        key = (payload_crc(packet), rows)
+        self.pendingUploads[sequence] = (packet, key)
+        if not self.sendData(have(sequence, *key, to_id=to), sequence=sequence):
+            self.pendingUploads.pop(sequence, None)
+
+    def uploadAnswered(self, frame: dict) -> bool:
+        """ACK/NAK of a pending UPLOAD. False when it was a HAVE miss and the upload itself is now on its way."""
+        sequence = frame["sequence"]
+        packet, key = self.pendingUploads.pop(sequence)
+        if frame["msg_id"] == "NAK" and frame["payload"] == "HAVE":
+            self.pendingUploads[sequence] = (None, key)
+            Thread(target=self.sendMissed, args=(sequence, packet), name="UploadAfterHave", daemon=True).start()
             return False
+        self.deviceHolds = key if frame["msg_id"] == "ACK" else None
+        if frame["msg_id"] == "ACK" and packet is not None:
+            self.uploadsSkipped += 1
+            print(f"[uploadAnswered] : device already holds {key[1]} rows (crc {key[0]:08x}), upload skipped")
+        return True
+
+    def sendMissed(self, sequence: int, packet: bytearray):
+        # the HAVE sequence stays in sequenceList, the ACK of this packet answers the GUI
+        if not self.sendData(packet, sequence=sequence, track=False):
+            self.pendingUploads.pop(sequence, None)
+            if sequence in self.sequenceList:
+                self.sequenceList.remove(sequence)
+            self.sendResponse({"event": "UPLOAD", "sequence": sequence}, False)
+
+    def sendQueued(self, request: dict):
+        """
+        Upload a QUEUE request into the device slot beside the active trajectory. One that found the slot free is
+        answered by its ACK or NAK; one that waited in the queue was answered when it was pushed, so it goes untracked.
+        """
+        waited = "queued" in request
+        try:
+            data_array = self.loadRows(request)
+        except Exception as e:
+            print(f"[sendQueued] : Error loading trajectory - {e}")
+            if not waited:
+                self.sendResponse(request, False)
+            self.queueRejected()
+            return
+        to = request.get("to", NODE_ID_BROADCAST)
+        self.deviceHolds = None  # the queued rows may land over it
+        packet = queue(request["sequence"], data_array, to_id=to)
+        if not self.sendData(packet, sequence=request["sequence"], track=not waited):
+            if not waited:
+                self.sendResponse(request, False)
+            self.queueRejected()
+
+    def queueRejected(self, sequence: int | None = None):
+        """The upload in the device slot failed: send the next waiting file, or take the FSM out of QUEUED."""
+        dropped, following = self.playQueue.rejected(sequence)
+        if dropped is None:
+            return
+        name = dropped.get("filePath", dropped.get("name"))
+        print(f"[queueRejected] : {name} not queued, {len(self.playQueue)} left")
+        if following is not None:
+            Thread(target=self.sendQueued, args=(following,), name="QueueUpload", daemon=True).start()
+        elif "queued" in dropped:  # its early answer moved the FSM to QUEUED, and nothing is left to leave it there
+            self.sendResponse({"event": "NEXT", "sequence": -1, "played": self.playQueue.played}, True)
+
+    def queueStatus(self, status: dict):
+        """STATUS outside a stream: on a switch, upload the next queued file or tell the FSM the queue is empty."""
+        switched, following = self.playQueue.on_status(status)
+        if not switched:
+            return
+        print(f"[queueStatus] : switched trajectory, {len(self.playQueue)} queued")
+        if following is not None:
+            Thread(target=self.sendQueued, args=(following,), name="QueueUpload", daemon=True).start()
+        else:
+            self.sendResponse({"event": "NEXT", "sequence": -1, "played": self.playQueue.played}, True)
+
+    def replay(self, path: str, speed: float = 0.0) -> dict:
+        """
+        Feed a capture through SerialProtocol.data_received with its recorded arrival times, on a fresh Parser and
+        ClockSync so counters and latency statistics cover the capture alone. Heartbeat send times are not in the
+        capture, so the master clock is not refitted. Blocks until the capture is consumed or replayStop is set.
+        """
+        self.parser = Parser(callback=self.handle_frame)
+        self.clock = ClockSync()
+        self.metrics.reset()
+        if self.linkMonitor is None:  # headless, only is_heartbeat/on_ack are used
+            self.linkMonitor = LinkMonitor(self.sendHeartbeat, self.linkDead)
+        if self.replayStop is None:
+            self.replayStop = Event()
+        self.replayStop.clear()
+        protocol = SerialProtocol(self, record=False)
+        stats = CaptureReplay(path, speed).run(lambda t_ns, data: protocol.data_received(data, t_ns), self.replayStop)
+        print(f"[replay] : {stats['bytes']} bytes from {path} in {stats['elapsed_s']:.2f} s")
+        return stats
+
+    def replayRequest(self, request: dict):
+        try:
+            request["stats"] = self.replay(request["path"], request.get("speed", 1.0))
+            self.sendResponse(request, True)
+        except Exception as e:
+            print(f"[replayRequest] : Error replaying {request.get('path')} - {e}")
+            self.sendResponse(request, False)
 
     def SerialRequestSender(self):
         while self.running:
@@ -151,64 +430,114 @@ class serialServer:
             except Exception as e:
                 print(f"[SerialRequestSender] : Error receiving request - {e}")
                 continue
-
-            match request["event"]:
-
-                case "PORTSELECT":
-                    self.portStr, self.port.port = request["port"], request["port"]
+            if not self.handleRequest(request):
+                break
+
+    def handleRequest(self, request: dict) -> bool:
+        """Act on one GUI request. Returns False on QUIT. request["to"] addresses one node, default broadcast."""
+        to = request.get("to", NODE_ID_BROADCAST)
+        match request["event"]:
+
+            case "PORTSELECT":
+                self.portStr, self.port.port = request["port"], request["port"]
+                self.sendResponse(request, True)
+
+            case "CONNECT":
+                self.connect()
+                if self.connected:
+                    self.sendData(connect(request["sequence"], to_id=to), sequence=request["sequence"])
+                else:
+                    self.sendResponse(request, False)
+
+            case "DISCONNECT":
+                self.sendData(disconnect(request["sequence"], to_id=to), sequence=request["sequence"])
+
+            case "ENABLE":
+                self.sendData(enable(request["sequence"], to_id=to), sequence=request["sequence"])
+
+            case "UPLOAD":
+                self.filePath = request.get("filePath", "")  # get data array only as a dict
+                if "generator" in request:
+                    print(f"[SerialRequestSender] : Generator: {request['generator']}")
+                else:
+                    print(f"[SerialRequestSender] : File Path: {self.filePath}")
+                self.endPlayback()
+                large = os.path.isfile(self.filePath) and os.path.getsize(self.filePath) > STREAM_AUTO_BYTES
+                if request.get("stream", large):
+                    self.startStream(request, to)
+                    return True
+                try:
+                    data_array = self.loadRows(request)
+                    # data_array = np.arange(request["sequence"] * 6).reshape((request["sequence"], 6)).astype(np.float32) + 1
+                except Exception as e:
+                    print(f"[SerialRequestSender] : Error loading trajectory - {e}")
+                    self.sendResponse(request, False)
+                    return True
+                print(f"[SerialRequestSender] : Data Array Size: {data_array.shape}")
+                print(f"[SerialRequestSender] : Data Array Last Row: {data_array[-1]}")
+                self.sendUpload(request, self.uploadPacket(request, data_array, to), len(data_array), to)
+            case "QUEUE":
+                if self.playQueue.push(request):
+                    Thread(target=self.sendQueued, args=(request,), name="QueueUpload", daemon=True).start()
+                else:  # goes out when the device switches to the trajectory ahead of it
                     self.sendResponse(request, True)
+            case "PLAY":
+                self.sendData(play(request["sequence"], to_id=to), sequence=request["sequence"])
 
-                case "CONNECT":
-                    self.connect()
-                    if self.connected:
-                        self.sendData(connect(request["sequence"]), sequence=request["sequence"])
-                    else:
-                        self.sendResponse(request, False)
+            case "PAUSE":
+                self.sendData(pause(request["sequence"], to_id=to), sequence=request["sequence"])
 
-                case "DISCONNECT":
-                    self.sendData(disconnect(request["sequence"]), sequence=request["sequence"])
+            case "STOP":
+                self.endPlayback()
+                self.sendData(stop(request["sequence"], to_id=to), sequence=request["sequence"])
 
-                case "ENABLE":
-                    self.sendData(enable(request["sequence"]), sequence=request["sequence"])
+            case "DISABLE":
+                self.sendData(disable(request["sequence"], to_id=to), sequence=request["sequence"])
 
-                case "UPLOAD":
-                    self.filePath = request["filePath"]  # get data array only as a dict
-                    print(f"[SerialRequestSender] : File Path: {self.filePath}")
-                    try:
-                        data_array = np.loadtxt(fname=self.filePath, delimiter=",", dtype=np.float32)
-                        # data_array = np.arange(request["sequence"] * 6).reshape((request["sequence"], 6)).astype(np.float32) + 1
-                    except Exception as e:
-                        print(f"[SerialRequestSender] : Error loading file - {e}")
-                        self.sendResponse(request, False)
-                    print(f"[SerialRequestSender] : Data Array Size: {data_array.shape}")
-                    print(f"[SerialRequestSender] : Data Array Last Row: {data_array[-1]}")
-                    self.sendData(upload(request["sequence"], data_array), sequence=request["sequence"])
-                case "PLAY":
-                    self.sendData(play(request["sequence"]), sequence=request["sequence"])
-
-                case "PAUSE":
-                    self.sendData(pause(request["sequence"]), sequence=request["sequence"])
-
-                case "STOP":
-                    self.sendData(stop(request["sequence"]), sequence=request["sequence"])
-
-                case "DISABLE":
-                    self.sendData(disable(request["sequence"]), sequence=request["sequence"])
-
-                case "RESET":
-                    self.sendData(reset(request["sequence"]), sequence=request["sequence"])
-
-                case "QUIT":
-                    if self.connected:
-                        self.sendData(quit(request["sequence"]), sequence=request["sequence"])
+            case "RESET":
+                self.endPlayback()
+                self.deviceHolds = None
+                self.sendData(reset(request["sequence"], to_id=to), sequence=request["sequence"])
+
+            case "QUIT":
+                self.endPlayback()
+                if self.connected:
+                    self.sendData(quit(request["sequence"], to_id=to), sequence=request["sequence"])
+                else:
+                    self.sendResponse(request, True)
+                return False
+            case "MOVE":
+                try:
+                    if "pose" in request:  # (x, y, z, roll, pitch, yaw) of the platform
+                        position = to_actuators(request["pose"], request.get("geometry"))[0]
                     else:
-                        self.sendResponse(request, True)
-                    break
-                case "MOVE":
-                    position = np.ones(6) * float(request["position"])
-                    self.sendData(move(request["sequence"], pose=position), sequence=request["sequence"])
-                case _:
-                    print(f"[SerialRequestSender] : Unknown event - {request}")
+                        position = np.ones(6) * float(request["position"])
+                except ValueError as e:
+                    print(f"[SerialRequestSender] : MOVE - {e}")
+                    self.sendResponse(request, False)
+                    return True
+                self.sendData(move(request["sequence"], pose=position, to_id=to), sequence=request["sequence"])
+            case "METRICS":
+                request["metrics"] = self.metricsSnapshot()
+                self.sendResponse(request, True)
+            case "REPLAY":
+                if self.connected or self.replaying:
+                    print("[SerialRequestSender] : Replay needs the port closed and no replay running")
+                    self.sendResponse(request, False)
+                else:
+                    self.replayT = Thread(target=self.replayRequest, args=(request,), name="CaptureReplay", daemon=True)
+                    self.replayT.start()
+            case "PROFILE":
+                if request.get("enable", not self.profiler.running):
+                    self.profiler.start()
+                    request["path"] = None
+                else:
+                    request["path"] = self.profiler.stop()
+                request["enable"] = self.profiler.running
+                self.sendResponse(request, True)
+            case _:
+                print(f"[SerialRequestSender] : Unknown event - {request}")
+        return True
 
     def sendResponse(self, response, success=False):
         response["status"] = success
@@ -221,8 +550,17 @@ class serialServer:
         # print(f"[handle_frame] : {len(frames)} Frames Received: {frames}")
         while frames:
             frame = frames.pop()
+            frame["hostTime"] = self.chunkTime
             match frame["msg_id"]:
+                case "ACK" if self.linkMonitor.is_heartbeat(frame["sequence"]):
+                    sent = self.linkMonitor.on_ack(frame["sequence"], self.chunkTime)
+                    if sent is not None and "deviceTime" in frame:
+                        self.clock.add_roundtrip(frame["from"], sent, frame["deviceTime"], self.chunkTime)
                 case "ACK" | "NAK":
+                    if frame["sequence"] in self.pendingUploads and not self.uploadAnswered(frame):
+                        continue
+                    if frame["payload"] == "QUEUE" and frame["msg_id"] == "NAK" and self.playQueue is not None:
+                        self.queueRejected(frame["sequence"])
                     if frame["sequence"] in self.sequenceList:
                         self.sendResponse({"event": frame["payload"], "sequence": frame["sequence"]}, frame["msg_id"] == "ACK")
                         self.sequenceList.remove(frame["sequence"])
@@ -230,22 +568,60 @@ class serialServer:
                         self.disconnect()
                     if frame["msg_id"] == "QUIT":
                         self.stop()
+                case "STATUS":
+                    if frame["payload"]["flags"] & STATUS_STREAMING:
+                        if self.streamer is not None:
+                            self.streamer.on_status(frame["payload"])
+                    elif self.playQueue is not None:
+                        self.queueStatus(frame["payload"])
                 case "INFO":
                     print(f"[INFO] : {frame['payload']}")
                 case "FEEDBACK":
                     # print_feedback_line(frame["payload"])
-                    pass
+                    payload = frame["payload"]
+                    frame["time"] = self.clock.feedback(frame["from"], payload["axisId"], payload["tRecv"], self.chunkTime)
+                    if self.feedbackQueue is not None:
+                        self.feedbackBatch.append(feedback_sample(frame["payload"]))
                 case _:
                     print(f"[(un)handle_frame] : msg_id={frame['msg_id']}, payload={frame['payload']}")
 
+    def flush_feedback(self):
+        """Ship the FEEDBACK samples decoded from one received chunk to the GUI in a single put"""
+        if self.feedbackBatch:
+            try:
+                self.feedbackQueue.put(self.feedbackBatch)
+            except Exception as e:
+                print(f"[flush_feedback] : Error - {e}")
+            self.feedbackBatch = []
+
+    def metricsSnapshot(self) -> dict:
+        snap = self.metrics.snapshot(
+            self.parser,
+            {
+                "log_writer": self.byteBuffer,
+                "feedback": self.feedbackQueue,
+                "pending_acks": len(self.sequenceList),
+                "rx_buffer": len(self.protocol.buffer) if self.protocol else 0,
+            },
+        )
+        snap["uploads_skipped"] = self.uploadsSkipped
+        snap.update(self.clock.snapshot())
+        snap.update({f"link.{k}": v for k, v in self.linkMonitor.snapshot().items()})
+        if self.streamer is not None:
+            snap.update({f"stream.{k}": v for k, v in self.streamer.snapshot().items()})
+        if self.playQueue is not None:
+            snap.update({f"playqueue.{k}": v for k, v in self.playQueue.snapshot().items()})
+        return snap
+
     def run(self):
         try:
             print("Serial server started.")
-            self.parser = Parser(callback=self.handle_frame)  # Initialize parser here instead of __init__
+            self.profiler = StackSampler("serial")
+            if profiling_requested():
+                self.profiler.start()
             self.running = True
             self.rsT = Thread(target=self.SerialRequestSender, name="SerialRequestSender", daemon=True)
-            self._writer = Process(target=file_writer, args=(self.byteBuffer, self.path))
-            self._writer.start()
+            self.startWorkers()
             self.rsT.start()
             self.rsT.join()
             self.stop()
@@ -256,25 +632,75 @@ class serialServer:
         finally:
             pass
 
+    def startWorkers(self):
+        """Parser, heartbeat monitor and capture writer; everything but the request loop, which a MultiLinkServer owns."""
+        self.parser = Parser(callback=self.handle_frame)  # Initialize parser here instead of __init__
+        self.writeLock = Lock()
+        self.replayStop = Event()
+        self.playQueue = PlayQueue()
+        self.linkMonitor = LinkMonitor(
+            self.sendHeartbeat, self.linkDead, period_s=self.heartbeatPeriod, max_missed=self.maxMissed
+        )
+        self._writer = Process(target=file_writer, args=(self.byteBuffer, self.path))
+        self._writer.start()
+        self.linkMonitor.start()
+
+    def stopWorkers(self):
+        self.endPlayback()
+        if self.linkMonitor is not None:
+            self.linkMonitor.stop()
+        if self.replaying:
+            self.replayStop.set()
+            self.replayT.join()
+        if self.connected:
+            self.disconnect()
+        if self._writer is not None and self._writer.is_alive():
+            self.byteBuffer.put(None)  # to stop writer
+            self._writer.join()
+
     def foo(self):
         pass
 
     def stop(self):
         self.running = False
-        if self.connected:
-            self.disconnect()
+        self.stopWorkers()
         if self.rsT.is_alive():
             self.rsT.join()
-        self.byteBuffer.put(None)  # to stop writer
-        self._writer.join()
+        if self.feedbackQueue is not None:
+            self.feedbackQueue.cancel_join_thread()  # nobody reads feedback after QUIT, it must not hold up the exit
+        if self.profiler is not None and self.profiler.running:
+            self.profiler.stop()
         self.pipe.close()
 
 
+def feedback_sample(payload: dict) -> tuple:
+    """(axisId, setPoint, position, speed, torque) from a decoded FEEDBACK payload, NaN where not decoded"""
+    decoded = payload["rx"]["decoded"] or {}
+    return (
+        payload["axisId"],
+        payload["setPoint"],
+        decoded.get("position_rad", float("nan")),
+        decoded.get("speed_rad_s", float("nan")),
+        decoded.get("torque_Nm", float("nan")),
+    )
+
+
 def file_writer(q: Queue, path: str):
+    """
+    Raw capture to <path>, plus a .idx sidecar of (byte offset, host_time_ns) for every received chunk and a .seq
+    sidecar of the seqtrack events, which arrive as (None, SEQ_RECORDs) and carry their own time.
+    """
     os.makedirs(os.path.dirname(path), exist_ok=True)
-    with open(path, "wb") as file:
-        for chunk in iter(q.get, None):  # sentinel-driven loop
+    offset = 0
+    base = os.path.splitext(path)[0]
+    with open(path, "wb") as file, open(base + ".idx", "wb") as index, open(base + ".seq", "wb") as sequences:
+        for t_ns, chunk in iter(q.get, None):  # sentinel-driven loop
+            if t_ns is None:
+                sequences.write(chunk)
+                continue
+            index.write(IDX_RECORD.pack(offset, t_ns))
             file.write(chunk)
+            offset += len(chunk)
 
 
 if __name__ == "__main__":
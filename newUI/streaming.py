@@ -0,0 +1,157 @@
+"""
+Streaming play for trajectories that do not fit in one UPLOAD.
+
+The master keeps streamed rows in a PSRAM ring and answers every STREAM packet, and every STATUS_PERIOD_MS while
+streaming, with STATUS (rows consumed by motorTick, rows received, underruns). TrajectoryStreamer keeps at most
+window_rows rows ahead of consumption, reading the source one chunk at a time, so trajectory length is unbounded
+and host memory stays at one window. A packet the master dropped (bad CRC) stalls its received count; after
+RESEND_S the unconfirmed chunks are sent again from there, the master ignores rows it already holds.
+"""
+
+import time
+import itertools
+import numpy as np
+from collections import deque
+from threading import Condition, Event
+from Hexlink.commands import STATUS_ENDED, STATUS_DRAINED
+import trajectory
+
+STREAM_CHUNK_ROWS: int = 100  # 2.4 kB per STREAM packet, 10 packets per second at full feed rate
+STREAM_WINDOW_ROWS: int = 2000  # look-ahead held on the device, 2 s of motion
+STREAM_SEQ_BASE: int = 0x40000000  # between GUI requests and heartbeats
+STREAM_AUTO_BYTES: int = 32 * 1024 * 1024  # CSVs this large cannot fit the 16 MB PSRAM as float32 rows anyway
+RESEND_S: float = 0.2
+
+
+def csv_chunks(path: str, rows: int = STREAM_CHUNK_ROWS):
+    """float32 (rows, 6) blocks of a CSV trajectory, read lazily. Keyframe files are resampled whole first."""
+    if trajectory.is_keyframes(path):
+        yield from array_chunks(trajectory.load(path), rows)
+        return
+    with open(path, "r") as f:
+        while True:
+            lines = list(itertools.islice(f, rows))
+            if not lines:
+                return
+            yield np.loadtxt(lines, delimiter=",", dtype=np.float32, ndmin=2)
+
+
+def array_chunks(array: np.ndarray, rows: int = STREAM_CHUNK_ROWS):
+    for start in range(0, len(array), rows):
+        yield np.ascontiguousarray(array[start : start + rows], dtype=np.float32)
+
+
+class TrajectoryStreamer:
+    def __init__(self, send, chunks, window_rows: int = STREAM_WINDOW_ROWS, on_primed=None):
+        """
+        send(seq, firstRow, rows) writes one STREAM packet and returns True if it went out.
+        chunks yields float32 (k, 6) arrays; an empty STREAM marking the end is sent after the last one.
+        on_primed() is called once from run() when the window is full, or the whole trajectory is out.
+        """
+        self.send = send
+        self.chunks = chunks
+        self.on_primed = on_primed
+        self.window_rows: int = window_rows
+        self.cond: Condition = Condition()
+        self.stopEvent: Event = Event()
+        self.primed: bool = False
+        self.inflight: deque[tuple[int, np.ndarray]] = deque()  # sent, not yet confirmed received
+        self.sent: int = 0
+        self.consumed: int = 0
+        self.received: int = 0
+        self.underruns: int = 0
+        self.flags: int = 0
+        self.packets: int = 0
+        self.resends: int = 0
+        self.maxAhead: int = 0
+        self._count: int = 0
+        self._progress: float = time.monotonic()
+
+    @property
+    def drained(self) -> bool:
+        return bool(self.flags & STATUS_DRAINED)
+
+    def on_status(self, status: dict) -> None:
+        with self.cond:
+            if status["received"] > self.received:
+                self._progress = time.monotonic()
+            self.consumed = status["consumed"]
+            self.received = status["received"]
+            self.underruns = status["underruns"]
+            self.flags = status["flags"]
+            while self.inflight and self.inflight[0][0] + len(self.inflight[0][1]) <= self.received:
+                if not len(self.inflight[0][1]) and not self.flags & STATUS_ENDED:
+                    break  # the end marker is confirmed by the flag, not by a row count
+                self.inflight.popleft()
+            self.cond.notify_all()
+
+    def cancel(self) -> None:
+        self.stopEvent.set()
+        with self.cond:
+            self.cond.notify_all()
+
+    def _prime(self) -> None:
+        if not self.primed:
+            self.primed = True
+            if self.on_primed is not None:
+                self.on_primed()
+
+    def _send(self, firstRow: int, rows: np.ndarray) -> bool:
+        seq = STREAM_SEQ_BASE | (self._count & 0x3FFFFFFF)
+        self._count += 1
+        self.packets += 1
+        return self.send(seq, firstRow, rows)
+
+    def _resendIfStalled(self) -> None:
+        """Called with cond held: resend everything unconfirmed when the received count stopped moving."""
+        if self.inflight and time.monotonic() - self._progress > RESEND_S:
+            for firstRow, rows in list(self.inflight):
+                self._send(firstRow, rows)
+                self.resends += 1
+            self._progress = time.monotonic()
+
+    def _waitFor(self, predicate) -> bool:
+        with self.cond:
+            while not predicate():
+                if self.stopEvent.is_set():
+                    return False
+                self.cond.wait(RESEND_S / 4)
+                self._resendIfStalled()
+            return not self.stopEvent.is_set()
+
+    def run(self) -> dict:
+        """Feed the whole trajectory and wait for it to drain. Returns the stream statistics."""
+        start = time.perf_counter()
+        for rows in itertools.chain(self.chunks, [np.zeros((0, 6), dtype=np.float32)]):
+            if not self._waitFor(lambda: self.sent - self.consumed + len(rows) <= self.window_rows):
+                break
+            with self.cond:
+                firstRow = self.sent
+                self.inflight.append((firstRow, rows))
+                self.sent += len(rows)
+                self.maxAhead = max(self.maxAhead, self.sent - self.consumed)
+                self._progress = time.monotonic() if len(self.inflight) == 1 else self._progress
+            if not self._send(firstRow, rows):
+                self.cancel()
+                break
+            if not len(rows) or self.sent - self.consumed > self.window_rows - STREAM_CHUNK_ROWS:
+                self._prime()
+        else:
+            self._waitFor(lambda: self.drained)
+        self._prime()
+        stats = self.snapshot()
+        stats["elapsed_s"] = time.perf_counter() - start
+        stats["completed"] = self.drained and not self.stopEvent.is_set()
+        return stats
+
+    def snapshot(self) -> dict:
+        return {
+            "rows_sent": self.sent,
+            "rows_received": self.received,
+            "rows_played": self.consumed,
+            "buffered": self.sent - self.consumed,
+            "max_buffered": self.maxAhead,
+            "underruns": self.underruns,
+            "packets": self.packets,
+            "resends": self.resends,
+        }
@@ -0,0 +1,197 @@
+"""
+Keyframe trajectories, resampled to the 1 kHz motor tick when they are loaded.
+
+The master plays one row per motorTick, so a CSV of rows is sampled at 1 kHz and a minute of motion is 60,000 rows.
+A keyframe file puts the time in seconds before the six axes instead, spaced however the motion needs, with an
+optional first line naming the interpolation and the limits:
+
+    # method=minjerk max_velocity=0.5 max_acceleration=4
+    0.0,0,0,0,0,0,0
+    2.0,0.1,0.1,0.1,0.1,0.1,0.1
+
+    linear    straight segments, the velocity steps at each keyframe
+    cubic     clamped cubic spline, continuous acceleration, at rest at both ends
+    minjerk   minimum-jerk (quintic) blend per segment, at rest at every keyframe
+
+Limits are rad/s and rad/s², one value or one per axis. linear and minjerk lengthen the segments that would exceed
+them, cubic stretches the whole timeline, so keyframe times are the fastest the motion goes. Both are exact: the
+peaks are taken from the interpolants, not from the samples.
+"""
+
+import numpy as np
+
+TICK_HZ: int = 1000
+NUM_COL: int = 6
+METHODS: tuple[str, ...] = ("linear", "cubic", "minjerk")
+MINJERK_PEAK_V: float = 1.875  # peak velocity of a minimum-jerk segment, times distance / duration
+MINJERK_PEAK_A: float = 10 / np.sqrt(3)  # peak acceleration, times distance / duration²
+
+
+def _limit(value, name: str) -> np.ndarray | None:
+    if value is None:
+        return None
+    limit = np.broadcast_to(np.asarray(value, dtype=np.float64), (NUM_COL,))
+    if not (limit > 0).all():
+        raise ValueError(f"{name} must be > 0")
+    return limit
+
+
+def _segments(times: np.ndarray, t: np.ndarray) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """Segment index of each sample time, the segment durations and the fraction of its segment (N, 1)."""
+    seg = np.clip(np.searchsorted(times, t, side="right") - 1, 0, len(times) - 2)
+    h = np.diff(times)
+    return seg, h, ((t - times[seg]) / h[seg])[:, None]
+
+
+def _stretched(times: np.ndarray, durations: np.ndarray) -> np.ndarray:
+    return times[0] + np.concatenate(([0.0], np.cumsum(durations)))
+
+
+def clamped_slopes(times: np.ndarray, points: np.ndarray) -> np.ndarray:
+    """Knot velocities (K, 6) of the C2 cubic spline through the keyframes with zero velocity at both ends."""
+    m = np.zeros_like(points)
+    k = len(times)
+    if k < 3:
+        return m
+    h = np.diff(times)
+    delta = np.diff(points, axis=0) / h[:, None]
+    # h[i] m[i-1] + 2 (h[i-1] + h[i]) m[i] + h[i-1] m[i+1] = 3 (h[i] delta[i-1] + h[i-1] delta[i]), i = 1 .. k-2
+    lower, diag, upper = h[1:], 2 * (h[:-1] + h[1:]), h[:-1]
+    rhs = 3 * (h[1:, None] * delta[:-1] + h[:-1, None] * delta[1:])
+    # Thomas algorithm, the six axes at once
+    c = np.empty(k - 2)
+    d = np.empty_like(rhs)
+    c[0], d[0] = upper[0] / diag[0], rhs[0] / diag[0]
+    for i in range(1, k - 2):
+        w = diag[i] - lower[i] * c[i - 1]
+        c[i] = upper[i] / w
+        d[i] = (rhs[i] - lower[i] * d[i - 1]) / w
+    for i in range(k - 4, -1, -1):
+        d[i] -= c[i] * d[i + 1]
+    m[1:-1] = d
+    return m
+
+
+def cubic_peaks(times: np.ndarray, points: np.ndarray, m: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+    """Peak |velocity| and |acceleration| per axis of the cubic spline, from its segment polynomials."""
+    h = np.diff(times)[:, None]
+    delta = np.diff(points, axis=0) / h
+    m0, m1 = m[:-1], m[1:]
+    a0 = (6 * delta - 4 * m0 - 2 * m1) / h  # acceleration is linear along a segment, its peaks are at the knots
+    a1 = (-6 * delta + 2 * m0 + 4 * m1) / h
+    with np.errstate(divide="ignore", invalid="ignore"):
+        tau = np.clip(np.nan_to_num(a0 / (a0 - a1)), 0, 1)  # where the velocity turns
+    v = m0 + a0 * h * tau + (a1 - a0) * h * tau**2 / 2
+    velocity = np.max(np.abs(np.concatenate((m, v))), axis=0)
+    acceleration = np.max(np.abs(np.concatenate((a0, a1))), axis=0)
+    return velocity, acceleration
+
+
+def resample(
+    times,
+    points,
+    method: str = "cubic",
+    rate: float = TICK_HZ,
+    max_velocity=None,
+    max_acceleration=None,
+) -> np.ndarray:
+    """
+    (N, 6) float32 rows at rate Hz through keyframes points (K, 6) at times (K,) seconds, ready for upload().
+    The first row is the first keyframe and the last row the last one. Raises ValueError on bad keyframes or limits.
+    """
+    times = np.asarray(times, dtype=np.float64)
+    points = np.asarray(points, dtype=np.float64)
+    if method not in METHODS:
+        raise ValueError(f"Unknown interpolation {method!r}, expected one of {METHODS}")
+    if times.ndim != 1 or points.shape != (len(times), NUM_COL) or not len(times):
+        raise ValueError("Keyframes must be times (K,) and points (K, 6), K > 0")
+    if not (np.isfinite(times).all() and np.isfinite(points).all()):
+        raise ValueError("Keyframes must be finite")
+    if (np.diff(times) <= 0).any():
+        raise ValueError("Keyframe times must be strictly increasing")
+    if rate <= 0:
+        raise ValueError("rate must be > 0")
+    vmax = _limit(max_velocity, "max_velocity")
+    amax = _limit(max_acceleration, "max_acceleration")
+    if len(times) == 1:
+        return points.astype(np.float32)
+
+    distance = np.abs(np.diff(points, axis=0))
+    if method == "linear":
+        if amax is not None:
+            raise ValueError("linear segments step the velocity, use cubic or minjerk with max_acceleration")
+        if vmax is not None:
+            times = _stretched(times, np.maximum(np.diff(times), np.max(distance / vmax, axis=1)))
+    elif method == "minjerk":
+        durations = np.diff(times)
+        if vmax is not None:
+            durations = np.maximum(durations, np.max(MINJERK_PEAK_V * distance / vmax, axis=1))
+        if amax is not None:
+            durations = np.maximum(durations, np.max(np.sqrt(MINJERK_PEAK_A * distance / amax), axis=1))
+        times = _stretched(times, durations)
+    elif vmax is not None or amax is not None:
+        # stretching time by k divides the velocity by k and the acceleration by k², and keeps the spline's shape
+        velocity, acceleration = cubic_peaks(times, points, clamped_slopes(times, points))
+        k = max(
+            1.0,
+            np.max(velocity / vmax) if vmax is not None else 1.0,
+            np.sqrt(np.max(acceleration / amax)) if amax is not None else 1.0,
+        )
+        times = times[0] + (times - times[0]) * k
+
+    n = int(np.ceil((times[-1] - times[0]) * rate - 1e-9)) + 1
+    t = np.minimum(times[0] + np.arange(n) / rate, times[-1])
+    seg, h, tau = _segments(times, t)
+    p0, p1 = points[seg], points[seg + 1]
+    if method == "linear":
+        rows = p0 + (p1 - p0) * tau
+    elif method == "minjerk":
+        rows = p0 + (p1 - p0) * (tau**3 * (10 - 15 * tau + 6 * tau**2))
+    else:
+        m = clamped_slopes(times, points)
+        hs = h[seg][:, None]
+        tau2, tau3 = tau**2, tau**3
+        rows = (
+            (2 * tau3 - 3 * tau2 + 1) * p0
+            + (tau3 - 2 * tau2 + tau) * hs * m[seg]
+            + (-2 * tau3 + 3 * tau2) * p1
+            + (tau3 - tau2) * hs * m[seg + 1]
+        )
+    return np.ascontiguousarray(rows, dtype=np.float32)
+
+
+def read_options(path: str) -> dict:
+    """resample() keyword arguments from a "# key=value ..." first line, {} without one."""
+    with open(path, "r") as f:
+        line = f.readline().strip()
+    if not line.startswith("#"):
+        return {}
+    options = {}
+    for field in line[1:].split():
+        key, _, value = field.partition("=")
+        options[key] = value if key == "method" else float(value)
+    return options
+
+
+def is_keyframes(path: str) -> bool:
+    """True for a keyframe file: a time column before the six axes."""
+    with open(path, "r") as f:
+        for line in f:
+            if line.strip() and not line.startswith("#"):
+                return len(line.split(",")) == NUM_COL + 1
+    return False
+
+
+def load(path: str, **options) -> np.ndarray:
+    """(N, 6) float32 rows of a trajectory CSV, resampled to TICK_HZ when it holds keyframes."""
+    if not is_keyframes(path):
+        return np.loadtxt(fname=path, delimiter=",", dtype=np.float32, ndmin=2)
+    keys = np.loadtxt(fname=path, delimiter=",", dtype=np.float64, ndmin=2)
+    return resample(keys[:, 0], keys[:, 1:], **(read_options(path) | options))
+
+
+def save(path: str, times, points, **options) -> None:
+    """Write a keyframe file, options (method, max_velocity, max_acceleration) go on its first line."""
+    header = " ".join(f"{key}={value}" for key, value in options.items())
+    keys = np.column_stack((np.asarray(times, dtype=np.float64), np.asarray(points, dtype=np.float64)))
+    np.savetxt(path, keys, delimiter=",", fmt="%.9g", header=header, comments="# " if header else "")